@@ -1,3 +1,3 @@
 """Photo Tagger - Apply dive site GPS data to photos and videos"""
 
-__version__ = "0.4.1"
\ No newline at end of file
+__version__ = "0.8.32"
\ No newline at end of file
@@ -3,6 +3,9 @@
 import os
 import sys
 import logging
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import nullcontext
 
 import click
@@ -10,16 +13,50 @@ import click
 from . import __version__
 from .subsurface_parser import SubsurfaceParser
 from .media_processor import MediaProcessor
+from .video_processor import VideoProcessor
 from .matcher import InteractiveMatcher
 from .exiftool_session import ExifToolSession
 
 
+# Per-file work is dominated by metadata I/O and exiftool round-trips rather
+# than CPU, so run it on a pool larger than the core count.
+MAX_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+
+# Upper bound on files per metadata-load task. Batching lets the videos in a
+# task share one exiftool round-trip; smaller runs use smaller batches so every
+# worker still gets work.
+LOAD_BATCH_SIZE = 16
+
+
+class _MainThreadHandler(logging.StreamHandler):
+    """StreamHandler that holds back records logged on worker threads
+
+    Worker records are queued and written by flush_pending() on the main
+    thread, so they never land in the middle of an interactive match prompt.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__(stream)
+        self._pending = deque()
+
+    def handle(self, record):
+        if threading.current_thread() is not threading.main_thread():
+            self._pending.append(record)
+            return True
+        return super().handle(record)
+
+    def flush_pending(self):
+        """Write the records queued by worker threads, oldest first"""
+        while self._pending:
+            super().handle(self._pending.popleft())
+
+
 def setup_logging(verbose: bool) -> logging.Logger:
     """Setup logging configuration"""
     logger = logging.getLogger('photo_tagger')
     logger.setLevel(logging.DEBUG if verbose else logging.INFO)
 
-    handler = logging.StreamHandler()
+    handler = _MainThreadHandler()
     formatter = logging.Formatter(
         '%(levelname)s: %(message)s' if not verbose
         else '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -53,34 +90,33 @@ def _print_dive_match_summary(dives, matched_dives):
             click.echo(f"  • Dive #{dive_num}: {dive.site.name} - {count} {plural}")
 
 
-def _check_camera_tag_warnings(dives, matched_dives, photo_timestamps):
+def _check_camera_tag_warnings(dives, matched_dives, oldest_photo, newest_photo):
     """Check for camera tag mismatches and print warnings
 
     Args:
         dives: List of all dives
         matched_dives: Dictionary mapping dive number to count of matched files
-        photo_timestamps: List of all photo capture timestamps
+        oldest_photo: Earliest photo capture timestamp, or None if there were none
+        newest_photo: Latest photo capture timestamp
     """
-    if not photo_timestamps:
+    if oldest_photo is None:
         return
 
-    # Determine photo date range
-    oldest_photo = min(photo_timestamps)
-    newest_photo = max(photo_timestamps)
+    # Single pass over the dives in the photo date range: a dive is flagged
+    # when having matched photos and having the "camera" tag disagree
+    untagged_with_photos = []
+    tagged_without_photos = []
+    for dive in dives:
+        if not oldest_photo <= dive.time <= newest_photo:
+            continue
 
-    # Find dives within the photo date range
-    dives_in_range = [d for d in dives if oldest_photo <= d.time <= newest_photo]
+        has_photos = dive.number in matched_dives
+        if has_photos == ('camera' in dive.tags):
+            continue
 
-    # Find dives with matches but no "camera" tag
-    untagged_with_photos = []
-    for dive in dives_in_range:
-        if dive.number in matched_dives and 'camera' not in dive.tags:
+        if has_photos:
             untagged_with_photos.append(dive)
-
-    # Find dives with "camera" tag but no matches
-    tagged_without_photos = []
-    for dive in dives_in_range:
-        if 'camera' in dive.tags and dive.number not in matched_dives:
+        else:
             tagged_without_photos.append(dive)
 
     # Print warnings if any issues found
@@ -98,6 +134,125 @@ def _check_camera_tag_warnings(dives, matched_dives, photo_timestamps):
                 click.echo(f"    • Dive #{dive.number} - {dive.site.name} ({dive.time.strftime('%Y-%m-%d')})")
 
 
+def _load_media_batch(media_paths, exiftool_session):
+    """Create processors for a batch of files and read their metadata (runs on a worker thread)
+
+    The videos in the batch have their metadata fetched in a single exiftool
+    round-trip before the per-file reads.
+
+    Args:
+        media_paths: Paths to the media files
+        exiftool_session: Shared ExifToolSession used for exiftool reads
+
+    Returns:
+        List of (processor, capture_time, existing_gps, error) tuples in the
+        order of media_paths. On failure error holds the exception and the
+        other fields are None.
+    """
+    processors = []
+    for media_path in media_paths:
+        try:
+            processors.append(MediaProcessor.create_processor(media_path, exiftool_session=exiftool_session))
+        except Exception as e:
+            processors.append(e)
+
+    videos = [processor for processor in processors if isinstance(processor, VideoProcessor)]
+    if len(videos) > 1:
+        VideoProcessor.load_metadata_batch(videos, exiftool_session)
+
+    results = []
+    for processor in processors:
+        if isinstance(processor, Exception):
+            results.append((None, None, None, processor))
+            continue
+        try:
+            capture_time = processor.get_capture_time()
+            existing_gps = processor.get_current_gps() if capture_time else None
+            results.append((processor, capture_time, existing_gps, None))
+        except Exception as e:
+            results.append((None, None, None, e))
+    return results
+
+
+def _flush_worker_logs(logger):
+    """Write the log records held back from worker threads (main thread only)"""
+    for handler in logger.handlers:
+        if isinstance(handler, _MainThreadHandler):
+            handler.flush_pending()
+
+
+def _iter_load_results(load_futures):
+    """Yield per-file load results from a deque of batch futures, in submission order
+
+    Each future is popped before its results are yielded, so finished batches
+    are released as they are consumed rather than kept for the whole run.
+    """
+    while load_futures:
+        yield from load_futures.popleft().result()
+
+
+def _apply_match(processor, media_path, match, capture_time, exiftool_session, sidecar_lock):
+    """Write GPS coordinates and XMP keywords for a match (runs on a worker thread)
+
+    Args:
+        processor: ImageProcessor or VideoProcessor for media_path
+        media_path: Path to the media file
+        match: Confirmed dive match for the file
+        capture_time: The file's capture time, already read during loading
+        exiftool_session: Shared ExifToolSession (or None)
+        sidecar_lock: Lock guarding the file's XMP sidecar
+
+    Returns:
+        True if the XMP sidecar was written
+    """
+    logger = logging.getLogger('photo_tagger')
+    site = match.dive.site
+    file_name = os.path.basename(media_path)
+
+    # Apply GPS coordinates and XMP keywords
+    logger.debug("Applying GPS and keywords from '%s' to %s", site.name, file_name)
+
+    gps_success = False
+    xmp_success = False
+
+    # Try to apply GPS coordinates (may fail for some formats)
+    try:
+        gps_success = processor.set_gps_coordinates(
+            site.latitude,
+            site.longitude,
+            dry_run=False,
+            exiftool_session=exiftool_session
+        )
+        if gps_success:
+            logger.debug("Successfully updated GPS coordinates in media file")
+    except Exception as e:
+        logger.warning("Could not update GPS in media file: %s", e)
+
+    # Create XMP sidecar with dive site name as keyword and GPS coordinates
+    # Include GPS in XMP if media GPS writing failed
+    try:
+        with sidecar_lock:
+            xmp_success = processor.create_xmp_sidecar(
+                keywords=[site.name],
+                latitude=site.latitude if not gps_success else None,
+                longitude=site.longitude if not gps_success else None,
+                dry_run=False,
+                capture_time=capture_time
+            )
+        if xmp_success:
+            logger.debug("Created XMP sidecar with keywords%s", '' if gps_success else ' and GPS')
+    except Exception as e:
+        logger.error("Failed to create XMP sidecar: %s", e)
+
+    # Consider it successful if at least XMP was created
+    if xmp_success:
+        logger.debug("Successfully processed %s", file_name)
+    else:
+        logger.error("Failed to process %s", file_name)
+
+    return xmp_success
+
+
 @click.command()
 @click.version_option(version=__version__, prog_name='photo-tagger')
 @click.option('--subsurface-file', '-s', required=True,
@@ -125,20 +280,20 @@ def main(subsurface_file: str, images_dir: str, verbose: bool, dry_run: bool, re
     
     try:
         # Parse subsurface file
-        logger.debug(f"Parsing subsurface file: {subsurface_file}")
+        logger.debug("Parsing subsurface file: %s", subsurface_file)
         parser = SubsurfaceParser(subsurface_file)
-        dives = parser.parse()
+        dives = parser.parse_cached()
 
         if not dives:
             logger.error("No dives found in subsurface file")
             sys.exit(1)
 
-        logger.debug(f"Found {len(dives)} dives")
+        logger.debug("Found %d dives", len(dives))
 
         # Find media files
-        excluded_folders_list = list(exclude_folders) if exclude_folders else None
-        logger.debug(f"Scanning for media files in: {images_dir}")
-        media_files = MediaProcessor.find_media_files(images_dir, recursive=recursive, excluded_folders=excluded_folders_list)
+        excluded_folders = frozenset(exclude_folders)
+        logger.debug("Scanning for media files in: %s", images_dir)
+        media_files = MediaProcessor.find_media_files(images_dir, recursive=recursive, excluded_folders=excluded_folders)
 
         if not media_files:
             logger.error("No supported media files found in directory")
@@ -154,8 +309,9 @@ def main(subsurface_file: str, images_dir: str, verbose: bool, dry_run: bool, re
         processed_count = 0
         skipped_count = 0
         error_count = 0
-        matched_dives = {}  # Track dive number -> count of matched files
-        photo_timestamps = []  # Track all photo timestamps to determine date range
+        matched_dives = Counter()  # Track dive number -> count of matched files
+        # Track the photo date range as it is seen
+        oldest_photo = newest_photo = None
 
         # Use progress bar unless in verbose mode or dry run
         show_progress = not verbose and not dry_run
@@ -170,109 +326,113 @@ def main(subsurface_file: str, images_dir: str, verbose: bool, dry_run: bool, re
 
         # Keep a single exiftool process alive for the whole run so the
         # exiftool-backed formats (ARW/TIFF/videos) don't pay startup per file.
+        # Dry runs only read, and video reads fall back to one exiftool run
+        # per load batch, so they don't start the session.
         exiftool_ctx = ExifToolSession() if not dry_run else nullcontext()
-        with exiftool_ctx as exiftool_session, progress_context as media_iterator:
-            for media_path in media_iterator:
-                logger.debug(f"Processing: {os.path.basename(media_path)}")
-
-                try:
-                    # Create appropriate processor for the media file
-                    processor = MediaProcessor.create_processor(media_path)
-                    capture_time = processor.get_capture_time()
+        with exiftool_ctx as exiftool_session, \
+                ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor, \
+                progress_context as media_iterator:
+            # Metadata reads don't need the user, so start them all up front;
+            # results are consumed in order while matching below.
+            batch_size = max(1, min(LOAD_BATCH_SIZE, len(media_files) // MAX_WORKERS))
+            load_futures = deque(
+                executor.submit(_load_media_batch, media_files[i:i + batch_size], exiftool_session)
+                for i in range(0, len(media_files), batch_size)
+            )
+            write_futures = []
+            sidecar_locks = {}
+
+            try:
+                for media_path, load_result in zip(media_iterator, _iter_load_results(load_futures)):
+                    _flush_worker_logs(logger)
+                    file_name = os.path.basename(media_path)
+                    logger.debug("Processing: %s", file_name)
+
+                    processor, capture_time, existing_gps, load_error = load_result
+                    if load_error is not None:
+                        logger.error("Error processing %s: %s", file_name, load_error)
+                        error_count += 1
+                        continue
 
                     if not capture_time:
-                        logger.warning(f"No capture time found for {os.path.basename(media_path)}")
+                        logger.warning("No capture time found for %s", file_name)
                         skipped_count += 1
                         continue
 
                     # Track photo timestamp for date range analysis
-                    photo_timestamps.append(capture_time)
+                    if oldest_photo is None:
+                        oldest_photo = newest_photo = capture_time
+                    elif capture_time < oldest_photo:
+                        oldest_photo = capture_time
+                    elif capture_time > newest_photo:
+                        newest_photo = capture_time
 
-                    logger.debug(f"Media capture time: {capture_time}")
+                    logger.debug("Media capture time: %s", capture_time)
 
-                    # Check for existing GPS
-                    existing_gps = processor.get_current_gps()
                     if existing_gps and not dry_run:
-                        logger.debug(f"Existing GPS coordinates: {existing_gps}")
-
-                    # Find match
-                    match = matcher.get_user_confirmed_match(media_path)
+                        logger.debug("Existing GPS coordinates: %s", existing_gps)
+
+                    try:
+                        # Find match (may prompt, so this stays on the main thread)
+                        match = matcher.get_user_confirmed_match(media_path, photo_time=capture_time)
+                    except Exception as e:
+                        logger.error("Error processing %s: %s", file_name, e)
+                        error_count += 1
+                        continue
 
                     if not match:
-                        logger.debug(f"No dive match selected for {os.path.basename(media_path)}")
+                        logger.debug("No dive match selected for %s", file_name)
                         skipped_count += 1
                         continue
 
                     # Track that this dive had a photo matched to it
-                    if match.dive.number not in matched_dives:
-                        matched_dives[match.dive.number] = 0
                     matched_dives[match.dive.number] += 1
 
+                    site = match.dive.site
+
                     # Check if dive site has GPS coordinates
-                    if not (match.dive.site.latitude and match.dive.site.longitude):
-                        logger.warning(f"Dive site '{match.dive.site.name}' has no GPS coordinates")
+                    if not (site.latitude and site.longitude):
+                        logger.warning("Dive site '%s' has no GPS coordinates", site.name)
                         skipped_count += 1
                         continue
 
                     # Show what we're doing
                     if dry_run:
                         click.echo(f"""
-WOULD UPDATE: {os.path.basename(media_path)}
+WOULD UPDATE: {file_name}
   Capture time: {capture_time.strftime('%Y-%m-%d %H:%M:%S')}
-  Matched to: Dive #{match.dive.number} - {match.dive.site.name}
+  Matched to: Dive #{match.dive.number} - {site.name}
   Dive time: {match.dive.time.strftime('%Y-%m-%d %H:%M:%S')}
-  GPS: {match.dive.site.latitude:.6f}, {match.dive.site.longitude:.6f}
+  GPS: {site.latitude:.6f}, {site.longitude:.6f}
   Confidence: {match.confidence}
-  XMP Keywords: {match.dive.site.name}
+  XMP Keywords: {site.name}
 """)
                         processed_count += 1
                     else:
-                        # Apply GPS coordinates and XMP keywords
-                        logger.debug(f"Applying GPS and keywords from '{match.dive.site.name}' to {os.path.basename(media_path)}")
-
-                        gps_success = False
-                        xmp_success = False
-
-                        # Try to apply GPS coordinates (may fail for some formats)
-                        try:
-                            gps_success = processor.set_gps_coordinates(
-                                match.dive.site.latitude,
-                                match.dive.site.longitude,
-                                dry_run=False,
-                                exiftool_session=exiftool_session
-                            )
-                            if gps_success:
-                                logger.debug("Successfully updated GPS coordinates in media file")
-                        except Exception as e:
-                            logger.warning(f"Could not update GPS in media file: {e}")
-
-                        # Create XMP sidecar with dive site name as keyword and GPS coordinates
-                        # Include GPS in XMP if media GPS writing failed
-                        try:
-                            xmp_success = processor.create_xmp_sidecar(
-                                keywords=[match.dive.site.name],
-                                latitude=match.dive.site.latitude if not gps_success else None,
-                                longitude=match.dive.site.longitude if not gps_success else None,
-                                dry_run=False
-                            )
-                            if xmp_success:
-                                logger.debug(f"Created XMP sidecar with keywords{' and GPS' if not gps_success else ''}")
-                        except Exception as e:
-                            logger.error(f"Failed to create XMP sidecar: {e}")
-
-                        # Consider it successful if at least XMP was created
-                        if xmp_success:
-                            processed_count += 1
-                            logger.debug(f"Successfully processed {os.path.basename(media_path)}")
-                        else:
-                            logger.error(f"Failed to process {os.path.basename(media_path)}")
-                            error_count += 1
-
-                except Exception as e:
-                    logger.error(f"Error processing {os.path.basename(media_path)}: {e}")
+                        # Files sharing a stem (e.g. IMG_1.CR3 + IMG_1.JPG) share
+                        # one XMP sidecar, so their writes must not overlap.
+                        sidecar_lock = sidecar_locks.setdefault(
+                            os.path.splitext(media_path)[0], threading.Lock()
+                        )
+                        write_futures.append(executor.submit(
+                            _apply_match, processor, media_path, match, capture_time, exiftool_session, sidecar_lock
+                        ))
+            except BaseException:
+                # Don't read the rest of the directory when interrupted
+                for load_future in load_futures:
+                    load_future.cancel()
+                raise
+            finally:
+                _flush_worker_logs(logger)
+
+            # Aggregate the background writes (_apply_match reports its own failures)
+            for future in as_completed(write_futures):
+                if future.result():
+                    processed_count += 1
+                else:
                     error_count += 1
-                    continue
-        
+                _flush_worker_logs(logger)
+
         # Summary
         click.echo(f"\n{'DRY RUN ' if dry_run else ''}SUMMARY:")
         click.echo(f"  Total media files: {len(media_files)}")
@@ -285,8 +445,8 @@ WOULD UPDATE: {os.path.basename(media_path)}
         _print_dive_match_summary(dives, matched_dives)
 
         # Camera tag analysis
-        if photo_timestamps:
-            _check_camera_tag_warnings(dives, matched_dives, photo_timestamps)
+        if oldest_photo is not None:
+            _check_camera_tag_warnings(dives, matched_dives, oldest_photo, newest_photo)
 
         if error_count > 0:
             sys.exit(1)
@@ -295,7 +455,7 @@ WOULD UPDATE: {os.path.basename(media_path)}
         logger.info("Operation cancelled by user")
         sys.exit(1)
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         if verbose:
             import traceback
             traceback.print_exc()
@@ -0,0 +1,133 @@
+"""Minimal EXIF reader for the capture time of JPEG and TIFF files.
+
+Capture time lookup needs only the EXIF date tags, but the general-purpose
+libraries decode the whole metadata tree, and piexif reads a TIFF into memory
+in full (a layered Photoshop TIFF can be over 1GB). This module reads just
+the bytes on the way to the date tags: the JPEG segment headers up to the
+Exif APP1 segment (or the TIFF header), IFD0 and the Exif IFD.
+
+Anything unexpected yields None, so callers can fall back to a full parser.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import BinaryIO
+
+# TIFF tags
+DATETIME = 0x0132
+EXIF_IFD_POINTER = 0x8769
+DATETIME_ORIGINAL = 0x9003
+DATETIME_DIGITIZED = 0x9004
+
+ASCII = 2
+
+# JPEG markers
+SOI = b'\xff\xd8'
+APP1 = 0xE1
+SOS = 0xDA
+EOI = 0xD9
+EXIF_HEADER = b'Exif\x00\x00'
+
+# Refuse IFDs with more entries than any real file has; guards against
+# reading garbage as an IFD
+MAX_IFD_ENTRIES = 1024
+
+
+def read_capture_time_string(path: str) -> str | None:
+    """Return the raw EXIF capture time string, e.g. "2024:01:15 14:30:45"
+
+    Prefers DateTimeOriginal, then DateTimeDigitized, then IFD0 DateTime.
+    Returns None if the file isn't a JPEG or TIFF with one of those tags, or
+    if its structure can't be read.
+    """
+    try:
+        with open(path, 'rb') as f:
+            magic = f.read(2)
+            if magic == SOI:
+                base = _find_jpeg_exif(f)
+            elif magic in (b'II', b'MM'):
+                base = 0
+            else:
+                return None
+
+            if base is None:
+                return None
+            return _read_dates(f, base)
+    except (OSError, struct.error, ValueError):
+        return None
+
+
+def _find_jpeg_exif(f: BinaryIO) -> int | None:
+    """Walk JPEG segment headers and return the offset of the Exif TIFF data"""
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] in (SOS, EOI):
+            # Metadata segments all come before the image data
+            return None
+
+        # The length counts its own two bytes but not the marker
+        segment_start = f.tell()
+        length = struct.unpack('>H', f.read(2))[0]
+        if marker[1] == APP1 and f.read(6) == EXIF_HEADER:
+            return f.tell()
+        f.seek(segment_start + length)
+
+
+def _read_dates(f: BinaryIO, base: int) -> str | None:
+    """Read the date tags from the TIFF structure starting at base"""
+    f.seek(base)
+    header = f.read(8)
+    if header[:2] == b'II':
+        endian = '<'
+    elif header[:2] == b'MM':
+        endian = '>'
+    else:
+        return None
+    if struct.unpack(endian + 'H', header[2:4])[0] != 42:
+        return None
+
+    ifd0 = _read_ifd(f, base, endian, struct.unpack(endian + 'I', header[4:8])[0])
+
+    exif_ifd = {}
+    if EXIF_IFD_POINTER in ifd0:
+        _, _, value = ifd0[EXIF_IFD_POINTER]
+        exif_ifd = _read_ifd(f, base, endian, struct.unpack(endian + 'I', value)[0])
+
+    for ifd, tag in ((exif_ifd, DATETIME_ORIGINAL), (exif_ifd, DATETIME_DIGITIZED), (ifd0, DATETIME)):
+        if tag in ifd:
+            text = _read_ascii(f, base, endian, ifd[tag])
+            if text:
+                return text
+    return None
+
+
+def _read_ifd(f: BinaryIO, base: int, endian: str, offset: int) -> dict[int, tuple[int, int, bytes]]:
+    """Read an IFD, returning {tag: (type, count, raw value/offset field)}"""
+    f.seek(base + offset)
+    count = struct.unpack(endian + 'H', f.read(2))[0]
+    if count > MAX_IFD_ENTRIES:
+        raise ValueError("Implausible IFD entry count")
+
+    data = f.read(12 * count)
+    entries = {}
+    for i in range(count):
+        tag, typ, n, value = struct.unpack(endian + 'HHI4s', data[i * 12:i * 12 + 12])
+        entries[tag] = (typ, n, value)
+    return entries
+
+
+def _read_ascii(f: BinaryIO, base: int, endian: str, entry: tuple[int, int, bytes]) -> str | None:
+    """Decode an ASCII tag value, stored inline or at an offset"""
+    typ, count, value = entry
+    if typ != ASCII:
+        return None
+    if count <= 4:
+        raw = value[:count]
+    else:
+        f.seek(base + struct.unpack(endian + 'I', value)[0])
+        raw = f.read(count)
+    text = raw.split(b'\x00', 1)[0].decode('ascii', errors='replace').strip()
+    return text or None
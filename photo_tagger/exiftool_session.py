@@ -1,4 +1,4 @@
-"""Persistent exiftool process for batched metadata writes.
+"""Persistent exiftool process for batched metadata reads and writes.
 
 exiftool pays a per-invocation startup cost (Perl interpreter + module load).
 Spawning a fresh process for every file is wasteful on a large run, so this
@@ -6,11 +6,24 @@ module keeps a single exiftool process alive (via its ``-stay_open`` mode,
 wrapped by PyExifTool) for the whole run and feeds every file through it.
 
 Use as a context manager. If exiftool or PyExifTool isn't available, the
-session degrades gracefully: ``available`` is False and ``set_gps`` returns
-False so callers fall back to writing GPS into an XMP sidecar.
+session degrades gracefully: ``available`` is False, ``set_gps`` returns
+False so callers fall back to writing GPS into an XMP sidecar, and
+``get_tags`` returns nothing so callers fall back to a one-shot exiftool run.
+
+The session is safe to share between threads: exiftool handles one command at
+a time, so requests are serialized on a lock.
 """
 
+from __future__ import annotations
+
 import shutil
+import threading
+
+# -fast skips scanning for trailers and past AVI stream data, which read-only
+# date/GPS lookups never need. -fast2 is deliberately not used: it stops at the
+# QuickTime mdat atom, and many cameras write the moov atom (with CreateDate and
+# GPS) after it.
+READ_PARAMS = ['-fast']
 
 
 class ExifToolSession:
@@ -18,13 +31,14 @@ class ExifToolSession:
 
     def __init__(self):
         self._helper = None
+        self._lock = threading.Lock()
 
     @property
     def available(self) -> bool:
         """True when a live exiftool process is ready to accept writes."""
         return self._helper is not None
 
-    def __enter__(self) -> "ExifToolSession":
+    def __enter__(self) -> ExifToolSession:
         if shutil.which('exiftool'):
             try:
                 from exiftool import ExifToolHelper
@@ -44,6 +58,38 @@ class ExifToolSession:
             self._helper = None
         return False
 
+    def get_tags(self, paths: list[str], tags: list[str]) -> dict[str, dict]:
+        """Read tags for several files in a single exiftool round-trip.
+
+        Returns a dict mapping each path to its tags, keyed by bare tag name
+        (group prefixes such as ``QuickTime:`` are dropped, first one wins).
+        Values are exiftool's numeric (``-n``) form. Returns an empty dict if
+        the session isn't available or the read fails.
+        """
+        if self._helper is None or not paths:
+            return {}
+
+        # Importable whenever a helper was started
+        from exiftool.exceptions import ExifToolException
+
+        try:
+            with self._lock:
+                results = self._helper.get_tags(list(paths), tags, params=READ_PARAMS)
+        except (ExifToolException, OSError, ValueError):
+            return {}
+
+        # Results are matched to paths by position, so only trust a full set
+        if len(results) != len(paths):
+            return {}
+
+        metadata = {}
+        for path, result in zip(paths, results):
+            tag_values = {}
+            for key, value in result.items():
+                tag_values.setdefault(key.rsplit(':', 1)[-1], value)
+            metadata[path] = tag_values
+        return metadata
+
     def set_gps(self, image_path: str, latitude: float, longitude: float) -> bool:
         """Embed GPS coordinates into image_path via the shared process.
 
@@ -57,16 +103,17 @@ class ExifToolSession:
         lon_ref = 'E' if longitude >= 0 else 'W'
 
         try:
-            self._helper.set_tags(
-                [image_path],
-                tags={
-                    'GPSLatitude': abs(latitude),
-                    'GPSLatitudeRef': lat_ref,
-                    'GPSLongitude': abs(longitude),
-                    'GPSLongitudeRef': lon_ref,
-                },
-                params=['-overwrite_original'],
-            )
+            with self._lock:
+                self._helper.set_tags(
+                    [image_path],
+                    tags={
+                        'GPSLatitude': abs(latitude),
+                        'GPSLatitudeRef': lat_ref,
+                        'GPSLongitude': abs(longitude),
+                        'GPSLongitudeRef': lon_ref,
+                    },
+                    params=['-overwrite_original'],
+                )
             return True
         except Exception:
             return False
@@ -0,0 +1,94 @@
+"""Concurrent directory scanning for media discovery.
+
+Listing a directory is latency-bound rather than CPU-bound, and on network
+shares (NFS/SMB) each listing is a round-trip. Subdirectories are therefore
+listed concurrently on a thread pool. os.scandir supplies each entry's type
+from the listing itself, so files are filtered by name without a stat call.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Iterable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Directory listings wait on the filesystem, not the CPU
+SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def has_suffix(file_name: str, suffixes: tuple[str, ...]) -> bool:
+    """Whether file_name (a bare name, no directory) ends with one of suffixes
+
+    Case-insensitive. Leading dots don't count towards the stem, as in
+    os.path.splitext, so a dotfile named just ".jpg" has no extension.
+    """
+    return file_name.lstrip('.').lower().endswith(suffixes)
+
+
+def scan_files(directory: str, extensions: Iterable[str], recursive: bool = True,
+               excluded_folders: Iterable[str] | None = None) -> list[str]:
+    """Find files under directory whose name ends with one of extensions (see has_suffix)
+
+    Args:
+        directory: Directory to search in
+        extensions: Lowercase extensions to match, including the dot
+        recursive: If True, search subdirectories too
+        excluded_folders: Folder names to skip entirely (never listed)
+
+    Returns:
+        Matching file paths, unsorted
+
+    Raises:
+        FileNotFoundError: If directory doesn't exist. A directory that
+            can't be listed (or a path that isn't a directory) gives no
+            files, and subdirectories that can't be listed are skipped,
+            like os.walk.
+    """
+    if not os.path.exists(directory):
+        raise FileNotFoundError(f"Directory not found: {directory}")
+
+    excluded_folders = frozenset(excluded_folders or ())
+    # str.endswith takes a tuple and tests every suffix in one call
+    suffixes = tuple(extensions)
+    files, subdirs = _scan_subdirectory(directory, suffixes, excluded_folders)
+
+    if not recursive or not subdirs:
+        return files
+
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+        pending = {executor.submit(_scan_subdirectory, subdir, suffixes, excluded_folders)
+                   for subdir in subdirs}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                dir_files, dir_subdirs = future.result()
+                files.extend(dir_files)
+                pending.update(executor.submit(_scan_subdirectory, subdir, suffixes, excluded_folders)
+                               for subdir in dir_subdirs)
+
+    return files
+
+
+def _scan_directory(directory: str, suffixes: tuple[str, ...],
+                    excluded_folders: frozenset) -> tuple[list[str], list[str]]:
+    """List one directory, returning (matching files, subdirectories to descend)"""
+    files = []
+    subdirs = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            # Don't follow directory symlinks, to avoid cycles
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in excluded_folders:
+                    subdirs.append(entry.path)
+            elif has_suffix(entry.name, suffixes) and entry.is_file():
+                files.append(entry.path)
+    return files, subdirs
+
+
+def _scan_subdirectory(directory: str, suffixes: tuple[str, ...],
+                       excluded_folders: frozenset) -> tuple[list[str], list[str]]:
+    """List a directory, treating one that can't be read as empty"""
+    try:
+        return _scan_directory(directory, suffixes, excluded_folders)
+    except OSError:
+        return [], []
@@ -1,15 +1,23 @@
 """Image processing and EXIF metadata handling"""
 
+from __future__ import annotations
+
 import os
 import shutil
 import subprocess
+from functools import lru_cache
+
 import piexif
-import exifread
 import exiv2
 from datetime import datetime
-from typing import Optional, Tuple, List
+from collections.abc import Iterable
+from typing import ClassVar
 from lxml import etree
 
+from .exif_reader import read_capture_time_string
+from .file_scan import has_suffix, scan_files
+from .sidecar import XMP_TEMPLATE, write_if_changed, xmp_keyword_items
+
 
 # exiv2 logs to stderr for tags it can't parse, e.g. the large Photoshop
 # ImageSourceData tag (0x935c) in layered TIFFs ("Directory Image, entry 0x935c
@@ -19,11 +27,16 @@ from lxml import etree
 # code detects real failures via exceptions (caught below), not these log lines.
 exiv2.LogMsg.setLevel(exiv2.LogMsg.Level.mute)
 
+# Marks a cached metadata value that has not been read yet (None is a valid result)
+_NOT_LOADED = object()
+
 
 class ImageProcessor:
     """Handles reading and writing EXIF metadata in images"""
     
-    SUPPORTED_EXTENSIONS = {'.cr3', '.cr2', '.jpg', '.jpeg', '.tiff', '.tif', '.arw'}
+    SUPPORTED_EXTENSIONS = frozenset({'.cr3', '.cr2', '.jpg', '.jpeg', '.tiff', '.tif', '.arw'})
+    # For file_scan.has_suffix, which tests every suffix in one call without splitting the name
+    SUPPORTED_EXTENSIONS_TUPLE = tuple(sorted(SUPPORTED_EXTENSIONS))
 
     # Formats that must be written with exiftool rather than exiv2/piexif,
     # because the exiv2/piexif rewrite drops data they don't understand:
@@ -35,34 +48,101 @@ class ImageProcessor:
     # exiftool writes GPS into these in-place with the full structure preserved.
     # If exiftool is not installed, set_gps_coordinates reports failure so the
     # caller falls back to writing GPS into an XMP sidecar.
-    EXIFTOOL_EMBED_EXTENSIONS = {'.arw', '.tif', '.tiff'}
+    EXIFTOOL_EMBED_EXTENSIONS = frozenset({'.arw', '.tif', '.tiff'})
+
+    # Formats whose capture time is read with the minimal EXIF reader first:
+    # it reads only the few hundred bytes on the path to the date tags, where
+    # exiv2 decodes every metadata block and piexif loads a TIFF in full.
+    FAST_EXIF_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.tif', '.tiff'})
+
+    # XMP DateTimeOriginal format (ISO 8601, following the sample sidecars)
+    XMP_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.00Z'
+
+    XMP_NAMESPACES: ClassVar[dict[str, str]] = {
+        'x': 'adobe:ns:meta/',
+        'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
+        'dc': 'http://purl.org/dc/elements/1.1/',
+        'lightroom': 'http://ns.adobe.com/lightroom/1.0/',
+        'exif': 'http://ns.adobe.com/exif/1.0/'
+    }
+
+    # Keyword queries, compiled once instead of on every sidecar update
+    _DC_SUBJECT_XPATH = etree.XPath('//dc:subject/rdf:Bag/rdf:li/text()', namespaces=XMP_NAMESPACES)
+    _LR_SUBJECT_XPATH = etree.XPath('//lightroom:hierarchicalSubject/rdf:Bag/rdf:li/text()',
+                                    namespaces=XMP_NAMESPACES)
     
-    def __init__(self, image_path: str):
+    def __init__(self, image_path: str, exiftool_session=None):
+        """exiftool_session: an optional shared ExifToolSession, used by default
+        for the exiftool-only formats in set_gps_coordinates.
+        """
         self.image_path = image_path
+        self.exiftool_session = exiftool_session
+
+        # Metadata read results, cached so repeated getters don't re-parse the file
+        self._capture_time = _NOT_LOADED
+        self._gps = _NOT_LOADED
+        # Last piexif load and the (mtime_ns, size) it was read at, shared by
+        # the GPS read and the piexif GPS write
+        self._piexif_data = None
+        self._piexif_key = None
+
+        # Check the extension before touching the filesystem
+        if not has_suffix(os.path.basename(image_path), self.SUPPORTED_EXTENSIONS_TUPLE):
+            ext = os.path.splitext(image_path)[1].lower()
+            raise ValueError(f"Unsupported image format: {ext}")
+
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"Image file not found: {image_path}")
-        
-        # Check if file extension is supported
-        ext = os.path.splitext(image_path)[1].lower()
-        if ext not in self.SUPPORTED_EXTENSIONS:
-            raise ValueError(f"Unsupported image format: {ext}")
     
-    def get_capture_time(self) -> Optional[datetime]:
+    def get_capture_time(self) -> datetime | None:
         """Extract the capture time from image EXIF data"""
-        # First try exiv2 (best support for RAW formats including CR3)
-        capture_time = self._get_capture_time_exiv2()
-        if capture_time:
-            return capture_time
-        
-        # Fallback to piexif (works with JPEG, TIFF)
-        capture_time = self._get_capture_time_piexif()
-        if capture_time:
-            return capture_time
+        if self._capture_time is _NOT_LOADED:
+            try:
+                stat = os.stat(self.image_path)
+            except OSError:
+                self._capture_time = self._read_capture_time()
+            else:
+                self._capture_time = _cached_capture_time(self.image_path, stat.st_mtime_ns, stat.st_size)
+        return self._capture_time
+
+    def _read_capture_time(self) -> datetime | None:
+        """Read the capture time from the file, trying each EXIF library in turn"""
+        # exiv2 has the best support for RAW formats including CR3;
+        # piexif works with JPEG and TIFF
+        readers = (self._get_capture_time_exiv2, self._get_capture_time_piexif)
+
+        ext = os.path.splitext(self.image_path)[1].lower()
+        if ext in self.FAST_EXIF_EXTENSIONS:
+            readers = (self._get_capture_time_fast,) + readers
+
+        for reader in readers:
+            capture_time = reader()
+            if capture_time:
+                return capture_time
         
-        # Last resort: exifread
-        return self._get_capture_time_exifread()
+        return None
+    
+    def _get_capture_time_fast(self) -> datetime | None:
+        """Extract capture time by reading only the JPEG/TIFF EXIF date tags"""
+        dt_str = read_capture_time_string(self.image_path)
+        if not dt_str:
+            return None
+        try:
+            return self._parse_exif_datetime(dt_str)
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _parse_exif_datetime(dt_str: str) -> datetime:
+        """Parse an EXIF datetime ("YYYY:MM:DD HH:MM:SS"), raising ValueError if invalid"""
+        # The layout is fixed, so slice it rather than run strptime's format
+        # interpreter; anything off-layout still goes through strptime
+        if len(dt_str) == 19 and dt_str[4] == dt_str[7] == dt_str[13] == dt_str[16] == ':' and dt_str[10] == ' ':
+            return datetime(int(dt_str[0:4]), int(dt_str[5:7]), int(dt_str[8:10]),
+                            int(dt_str[11:13]), int(dt_str[14:16]), int(dt_str[17:19]))
+        return datetime.strptime(dt_str, '%Y:%m:%d %H:%M:%S')
     
-    def _get_capture_time_exiv2(self) -> Optional[datetime]:
+    def _get_capture_time_exiv2(self) -> datetime | None:
         """Extract capture time using exiv2 library (best for RAW formats)"""
         try:
             image = exiv2.ImageFactory.open(self.image_path)
@@ -78,21 +158,24 @@ class ImageProcessor:
             ]
             
             for tag_name in datetime_tags:
-                for tag in exif_data:
-                    if tag.key() == tag_name:
-                        try:
-                            # EXIF datetime format: "YYYY:MM:DD HH:MM:SS"
-                            dt_str = tag.print()
-                            return datetime.strptime(dt_str, '%Y:%m:%d %H:%M:%S')
-                        except ValueError:
-                            continue
+                # Keyed lookup in exiv2, rather than wrapping every tag in Python
+                # to compare keys (RAW files carry hundreds of tags)
+                tag = exif_data.findKey(exiv2.ExifKey(tag_name))
+                if tag == exif_data.end():
+                    continue
+                try:
+                    # EXIF datetime format: "YYYY:MM:DD HH:MM:SS"
+                    dt_str = tag.print()
+                    return self._parse_exif_datetime(dt_str)
+                except ValueError:
+                    continue
             
             return None
             
         except Exception:
             return None
     
-    def _get_capture_time_piexif(self) -> Optional[datetime]:
+    def _get_capture_time_piexif(self) -> datetime | None:
         """Extract capture time using piexif library"""
         try:
             exif_data = piexif.load(self.image_path)
@@ -109,49 +192,34 @@ class ImageProcessor:
                     try:
                         # EXIF datetime format: "YYYY:MM:DD HH:MM:SS"
                         dt_str = dt_field.decode('utf-8') if isinstance(dt_field, bytes) else dt_field
-                        return datetime.strptime(dt_str, '%Y:%m:%d %H:%M:%S')
+                        return self._parse_exif_datetime(dt_str)
                     except (ValueError, UnicodeDecodeError):
                         continue
             
             return None
             
-        except Exception:
-            # Piexif failed, will try exifread
-            return None
-    
-    def _get_capture_time_exifread(self) -> Optional[datetime]:
-        """Extract capture time using exifread library (better for RAW formats)"""
-        try:
-            with open(self.image_path, 'rb') as f:
-                tags = exifread.process_file(f)
-            
-            # Try different EXIF tags in order of preference
-            datetime_tags = [
-                'EXIF DateTimeOriginal',    # When photo was taken (preferred)
-                'EXIF DateTimeDigitized',   # When photo was digitized
-                'Image DateTime',           # File modification time
-                'DateTime',                 # Alternative DateTime tag
-                'EXIF DateTime'             # Another alternative
-            ]
-            
-            for tag_name in datetime_tags:
-                if tag_name in tags:
-                    try:
-                        # EXIF datetime format: "YYYY:MM:DD HH:MM:SS"
-                        dt_str = str(tags[tag_name])
-                        return datetime.strptime(dt_str, '%Y:%m:%d %H:%M:%S')
-                    except ValueError:
-                        continue
-            
-            return None
-            
         except Exception:
             return None
     
-    def get_current_gps(self) -> Optional[Tuple[float, float]]:
+    def get_current_gps(self) -> tuple[float, float] | None:
         """Get existing GPS coordinates from image EXIF data"""
+        if self._gps is _NOT_LOADED:
+            self._gps = self._read_gps()
+        return self._gps
+
+    def _load_piexif(self) -> dict:
+        """Load the file's EXIF with piexif, reusing the last load while the file is unchanged"""
+        stat = os.stat(self.image_path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        if self._piexif_key != key:
+            self._piexif_data = piexif.load(self.image_path)
+            self._piexif_key = key
+        return self._piexif_data
+
+    def _read_gps(self) -> tuple[float, float] | None:
+        """Read GPS coordinates from the file's EXIF GPS IFD"""
         try:
-            exif_data = piexif.load(self.image_path)
+            exif_data = self._load_piexif()
             gps_data = exif_data.get("GPS")
             
             if not gps_data:
@@ -189,25 +257,35 @@ class ImageProcessor:
 
         exiftool_session: an optional shared ExifToolSession. When provided, the
         exiftool-only formats reuse one persistent process instead of spawning a
-        fresh exiftool per file. When None, a one-shot exiftool call is used.
+        fresh exiftool per file. Defaults to the session the processor was
+        created with; when neither is set, a one-shot exiftool call is used.
         """
         if dry_run:
             return True
 
+        if exiftool_session is None:
+            exiftool_session = self.exiftool_session
+
+        # The write changes the GPS tags, so re-read them on next access
+        self._gps = _NOT_LOADED
+
         # Formats that exiv2/piexif can't write safely (e.g. Sony ARW) are
         # handled by exiftool. If exiftool isn't available or fails, return
         # False so the caller routes GPS into an XMP sidecar instead.
         ext = os.path.splitext(self.image_path)[1].lower()
         if ext in self.EXIFTOOL_EMBED_EXTENSIONS:
+            self._piexif_key = None
             if exiftool_session is not None:
                 return exiftool_session.set_gps(self.image_path, latitude, longitude)
             return self._set_gps_coordinates_exiftool(latitude, longitude)
 
         # First try exiv2 (best for RAW formats including CR3)
         if self._set_gps_coordinates_exiv2(latitude, longitude):
+            self._piexif_key = None
             return True
         
-        # Fallback to piexif (works with JPEG, TIFF)
+        # Fallback to piexif (works with JPEG, TIFF), reusing any EXIF
+        # already loaded by get_current_gps
         return self._set_gps_coordinates_piexif(latitude, longitude)
     
     def _set_gps_coordinates_exiv2(self, latitude: float, longitude: float) -> bool:
@@ -277,8 +355,9 @@ class ImageProcessor:
     def _set_gps_coordinates_piexif(self, latitude: float, longitude: float) -> bool:
         """Set GPS coordinates using piexif library (for JPEG, TIFF)"""
         try:
-            # Load existing EXIF data
-            exif_data = piexif.load(self.image_path)
+            # Existing EXIF data, usually already loaded by get_current_gps.
+            # Copied so a failed write leaves the cached load intact.
+            exif_data = dict(self._load_piexif())
             
             # Create GPS data
             gps_data = {
@@ -297,6 +376,7 @@ class ImageProcessor:
             
             # Write back to file
             piexif.insert(exif_bytes, self.image_path)
+            self._piexif_key = None
             
             return True
             
@@ -311,7 +391,7 @@ class ImageProcessor:
         
         return degrees + (minutes / 60) + (seconds / 3600)
     
-    def _decimal_to_dms(self, decimal_degrees: float) -> Tuple:
+    def _decimal_to_dms(self, decimal_degrees: float) -> tuple:
         """Convert decimal degrees to degrees, minutes, seconds tuple for EXIF"""
         degrees = int(decimal_degrees)
         minutes_float = (decimal_degrees - degrees) * 60
@@ -335,48 +415,26 @@ class ImageProcessor:
         return degrees, minutes, seconds
     
     @staticmethod
-    def find_images(directory: str, recursive: bool = True, excluded_folders: Optional[List[str]] = None) -> list:
+    def find_images(directory: str, recursive: bool = True, excluded_folders: Iterable[str] | None = None) -> list:
         """Find all supported image files in a directory
         
         Args:
             directory: Directory to search in
             recursive: If True, search recursively in subdirectories. If False, only search the specified directory.
-            excluded_folders: List of folder names to exclude from search
+            excluded_folders: Folder names to exclude from search
         """
-        images = []
-        excluded_folders = excluded_folders or []
-        
-        if not os.path.exists(directory):
-            raise FileNotFoundError(f"Directory not found: {directory}")
-        
-        if recursive:
-            # Recursive search with folder exclusion
-            for root, dirs, files in os.walk(directory):
-                # Remove excluded directories from the search
-                dirs[:] = [d for d in dirs if d not in excluded_folders]
-                
-                for file in files:
-                    ext = os.path.splitext(file)[1].lower()
-                    if ext in ImageProcessor.SUPPORTED_EXTENSIONS:
-                        images.append(os.path.join(root, file))
-        else:
-            # Non-recursive search (only in specified directory)
-            try:
-                files = os.listdir(directory)
-                for file in files:
-                    file_path = os.path.join(directory, file)
-                    # Only process files, not directories
-                    if os.path.isfile(file_path):
-                        ext = os.path.splitext(file)[1].lower()
-                        if ext in ImageProcessor.SUPPORTED_EXTENSIONS:
-                            images.append(file_path)
-            except OSError:
-                raise FileNotFoundError(f"Cannot access directory: {directory}")
+        # Subdirectories are listed concurrently; see file_scan
+        images = scan_files(directory, ImageProcessor.SUPPORTED_EXTENSIONS_TUPLE, recursive, excluded_folders)
         
         return sorted(images)
     
-    def create_xmp_sidecar(self, keywords: List[str], latitude: Optional[float] = None, longitude: Optional[float] = None, dry_run: bool = False) -> bool:
-        """Create or update XMP sidecar file with dive site keywords"""
+    def create_xmp_sidecar(self, keywords: list[str], latitude: float | None = None, longitude: float | None = None, dry_run: bool = False,
+                           capture_time: datetime | None = None) -> bool:
+        """Create or update XMP sidecar file with dive site keywords
+
+        capture_time: the capture time if the caller has already read it.
+        When None, it is read from the image.
+        """
         if dry_run:
             return True
             
@@ -386,124 +444,94 @@ class ImageProcessor:
         try:
             if os.path.exists(xmp_path):
                 # Update existing XMP file
-                return self._update_existing_xmp(xmp_path, keywords, latitude, longitude)
+                return self._update_existing_xmp(xmp_path, keywords, latitude, longitude, capture_time)
             else:
                 # Create new XMP file
-                return self._create_new_xmp(xmp_path, keywords, latitude, longitude)
+                return self._create_new_xmp(xmp_path, keywords, latitude, longitude, capture_time)
             
         except Exception as e:
             raise RuntimeError(f"Failed to create XMP sidecar for {self.image_path}: {e}")
     
-    def _read_existing_xmp_keywords(self, xmp_path: str) -> List[str]:
+    def _read_existing_xmp_keywords(self, xmp_path: str) -> list[str]:
         """Read existing keywords from XMP file"""
         try:
             tree = etree.parse(xmp_path)
-            root = tree.getroot()
-            
-            # Define namespaces
-            namespaces = {
-                'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
-                'dc': 'http://purl.org/dc/elements/1.1/',
-                'lightroom': 'http://ns.adobe.com/lightroom/1.0/'
-            }
-            
-            keywords = []
-            
-            # Read from dc:subject
-            dc_subjects = root.xpath('//dc:subject/rdf:Bag/rdf:li/text()', namespaces=namespaces)
-            keywords.extend(dc_subjects)
-            
-            # Read from lightroom:hierarchicalSubject
-            lr_subjects = root.xpath('//lightroom:hierarchicalSubject/rdf:Bag/rdf:li/text()', namespaces=namespaces)
-            keywords.extend(lr_subjects)
-            
-            # Remove duplicates and return
-            return list(set(keywords))
+            return self._extract_keywords_from_tree(tree.getroot())
             
         except Exception:
             # If we can't read existing keywords, return empty list
             return []
     
-    def _create_xmp_content(self, keywords: List[str], latitude: Optional[float] = None, longitude: Optional[float] = None) -> str:
+    def _extract_keywords_from_tree(self, root) -> list[str]:
+        """Collect the keywords from an already parsed XMP tree"""
+        keywords = []
+        
+        # Read from dc:subject
+        dc_subjects = self._DC_SUBJECT_XPATH(root)
+        keywords.extend(dc_subjects)
+        
+        # Read from lightroom:hierarchicalSubject
+        lr_subjects = self._LR_SUBJECT_XPATH(root)
+        keywords.extend(lr_subjects)
+        
+        # Remove duplicates, keeping the order found
+        return list(dict.fromkeys(keywords))
+    
+    def _create_xmp_content(self, keywords: list[str], latitude: float | None = None, longitude: float | None = None,
+                            capture_time: datetime | None = None) -> str:
         """Create XMP content with keywords"""
         # Create keyword list XML
-        keyword_items = '\n'.join([f'     <rdf:li>{keyword}</rdf:li>' for keyword in keywords])
+        keyword_items = xmp_keyword_items(keywords)
         
         # Get capture time if available for DateTimeOriginal
-        capture_time = self.get_capture_time()
+        if capture_time is None:
+            capture_time = self.get_capture_time()
         datetime_original = ''
         if capture_time:
-            # Format as ISO 8601 with timezone (following the sample)
-            datetime_original = f'   <exif:DateTimeOriginal>{capture_time.strftime("%Y-%m-%dT%H:%M:%S.00Z")}</exif:DateTimeOriginal>\n'
+            datetime_original = f'   <exif:DateTimeOriginal>{capture_time.strftime(self.XMP_DATETIME_FORMAT)}</exif:DateTimeOriginal>\n'
         
         # Add GPS information if provided
         gps_data = ''
         if latitude is not None and longitude is not None:
-            # Convert to degrees,minutes.decimal_minutes format for XMP
-            lat_deg, lat_min, lat_sec = self._decimal_to_dms_components(abs(latitude))
-            lon_deg, lon_min, lon_sec = self._decimal_to_dms_components(abs(longitude))
-            
-            # Convert seconds back to decimal minutes
-            lat_decimal_min = lat_min + (lat_sec / 60.0)
-            lon_decimal_min = lon_min + (lon_sec / 60.0)
-            
-            # XMP format: degrees,minutes.decimal_minutes followed by direction
-            lat_dir = 'N' if latitude >= 0 else 'S'
-            lon_dir = 'E' if longitude >= 0 else 'W'
-            
-            gps_data = f'''   <exif:GPSLatitude>{lat_deg},{lat_decimal_min:.2f}{lat_dir}</exif:GPSLatitude>
-   <exif:GPSLongitude>{lon_deg},{lon_decimal_min:.2f}{lon_dir}</exif:GPSLongitude>
+            xmp_latitude, xmp_longitude = self._format_xmp_gps(latitude, longitude)
+            gps_data = f'''   <exif:GPSLatitude>{xmp_latitude}</exif:GPSLatitude>
+   <exif:GPSLongitude>{xmp_longitude}</exif:GPSLongitude>
 '''
         
-        xmp_template = f'''<x:xmpmeta xmlns:x="adobe:ns:meta/" x:xmptk="XMP Core 5.5.0">
- <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
-  <rdf:Description rdf:about=""
-    xmlns:xmp="http://ns.adobe.com/xap/1.0/"
-    xmlns:lightroom="http://ns.adobe.com/lightroom/1.0/"
-    xmlns:dc="http://purl.org/dc/elements/1.1/"
-    xmlns:exif="http://ns.adobe.com/exif/1.0/">
-   <xmp:Rating>0</xmp:Rating>
-   <lightroom:hierarchicalSubject>
-    <rdf:Bag>
-{keyword_items}
-    </rdf:Bag>
-   </lightroom:hierarchicalSubject>
-   <dc:subject>
-    <rdf:Bag>
-{keyword_items}
-    </rdf:Bag>
-   </dc:subject>
-{datetime_original}{gps_data}  </rdf:Description>
- </rdf:RDF>
-</x:xmpmeta>
-'''
-        return xmp_template
+        return XMP_TEMPLATE.format(keyword_items=keyword_items, datetime_original=datetime_original,
+                                   gps_data=gps_data)
     
-    def _update_existing_xmp(self, xmp_path: str, keywords: List[str], latitude: Optional[float] = None, longitude: Optional[float] = None) -> bool:
+    def _update_existing_xmp(self, xmp_path: str, keywords: list[str], latitude: float | None = None, longitude: float | None = None,
+                             capture_time: datetime | None = None) -> bool:
         """Update existing XMP file while preserving other metadata"""
         try:
             # Parse existing XMP file
             tree = etree.parse(xmp_path)
             root = tree.getroot()
             
-            # Define namespaces
-            namespaces = {
-                'x': 'adobe:ns:meta/',
-                'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
-                'dc': 'http://purl.org/dc/elements/1.1/',
-                'lightroom': 'http://ns.adobe.com/lightroom/1.0/',
-                'exif': 'http://ns.adobe.com/exif/1.0/'
-            }
+            namespaces = self.XMP_NAMESPACES
             
             # Find or create rdf:Description element
             desc = root.find('.//rdf:Description', namespaces)
             if desc is None:
                 raise ValueError("No rdf:Description element found in XMP file")
             
-            # Get existing keywords and combine with new ones
-            existing_keywords = self._read_existing_xmp_keywords(xmp_path)
-            all_keywords = list(set(existing_keywords + keywords))
-            all_keywords.sort()
+            if capture_time is None:
+                capture_time = self.get_capture_time()
+            
+            # Leave the file untouched when it already holds everything we'd
+            # write, so re-runs don't rewrite (and re-sync) every sidecar
+            if self._xmp_is_current(desc, keywords, latitude, longitude, capture_time, namespaces):
+                return True
+            
+            # Get existing keywords from the tree already parsed and combine with new ones
+            existing_keywords = self._extract_keywords_from_tree(root)
+            # Merge case-insensitively, keeping the first spelling seen (the
+            # sidecar's own), so "Reef" and "reef" don't both get written
+            merged = {}
+            for keyword in existing_keywords + keywords:
+                merged.setdefault(keyword.casefold(), keyword)
+            all_keywords = sorted(merged.values())
             
             # Update dc:subject keywords
             self._update_xmp_keywords(desc, all_keywords, namespaces)
@@ -513,29 +541,28 @@ class ImageProcessor:
                 self._update_xmp_gps(desc, latitude, longitude, namespaces)
             
             # Update DateTimeOriginal if we can get capture time
-            capture_time = self.get_capture_time()
             if capture_time:
                 self._update_xmp_datetime(desc, capture_time, namespaces)
             
             # Write back to file with proper XML declaration and formatting
-            tree.write(xmp_path, encoding='utf-8', xml_declaration=True, pretty_print=True)
+            write_if_changed(xmp_path, etree.tostring(tree, encoding='utf-8', xml_declaration=True, pretty_print=True))
             
             return True
             
         except Exception:
             return False
     
-    def _create_new_xmp(self, xmp_path: str, keywords: List[str], latitude: Optional[float] = None, longitude: Optional[float] = None) -> bool:
+    def _create_new_xmp(self, xmp_path: str, keywords: list[str], latitude: float | None = None, longitude: float | None = None,
+                        capture_time: datetime | None = None) -> bool:
         """Create new XMP file using the original template method"""
         try:
-            xmp_content = self._create_xmp_content(keywords, latitude, longitude)
-            with open(xmp_path, 'w', encoding='utf-8') as f:
-                f.write(xmp_content)
+            xmp_content = self._create_xmp_content(keywords, latitude, longitude, capture_time)
+            write_if_changed(xmp_path, xmp_content.encode('utf-8'))
             return True
         except Exception:
             return False
     
-    def _update_xmp_keywords(self, desc_element, keywords: List[str], namespaces: dict):
+    def _update_xmp_keywords(self, desc_element, keywords: list[str], namespaces: dict):
         """Update keyword elements in XMP Description"""
         # Update dc:subject
         dc_subject = desc_element.find('dc:subject', namespaces)
@@ -569,7 +596,17 @@ class ImageProcessor:
             if existing is not None:
                 desc_element.remove(existing)
         
-        # Convert to degrees,minutes.decimal_minutes format for XMP
+        xmp_latitude, xmp_longitude = self._format_xmp_gps(latitude, longitude)
+        
+        # Add GPS elements
+        lat_elem = etree.SubElement(desc_element, '{http://ns.adobe.com/exif/1.0/}GPSLatitude')
+        lat_elem.text = xmp_latitude
+        
+        lon_elem = etree.SubElement(desc_element, '{http://ns.adobe.com/exif/1.0/}GPSLongitude')
+        lon_elem.text = xmp_longitude
+    
+    def _format_xmp_gps(self, latitude: float, longitude: float) -> tuple[str, str]:
+        """Format coordinates as XMP GPS values: degrees,decimal_minutes + direction"""
         lat_deg, lat_min, lat_sec = self._decimal_to_dms_components(abs(latitude))
         lon_deg, lon_min, lon_sec = self._decimal_to_dms_components(abs(longitude))
         
@@ -577,16 +614,28 @@ class ImageProcessor:
         lat_decimal_min = lat_min + (lat_sec / 60.0)
         lon_decimal_min = lon_min + (lon_sec / 60.0)
         
-        # XMP format: degrees,minutes.decimal_minutes followed by direction
         lat_dir = 'N' if latitude >= 0 else 'S'
         lon_dir = 'E' if longitude >= 0 else 'W'
         
-        # Add GPS elements
-        lat_elem = etree.SubElement(desc_element, '{http://ns.adobe.com/exif/1.0/}GPSLatitude')
-        lat_elem.text = f'{lat_deg},{lat_decimal_min:.2f}{lat_dir}'
+        return f'{lat_deg},{lat_decimal_min:.2f}{lat_dir}', f'{lon_deg},{lon_decimal_min:.2f}{lon_dir}'
+    
+    def _xmp_is_current(self, desc_element, keywords: list[str], latitude: float | None,
+                        longitude: float | None, capture_time: datetime | None, namespaces: dict) -> bool:
+        """Check whether an XMP Description already holds the keywords, GPS and date to write"""
+        for bag_path in ('dc:subject/rdf:Bag/rdf:li', 'lightroom:hierarchicalSubject/rdf:Bag/rdf:li'):
+            # Case-insensitive, matching how keywords are merged on update
+            existing = {li.text.casefold() for li in desc_element.findall(bag_path, namespaces) if li.text}
+            if not all(keyword.casefold() in existing for keyword in keywords):
+                return False
         
-        lon_elem = etree.SubElement(desc_element, '{http://ns.adobe.com/exif/1.0/}GPSLongitude')
-        lon_elem.text = f'{lon_deg},{lon_decimal_min:.2f}{lon_dir}'
+        expected = {}
+        if latitude is not None and longitude is not None:
+            expected['exif:GPSLatitude'], expected['exif:GPSLongitude'] = self._format_xmp_gps(latitude, longitude)
+        if capture_time:
+            expected['exif:DateTimeOriginal'] = capture_time.strftime(self.XMP_DATETIME_FORMAT)
+        
+        return all(desc_element.findtext(tag, namespaces=namespaces) == value
+                   for tag, value in expected.items())
     
     def _update_xmp_datetime(self, desc_element, capture_time: datetime, namespaces: dict):
         """Update DateTimeOriginal in XMP Description"""
@@ -597,4 +646,14 @@ class ImageProcessor:
         
         # Add new DateTimeOriginal
         dt_elem = etree.SubElement(desc_element, '{http://ns.adobe.com/exif/1.0/}DateTimeOriginal')
-        dt_elem.text = capture_time.strftime('%Y-%m-%dT%H:%M:%S.00Z')
\ No newline at end of file
+        dt_elem.text = capture_time.strftime(self.XMP_DATETIME_FORMAT)
+
+
+@lru_cache(maxsize=4096)
+def _cached_capture_time(image_path: str, mtime_ns: int, size: int) -> datetime | None:
+    """Process-wide capture time cache shared by every ImageProcessor.
+
+    The file's mtime and size are part of the key, so an edited file is
+    read again rather than served a stale entry.
+    """
+    return ImageProcessor(image_path)._read_capture_time()
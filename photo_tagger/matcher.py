@@ -1,7 +1,10 @@
 """Logic for matching photos to dive sites based on timing"""
 
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import ClassVar
 from dataclasses import dataclass
 
 from .subsurface_parser import Dive
@@ -20,25 +23,53 @@ class Match:
 class DiveMatcher:
     """Matches media files (photos/videos) to dives based on capture time"""
 
-    def __init__(self, dives: List[Dive]):
+    # Photos taken this close to a dive's start count as near_dive
+    NEAR_DIVE_WINDOW = timedelta(hours=2)
+
+    # Sort order for match confidence (lower is better)
+    CONFIDENCE_PRIORITY: ClassVar[dict[str, int]] = {
+        "within_dive": 1,
+        "near_dive": 2,
+        "uncertain": 3
+    }
+
+    def __init__(self, dives: list[Dive]):
         self.dives = sorted(dives, key=lambda d: d.time)
 
-    def find_matches(self, image_path: str) -> List[Match]:
-        """Find potential dive matches for a media file based on capture time"""
-        processor = MediaProcessor.create_processor(image_path)
-        photo_time = processor.get_capture_time()
-        
+        # Dive start and end times, parallel to self.dives. Start times are
+        # binary searched: a photo can match a dive that started up to the near
+        # window (near_dive) or its full duration (within_dive) earlier, so the
+        # search window looks back by the larger of the two.
+        self._dive_times = [dive.time for dive in self.dives]
+        self._dive_ends = [dive.time + timedelta(minutes=dive.duration_minutes) for dive in self.dives]
+        longest_dive = max((dive.duration_minutes for dive in self.dives), default=0)
+        self._lookback = max(self.NEAR_DIVE_WINDOW, timedelta(minutes=longest_dive))
+
+    def find_matches(self, image_path: str, photo_time: datetime | None = None) -> list[Match]:
+        """Find potential dive matches for a media file based on capture time
+
+        photo_time: the capture time if the caller has already read it. When
+        None, it is read from the media file.
+        """
+        if photo_time is None:
+            processor = MediaProcessor.create_processor(image_path)
+            photo_time = processor.get_capture_time()
+
         if not photo_time:
             return []
         
         matches = []
-        
-        for dive in self.dives:
-            match_type = self._check_time_overlap(photo_time, dive)
+
+        # Only dives starting inside the match window can overlap the photo
+        first = bisect_left(self._dive_times, photo_time - self._lookback)
+        last = bisect_right(self._dive_times, photo_time + self.NEAR_DIVE_WINDOW)
+
+        for i in range(first, last):
+            match_type = self._check_time_overlap(photo_time, self._dive_times[i], self._dive_ends[i])
             if match_type:
                 match = Match(
                     image_path=image_path,
-                    dive=dive,
+                    dive=self.dives[i],
                     photo_time=photo_time,
                     confidence=match_type
                 )
@@ -50,34 +81,25 @@ class DiveMatcher:
             abs((m.photo_time - m.dive.time).total_seconds())
         ))
     
-    def _check_time_overlap(self, photo_time: datetime, dive: Dive) -> Optional[str]:
+    def _check_time_overlap(self, photo_time: datetime, dive_start: datetime, dive_end: datetime) -> str | None:
         """Check if photo time overlaps with dive time"""
-        dive_start = dive.time
-        dive_end = dive.time + timedelta(minutes=dive.duration_minutes)
-        
         # Check if photo was taken during the dive
         if dive_start <= photo_time <= dive_end:
             return "within_dive"
         
-        # Check if photo was taken close to dive time (within 2 hours before/after)
-        time_diff = abs((photo_time - dive_start).total_seconds()) / 3600  # hours
-        if time_diff <= 2.0:
+        # Check if photo was taken close to dive time (before or after the start)
+        if abs(photo_time - dive_start) <= self.NEAR_DIVE_WINDOW:
             return "near_dive"
         
         return None
     
     def _confidence_priority(self, confidence: str) -> int:
         """Return priority for sorting (lower is better)"""
-        priorities = {
-            "within_dive": 1,
-            "near_dive": 2,
-            "uncertain": 3
-        }
-        return priorities.get(confidence, 4)
+        return self.CONFIDENCE_PRIORITY.get(confidence, 4)
     
-    def get_best_match(self, image_path: str) -> Optional[Match]:
+    def get_best_match(self, image_path: str, photo_time: datetime | None = None) -> Match | None:
         """Get the best single match for a media file"""
-        matches = self.find_matches(image_path)
+        matches = self.find_matches(image_path, photo_time)
         return matches[0] if matches else None
     
     def format_match_info(self, match: Match) -> str:
@@ -114,9 +136,9 @@ class DiveMatcher:
 class InteractiveMatcher(DiveMatcher):
     """Matcher that prompts user for ambiguous cases"""
     
-    def get_user_confirmed_match(self, image_path: str) -> Optional[Match]:
+    def get_user_confirmed_match(self, image_path: str, photo_time: datetime | None = None) -> Match | None:
         """Get match with user confirmation for ambiguous cases"""
-        matches = self.find_matches(image_path)
+        matches = self.find_matches(image_path, photo_time)
         
         if not matches:
             return None
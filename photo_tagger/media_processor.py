@@ -1,54 +1,62 @@
 """Unified media processing for both images and videos"""
 
+from __future__ import annotations
+
 import os
-from typing import Optional, List, Union
+from collections.abc import Iterable
 
+from .file_scan import has_suffix, scan_files
 from .image_processor import ImageProcessor
 from .video_processor import VideoProcessor
 
 
+# Every supported extension, computed once rather than per lookup; the tuple
+# form is for file_scan.has_suffix
+_SUPPORTED_EXTENSIONS = frozenset(ImageProcessor.SUPPORTED_EXTENSIONS | VideoProcessor.SUPPORTED_EXTENSIONS)
+_SUPPORTED_SUFFIXES = tuple(sorted(_SUPPORTED_EXTENSIONS))
+
+
 class MediaProcessor:
     """Factory class to handle both images and videos uniformly"""
     
     @staticmethod
-    def create_processor(file_path: str) -> Union[ImageProcessor, VideoProcessor]:
-        """Create appropriate processor based on file extension"""
+    def create_processor(file_path: str, exiftool_session=None) -> ImageProcessor | VideoProcessor:
+        """Create appropriate processor based on file extension
+
+        exiftool_session: an optional shared ExifToolSession handed to the
+        processor so its exiftool reads and writes reuse one process.
+        """
         ext = os.path.splitext(file_path)[1].lower()
         
         if ext in ImageProcessor.SUPPORTED_EXTENSIONS:
-            return ImageProcessor(file_path)
+            return ImageProcessor(file_path, exiftool_session=exiftool_session)
         elif ext in VideoProcessor.SUPPORTED_EXTENSIONS:
-            return VideoProcessor(file_path)
+            return VideoProcessor(file_path, exiftool_session=exiftool_session)
         else:
             raise ValueError(f"Unsupported file format: {ext}")
     
     @staticmethod
-    def find_media_files(directory: str, recursive: bool = True, excluded_folders: Optional[List[str]] = None) -> List[str]:
+    def find_media_files(directory: str, recursive: bool = True, excluded_folders: Iterable[str] | None = None) -> list[str]:
         """Find all supported media files (images and videos) in a directory
         
         Args:
             directory: Directory to search in
             recursive: If True, search recursively in subdirectories
-            excluded_folders: List of folder names to exclude from search
+            excluded_folders: Folder names to exclude from search
         
         Returns:
             List of file paths for all supported media files
         """
-        # Find both images and videos
-        images = ImageProcessor.find_images(directory, recursive, excluded_folders)
-        videos = VideoProcessor.find_videos(directory, recursive, excluded_folders)
-        
-        # Combine and sort all media files
-        all_media = images + videos
-        return sorted(all_media)
-    
+        # One walk classifies images and videos together, listing
+        # subdirectories concurrently; see file_scan
+        return sorted(scan_files(directory, _SUPPORTED_SUFFIXES, recursive, excluded_folders))
+
     @staticmethod
-    def get_supported_extensions() -> set:
+    def get_supported_extensions() -> frozenset[str]:
         """Get all supported file extensions"""
-        return ImageProcessor.SUPPORTED_EXTENSIONS | VideoProcessor.SUPPORTED_EXTENSIONS
+        return _SUPPORTED_EXTENSIONS
     
     @staticmethod
     def is_supported_file(file_path: str) -> bool:
         """Check if a file is supported by any processor"""
-        ext = os.path.splitext(file_path)[1].lower()
-        return ext in MediaProcessor.get_supported_extensions()
\ No newline at end of file
+        return has_suffix(os.path.basename(file_path), _SUPPORTED_SUFFIXES)
@@ -0,0 +1,72 @@
+"""Writing XMP sidecar files"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Iterable
+from xml.sax.saxutils import escape
+
+# Skeleton of a new XMP sidecar; the same keyword list fills both bags
+XMP_TEMPLATE = '''<x:xmpmeta xmlns:x="adobe:ns:meta/" x:xmptk="XMP Core 5.5.0">
+ <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+  <rdf:Description rdf:about=""
+    xmlns:xmp="http://ns.adobe.com/xap/1.0/"
+    xmlns:lightroom="http://ns.adobe.com/lightroom/1.0/"
+    xmlns:dc="http://purl.org/dc/elements/1.1/"
+    xmlns:exif="http://ns.adobe.com/exif/1.0/">
+   <xmp:Rating>0</xmp:Rating>
+   <lightroom:hierarchicalSubject>
+    <rdf:Bag>
+{keyword_items}
+    </rdf:Bag>
+   </lightroom:hierarchicalSubject>
+   <dc:subject>
+    <rdf:Bag>
+{keyword_items}
+    </rdf:Bag>
+   </dc:subject>
+{datetime_original}{gps_data}  </rdf:Description>
+ </rdf:RDF>
+</x:xmpmeta>
+'''
+
+
+def xmp_keyword_items(keywords: Iterable[str]) -> str:
+    """The rdf:li lines for XMP_TEMPLATE's keyword bags
+
+    Keywords are escaped, since they come from free-text dive site names
+    ("Fish & Chips").
+    """
+    return '\n'.join(['     <rdf:li>' + escape(keyword) + '</rdf:li>' for keyword in keywords])
+
+
+def write_if_changed(path: str, content: bytes) -> bool:
+    """Write content to path unless the file already holds exactly those bytes
+
+    Re-runs regenerate sidecars that are usually unchanged; skipping the
+    identical write keeps the mtime, so sync clients (and Lightroom) don't
+    treat the file as modified. A size mismatch is detected without reading
+    the existing file.
+
+    Returns:
+        True if the file was written, False if it was already up to date
+    """
+    try:
+        if os.path.getsize(path) == len(content):
+            with open(path, 'rb') as f:
+                if f.read() == content:
+                    return False
+    except OSError:
+        # Missing or unreadable: just write it
+        pass
+
+    # Raw fd write: the content is already encoded bytes, so the buffered
+    # file object open() builds would only add a copy per sidecar
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        view = memoryview(content)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    return True
@@ -1,21 +1,51 @@
 """Parser for Subsurface diving log files"""
 
-import xml.etree.ElementTree as ET
-from datetime import datetime
-from typing import List, Dict, Optional
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import re
+import sys
+import tempfile
+from datetime import date, datetime, time
+from functools import lru_cache
+from typing import ClassVar
 from dataclasses import dataclass
 
+from lxml import etree
+
+from . import __version__
+
+# Dive durations: "MM:SS", "H:MM:SS" or plain minutes, with Subsurface's
+# optional " min" suffix
+_DURATION_RE = re.compile(r'(?:(?:(\d+):)?(\d+):(\d+)|(\d+))(?: min)?')
+
+# Dive site coordinates: signed decimal latitude and longitude
+_GPS_RE = re.compile(r'\s*(-?\d+(?:\.\d+)?)\s+(-?\d+(?:\.\d+)?)\s*')
+
+
+def default_cache_dir() -> str:
+    """Directory for cached parse results ($XDG_CACHE_HOME or ~/.cache)"""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'photo-tagger', 'subsurface')
+
+
+# Dive logs hold thousands of dives; slotted instances skip the per-instance
+# __dict__. dataclass(slots=True) needs Python 3.10, so older versions go without.
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class DiveSite:
     """Represents a dive site with location information"""
     uuid: str
     name: str
-    latitude: Optional[float] = None
-    longitude: Optional[float] = None
+    latitude: float | None = None
+    longitude: float | None = None
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Dive:
     """Represents a dive with timing and location information"""
     number: int
@@ -23,198 +53,252 @@ class Dive:
     time: datetime
     duration_minutes: int
     site: DiveSite
-    tags: List[str] = None
+    tags: frozenset[str] = frozenset()
 
     def __post_init__(self):
-        """Initialize tags to empty list if None"""
-        if self.tags is None:
-            self.tags = []
+        """Store tags as a frozenset for constant-time membership checks"""
+        self.tags = frozenset(self.tags or ())
 
 
 class SubsurfaceParser:
     """Parser for Subsurface XML files"""
+
+    # Where site and dive elements are read from, as their ancestor tags
+    # (innermost first, excluding the root <divelog>). Dives sit under the root
+    # in the legacy format, or under <dives>, optionally inside a <trip>.
+    SITE_PARENTS = frozenset({('divesites',)})
+    DIVE_PARENTS = frozenset({(), ('dives',), ('trip', 'dives')})
+
+    # libxml2 parser options for iterparse: skip the whitespace-only text and
+    # comments between elements (nothing here reads them), don't index ID
+    # attributes, and lift the size limits that reject very large logs.
+    # Entities declared in a DOCTYPE are not substituted and nothing is
+    # fetched over the network, so a crafted log can't pull in local files or
+    # URLs; libxml2's entity amplification limit still applies with huge_tree.
+    PARSER_OPTIONS: ClassVar[dict[str, bool]] = {
+        'remove_blank_text': True,
+        'remove_comments': True,
+        'collect_ids': False,
+        'huge_tree': True,
+        'resolve_entities': False,
+        'no_network': True,
+    }
     
     def __init__(self, file_path: str):
         self.file_path = file_path
-        self.tree = None
-        self.root = None
     
-    def parse(self) -> List[Dive]:
-        """Parse the subsurface file and return list of dives"""
+    def parse(self) -> list[Dive]:
+        """Parse the subsurface file and return list of dives
+
+        The file is streamed with lxml's iterparse: each site and dive is
+        converted as soon as its element ends and then freed, so the dive
+        profiles (samples, events) never accumulate in memory.
+        """
+        sites: dict[str, DiveSite] = {}
+        dives: list[Dive] = []
+
         try:
-            self.tree = ET.parse(self.file_path)
-            self.root = self.tree.getroot()
-        except ET.ParseError as e:
+            for _, elem in etree.iterparse(self.file_path, events=('end',), tag=('site', 'dive'),
+                                           **self.PARSER_OPTIONS):
+                parents = tuple(ancestor.tag for ancestor in elem.iterancestors())[:-1]
+
+                if elem.tag == 'site' and parents in self.SITE_PARENTS:
+                    site = self._parse_site(elem)
+                    sites[site.uuid] = site
+                elif elem.tag == 'dive' and parents in self.DIVE_PARENTS:
+                    dive = self._parse_single_dive(elem, sites)
+                    if dive:
+                        dives.append(dive)
+
+                # Free the element and the already-processed siblings before it
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+        except etree.XMLSyntaxError as e:
             raise ValueError(f"Invalid XML in subsurface file: {e}")
         except FileNotFoundError:
             raise FileNotFoundError(f"Subsurface file not found: {self.file_path}")
-        
-        # First parse dive sites
-        sites = self._parse_dive_sites()
-        
-        # Then parse dives and link to sites
-        dives = self._parse_dives(sites)
-        
+
+        # Dives listed before <divesites> were given placeholder sites; link
+        # them now that every site is known
+        for dive in dives:
+            site = sites.get(dive.site.uuid)
+            if site is not None:
+                dive.site = site
+
+        return dives
+
+    def parse_cached(self, cache_dir: str | None = None) -> list[Dive]:
+        """Parse the subsurface file, reusing a cached result when it is unchanged
+
+        Results are pickled under cache_dir (default: default_cache_dir()), one
+        entry per log file path. Each entry records the file's size and
+        modification time plus the package and Python versions, and is only reused when
+        those still match; otherwise it is replaced by a fresh parse, so
+        editing the log doesn't leave old entries behind. Cache read or write
+        failures fall back to a normal parse.
+        """
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Subsurface file not found: {self.file_path}")
+
+        key = hashlib.sha1(os.path.abspath(self.file_path).encode()).hexdigest()
+        stamp = (stat.st_mtime_ns, stat.st_size, __version__, sys.version_info[:2])
+        cache_dir = cache_dir or default_cache_dir()
+        cache_path = os.path.join(cache_dir, f"{key}.pkl")
+
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError,
+                IndexError, KeyError, TypeError, ValueError):
+            # Missing, truncated, corrupt, or written by an incompatible version
+            cached = None
+        if isinstance(cached, tuple) and len(cached) == 2 and cached[0] == stamp:
+            return cached[1]
+
+        dives = self.parse()
+
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Write to a temporary file first so a concurrent run never reads a partial pickle
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump((stamp, dives), f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            pass
+
         return dives
     
-    def _parse_dive_sites(self) -> Dict[str, DiveSite]:
-        """Parse dive sites from the XML"""
-        sites = {}
-        
-        divesites_elem = self.root.find('divesites')
-        if divesites_elem is None:
-            return sites
+    def _parse_site(self, site_elem) -> DiveSite:
+        """Parse a single dive site element"""
+        # Interned: every dive's divesiteid repeats one of these, so lookups
+        # and the placeholder-site relinking compare the same string objects
+        uuid = sys.intern(site_elem.get('uuid', '').strip())
+        name = site_elem.get('name', '')
+        gps = site_elem.get('gps', '')
         
-        for site_elem in divesites_elem.findall('site'):
-            uuid = site_elem.get('uuid', '').strip()
-            name = site_elem.get('name', '')
-            gps = site_elem.get('gps', '')
-            
+        # GPS format is "latitude longitude"; anything else skips coordinates
+        match = _GPS_RE.fullmatch(gps)
+        if match:
+            latitude, longitude = float(match.group(1)), float(match.group(2))
+        else:
             latitude, longitude = None, None
-            if gps:
-                try:
-                    # GPS format appears to be "latitude longitude"
-                    lat_str, lon_str = gps.split()
-                    latitude = float(lat_str)
-                    longitude = float(lon_str)
-                except (ValueError, IndexError):
-                    # Invalid GPS format, skip coordinates
-                    pass
-            
-            sites[uuid] = DiveSite(
-                uuid=uuid,
-                name=name,
-                latitude=latitude,
-                longitude=longitude
-            )
         
-        return sites
+        return DiveSite(
+            uuid=uuid,
+            name=name,
+            latitude=latitude,
+            longitude=longitude
+        )
     
-    def _parse_dives(self, sites: Dict[str, DiveSite]) -> List[Dive]:
-        """Parse dives from the XML and link to sites"""
-        dives = []
+    def _parse_single_dive(self, dive_elem, sites: dict[str, DiveSite]) -> Dive | None:
+        """Parse a single dive element
+
+        Returns None for dives without a usable number or date/time. Each
+        attribute is checked before conversion; the date and duration parsers
+        handle malformed values themselves.
+        """
+        # Parse dive attributes
+        number_str = dive_elem.get('number', '0').strip()
+        if not number_str.isdecimal():
+            # Skip invalid dives but continue processing
+            return None
+        number = int(number_str)
+        date_str = dive_elem.get('date', '')
+        time_str = dive_elem.get('time', '')
+        duration_str = dive_elem.get('duration', '0:00')
+        tags_str = dive_elem.get('tags', '')
+
+        # Parse date and time
+        dive_datetime = self._parse_datetime(date_str, time_str)
+        if not dive_datetime:
+            return None
+
+        # Parse duration - handle "MM:SS min" format from Subsurface
+        duration_minutes = self._parse_duration(duration_str)
+
+        # Parse tags (comma-separated string)
+        tags = frozenset(sys.intern(tag) for tag in map(str.strip, tags_str.split(',')) if tag)
         
-        # First look for dives directly under root (legacy format)
-        for dive_elem in self.root.findall('dive'):
-            dive = self._parse_single_dive(dive_elem, sites)
-            if dive:
-                dives.append(dive)
+        # Find dive site
+        site_uuid = sys.intern(dive_elem.get('divesiteid', '').strip())
+        site = sites.get(site_uuid)
         
-        # Then look for dives organized in trips within <dives> section
-        dives_section = self.root.find('dives')
-        if dives_section is not None:
-            # Look for trips within the dives section
-            for trip_elem in dives_section.findall('trip'):
-                for dive_elem in trip_elem.findall('dive'):
-                    dive = self._parse_single_dive(dive_elem, sites)
-                    if dive:
-                        dives.append(dive)
-            
-            # Also look for any standalone dives in the dives section (not in trips)
-            for dive_elem in dives_section.findall('dive'):
-                dive = self._parse_single_dive(dive_elem, sites)
-                if dive:
-                    dives.append(dive)
+        if not site:
+            # Try to find site by name in dive notes or create unnamed site
+            site = DiveSite(uuid=site_uuid or f"unknown_{number}", name=f"Unknown Site {number}")
         
-        return dives
+        return Dive(
+            number=number,
+            date=dive_datetime,
+            time=dive_datetime,
+            duration_minutes=duration_minutes,
+            site=site,
+            tags=tags
+        )
     
-    def _parse_single_dive(self, dive_elem, sites: Dict[str, DiveSite]) -> Optional[Dive]:
-        """Parse a single dive element"""
-        try:
-            # Parse dive attributes
-            number = int(dive_elem.get('number', 0))
-            date_str = dive_elem.get('date', '')
-            time_str = dive_elem.get('time', '')
-            duration_str = dive_elem.get('duration', '0:00')
-            tags_str = dive_elem.get('tags', '')
-
-            # Parse date and time
-            dive_datetime = self._parse_datetime(date_str, time_str)
-            if not dive_datetime:
-                return None
-
-            # Parse duration - handle "MM:SS min" format from Subsurface
-            duration_minutes = self._parse_duration(duration_str)
-
-            # Parse tags (comma-separated string)
-            tags = [tag.strip() for tag in tags_str.split(',') if tag.strip()]
-            
-            # Find dive site
-            site_uuid = dive_elem.get('divesiteid', '').strip()
-            site = sites.get(site_uuid)
-            
-            if not site:
-                # Try to find site by name in dive notes or create unnamed site
-                site = DiveSite(uuid=site_uuid or f"unknown_{number}", name=f"Unknown Site {number}")
-            
-            dive = Dive(
-                number=number,
-                date=dive_datetime,
-                time=dive_datetime,
-                duration_minutes=duration_minutes,
-                site=site,
-                tags=tags
-            )
-            
-            return dive
-            
-        except (ValueError, TypeError):
-            # Skip invalid dives but continue processing
-            return None
-    
-    def _parse_datetime(self, date_str: str, time_str: str) -> Optional[datetime]:
+    def _parse_datetime(self, date_str: str, time_str: str) -> datetime | None:
         """Parse date and time strings into datetime object"""
-        if not date_str:
-            return None
-        
-        try:
-            # Parse date (format: YYYY-MM-DD)
-            date_part = datetime.strptime(date_str, '%Y-%m-%d').date()
-            
-            # Parse time (format: HH:MM:SS or HH:MM)
-            if time_str:
-                try:
-                    if ':' in time_str:
-                        if time_str.count(':') == 2:
-                            time_part = datetime.strptime(time_str, '%H:%M:%S').time()
-                        else:
-                            time_part = datetime.strptime(time_str, '%H:%M').time()
-                    else:
-                        time_part = datetime.strptime(time_str, '%H').time()
-                except ValueError:
-                    time_part = datetime.min.time()
-            else:
-                time_part = datetime.min.time()
-            
-            return datetime.combine(date_part, time_part)
-            
-        except ValueError:
-            return None
+        # Dives on the same day share date strings, and times often repeat
+        # across a log, so parses are cached
+        return _parse_dive_datetime(date_str, time_str)
     
     def _parse_duration(self, duration_str: str) -> int:
         """Parse duration string into minutes"""
         if not duration_str or duration_str == '0:00':
             return 0
+        if duration_str.isdecimal():
+            # Plain minutes
+            return int(duration_str)
         
-        try:
-            # Remove " min" suffix if present (Subsurface format)
-            duration_clean = duration_str.replace(' min', '')
-            
-            # Handle formats: "MM:SS", "H:MM:SS", or just minutes
-            parts = duration_clean.split(':')
-            if len(parts) == 2:
-                # MM:SS format - convert to minutes
-                minutes = int(parts[0])
-                seconds = int(parts[1])
-                return minutes + (seconds // 60)
-            elif len(parts) == 3:
-                # H:MM:SS format
-                hours = int(parts[0])
-                minutes = int(parts[1])
-                seconds = int(parts[2])
-                return (hours * 60) + minutes + (seconds // 60)
-            else:
-                # Assume it's just minutes
-                return int(duration_clean)
-        except (ValueError, IndexError):
-            return 0
\ No newline at end of file
+        match = _DURATION_RE.fullmatch(duration_str)
+        if not match:
+            return 0
+        hours, minutes, seconds, plain_minutes = match.groups()
+        if plain_minutes is not None:
+            return int(plain_minutes)
+        return int(hours or 0) * 60 + int(minutes) + int(seconds) // 60
+
+@lru_cache(maxsize=4096)
+def _parse_dive_datetime(date_str: str, time_str: str) -> datetime | None:
+    """Parse Subsurface date (YYYY-MM-DD) and time (HH:MM:SS, HH:MM or HH) strings
+
+    The usual fixed-width layouts are sliced directly; anything else goes
+    through strptime. An unparseable time falls back to midnight, an
+    unparseable date gives None.
+    """
+    if not date_str:
+        return None
+    
+    try:
+        if len(date_str) == 10 and date_str[4] == date_str[7] == '-':
+            date_part = date(int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]))
+        else:
+            date_part = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+    
+    try:
+        if len(time_str) == 8 and time_str[2] == time_str[5] == ':':
+            time_part = time(int(time_str[0:2]), int(time_str[3:5]), int(time_str[6:8]))
+        elif len(time_str) == 5 and time_str[2] == ':':
+            time_part = time(int(time_str[0:2]), int(time_str[3:5]))
+        elif not time_str:
+            time_part = time.min
+        elif time_str.count(':') == 2:
+            time_part = datetime.strptime(time_str, '%H:%M:%S').time()
+        elif ':' in time_str:
+            time_part = datetime.strptime(time_str, '%H:%M').time()
+        else:
+            time_part = datetime.strptime(time_str, '%H').time()
+    except ValueError:
+        time_part = time.min
+    
+    return datetime.combine(date_part, time_part)
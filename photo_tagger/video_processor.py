@@ -1,97 +1,179 @@
 """Video processing and metadata handling for movie files"""
 
+from __future__ import annotations
+
 import os
+import shutil
 import subprocess
 import json
 from datetime import datetime
-from typing import Optional, Tuple, List
+from functools import lru_cache
+from collections.abc import Iterable
+from typing import ClassVar
+
+from .file_scan import has_suffix, scan_files
+from .sidecar import XMP_TEMPLATE, write_if_changed, xmp_keyword_items
+
+# Resolved once at import; falls back to the bare name so a missing exiftool
+# still fails (and is handled) at the subprocess call
+_EXIFTOOL = shutil.which('exiftool') or 'exiftool'
 
 
 class VideoProcessor:
     """Handles reading and writing metadata in video files using ExifTool"""
     
-    SUPPORTED_EXTENSIONS = {'.mp4', '.mov', '.avi', '.m4v', '.mkv'}
+    SUPPORTED_EXTENSIONS = frozenset({'.mp4', '.mov', '.avi', '.m4v', '.mkv'})
+    # For file_scan.has_suffix, which tests every suffix in one call without splitting the name
+    SUPPORTED_EXTENSIONS_TUPLE = tuple(sorted(SUPPORTED_EXTENSIONS))
+
+    # Tags read for capture time, in order of preference
+    DATE_TAGS: ClassVar[list[str]] = ['DateTimeOriginal', 'MediaCreateDate', 'CreateDate', 'CreationDate']
+    GPS_TAGS: ClassVar[list[str]] = ['GPSLatitude', 'GPSLongitude', 'GPSLatitudeRef', 'GPSLongitudeRef']
     
-    def __init__(self, video_path: str):
+    def __init__(self, video_path: str, exiftool_session=None):
+        """exiftool_session: an optional shared ExifToolSession. When provided,
+        metadata reads and writes go through its persistent process instead of
+        spawning a fresh exiftool per call.
+        """
         self.video_path = video_path
+        self.exiftool_session = exiftool_session
+
+        # Date and GPS tags from a single exiftool read, loaded on first use
+        self._metadata: dict | None = None
+        self._metadata_loaded = False
+
+        # Check the extension before touching the filesystem
+        if not has_suffix(os.path.basename(video_path), self.SUPPORTED_EXTENSIONS_TUPLE):
+            ext = os.path.splitext(video_path)[1].lower()
+            raise ValueError(f"Unsupported video format: {ext}")
+
         if not os.path.exists(video_path):
             raise FileNotFoundError(f"Video file not found: {video_path}")
-        
-        # Check if file extension is supported
-        ext = os.path.splitext(video_path)[1].lower()
-        if ext not in self.SUPPORTED_EXTENSIONS:
-            raise ValueError(f"Unsupported video format: {ext}")
     
-    def get_capture_time(self) -> Optional[datetime]:
+    def get_capture_time(self) -> datetime | None:
         """Extract the capture time from video metadata"""
-        try:
-            # Use exiftool to extract creation time metadata
-            cmd = ['exiftool', '-j', '-CreateDate', '-DateTimeOriginal', '-MediaCreateDate', '-CreationDate', self.video_path]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode != 0:
-                return None
-            
-            metadata = json.loads(result.stdout)[0]
-            
-            # Try different date fields in order of preference
-            date_fields = ['DateTimeOriginal', 'MediaCreateDate', 'CreateDate', 'CreationDate']
-            
-            for field in date_fields:
-                if field in metadata:
-                    date_str = metadata[field]
-                    try:
-                        # Handle various datetime formats from ExifTool
-                        # Common formats: "2023:10:15 14:30:25", "2023-10-15 14:30:25"
-                        for fmt in ['%Y:%m:%d %H:%M:%S', '%Y-%m-%d %H:%M:%S', '%Y:%m:%d %H:%M:%S%z']:
-                            try:
-                                return datetime.strptime(date_str, fmt)
-                            except ValueError:
-                                continue
-                    except ValueError:
-                        continue
-            
+        metadata = self._load_metadata()
+        if metadata is None:
             return None
-            
-        except Exception:
-            return None
-    
-    def get_current_gps(self) -> Optional[Tuple[float, float]]:
+        return self._parse_capture_time(metadata)
+
+    def get_current_gps(self) -> tuple[float, float] | None:
         """Get existing GPS coordinates from video metadata"""
+        metadata = self._load_metadata()
+        if metadata is None:
+            return None
+        return self._parse_gps(metadata)
+
+    @classmethod
+    def load_metadata_batch(cls, processors: list[VideoProcessor], exiftool_session=None) -> None:
+        """Prime the metadata cache of several processors with one exiftool read
+
+        The read goes through the shared session when it is available, and
+        otherwise through a single one-shot exiftool run for the whole batch.
+        Processors left out of the result read their own metadata on first
+        use as usual.
+        """
+        paths = [processor.video_path for processor in processors]
+        tags = cls.DATE_TAGS + cls.GPS_TAGS
+        if exiftool_session is not None and exiftool_session.available:
+            metadata = exiftool_session.get_tags(paths, tags)
+        else:
+            metadata = cls._run_exiftool(paths, tags)
+
+        for processor in processors:
+            if processor.video_path in metadata:
+                processor._metadata = metadata[processor.video_path]
+                processor._metadata_loaded = True
+
+    def _load_metadata(self) -> dict | None:
+        """Read the date and GPS tags in one exiftool call, cached per processor"""
+        if not self._metadata_loaded:
+            self._metadata = self._read_tags(self.DATE_TAGS + self.GPS_TAGS)
+            self._metadata_loaded = True
+        return self._metadata
+
+    def _read_tags(self, tags: list[str]) -> dict | None:
+        """Read tags from the video, via the shared session when available"""
+        if self.exiftool_session is not None and self.exiftool_session.available:
+            metadata = self.exiftool_session.get_tags([self.video_path], tags)
+            if self.video_path in metadata:
+                return metadata[self.video_path]
+
+        return self._run_exiftool([self.video_path], tags).get(self.video_path)
+
+    @staticmethod
+    def _run_exiftool(paths: list[str], tags: list[str]) -> dict[str, dict]:
+        """Read tags for several files with one one-shot exiftool process
+
+        Arguments are passed as an argument file on stdin (-@ -), so a large
+        batch can't overflow the command line. Returns a dict mapping each
+        path exiftool could read to its tags; files it reports an error for
+        are left out, and a result that doesn't cover every path gives {}.
+        """
+        if not paths:
+            return {}
+
+        # -n returns GPS as signed decimals rather than "20 deg 30' ..." text
+        args = ['-j', '-n'] + [f'-{tag}' for tag in tags] + list(paths)
+        try:
+            result = subprocess.run([_EXIFTOOL, '-@', '-'], input='\n'.join(args) + '\n',
+                                    capture_output=True, text=True, timeout=30 * len(paths))
+            entries = json.loads(result.stdout)
+        except Exception:
+            return {}
+
+        # Entries come back in argument order. Match them to paths by position
+        # rather than by SourceFile, which exiftool normalises (separators,
+        # relative paths), and so only trust a full set, as ExifToolSession does
+        if not isinstance(entries, list) or len(entries) != len(paths):
+            return {}
+
+        return {path: entry for path, entry in zip(paths, entries) if 'Error' not in entry}
+
+    def _parse_capture_time(self, metadata: dict) -> datetime | None:
+        """Pick the preferred date tag from exiftool metadata and parse it"""
+        for field in self.DATE_TAGS:
+            if field in metadata:
+                capture_time = _parse_video_datetime(str(metadata[field]))
+                if capture_time is not None:
+                    return capture_time
+
+        return None
+
+    def _parse_gps(self, metadata: dict) -> tuple[float, float] | None:
+        """Convert exiftool GPS tags to signed decimal degrees"""
         try:
-            cmd = ['exiftool', '-j', '-GPSLatitude', '-GPSLongitude', '-GPSLatitudeRef', '-GPSLongitudeRef', self.video_path]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode != 0:
-                return None
-            
-            metadata = json.loads(result.stdout)[0]
-            
             # Check if GPS data exists
             if 'GPSLatitude' not in metadata or 'GPSLongitude' not in metadata:
                 return None
-            
+
             latitude = float(metadata['GPSLatitude'])
             longitude = float(metadata['GPSLongitude'])
-            
-            # Apply hemisphere references if available
-            if 'GPSLatitudeRef' in metadata and metadata['GPSLatitudeRef'] == 'S':
-                latitude = -latitude
-            if 'GPSLongitudeRef' in metadata and metadata['GPSLongitudeRef'] == 'W':
-                longitude = -longitude
-            
+
+            # Apply hemisphere references if available. Composite GPS values
+            # are already signed, so take the magnitude before applying them.
+            if 'GPSLatitudeRef' in metadata:
+                latitude = -abs(latitude) if metadata['GPSLatitudeRef'] == 'S' else abs(latitude)
+            if 'GPSLongitudeRef' in metadata:
+                longitude = -abs(longitude) if metadata['GPSLongitudeRef'] == 'W' else abs(longitude)
+
             return latitude, longitude
-            
-        except Exception:
+
+        except (TypeError, ValueError):
             return None
-    
+
     def set_gps_coordinates(self, latitude: float, longitude: float, dry_run: bool = False,
                             exiftool_session=None) -> bool:
         """Set GPS coordinates in video metadata using ExifTool"""
         if dry_run:
             return True
 
+        # The write changes the GPS tags, so re-read them on next access
+        self._metadata_loaded = False
+
         # Reuse a shared persistent exiftool process when one is provided.
+        if exiftool_session is None:
+            exiftool_session = self.exiftool_session
         if exiftool_session is not None:
             return exiftool_session.set_gps(self.video_path, latitude, longitude)
 
@@ -101,7 +183,7 @@ class VideoProcessor:
             lon_ref = 'E' if longitude >= 0 else 'W'
             
             cmd = [
-                'exiftool',
+                _EXIFTOOL,
                 f'-GPSLatitude={abs(latitude)}',
                 f'-GPSLatitudeRef={lat_ref}',
                 f'-GPSLongitude={abs(longitude)}',
@@ -116,8 +198,13 @@ class VideoProcessor:
         except Exception:
             return False
     
-    def create_xmp_sidecar(self, keywords: List[str], latitude: Optional[float] = None, longitude: Optional[float] = None, dry_run: bool = False) -> bool:
-        """Create XMP sidecar file for video with keywords and GPS data"""
+    def create_xmp_sidecar(self, keywords: list[str], latitude: float | None = None, longitude: float | None = None, dry_run: bool = False,
+                           capture_time: datetime | None = None) -> bool:
+        """Create XMP sidecar file for video with keywords and GPS data
+
+        capture_time: the capture time if the caller has already read it.
+        When None, it is read from the video.
+        """
         if dry_run:
             return True
         
@@ -126,10 +213,11 @@ class VideoProcessor:
         
         try:
             # Create keyword list XML
-            keyword_items = '\n'.join([f'     <rdf:li>{keyword}</rdf:li>' for keyword in keywords])
+            keyword_items = xmp_keyword_items(keywords)
             
             # Get capture time if available for DateTimeOriginal
-            capture_time = self.get_capture_time()
+            if capture_time is None:
+                capture_time = self.get_capture_time()
             datetime_original = ''
             if capture_time:
                 # Format as ISO 8601 with timezone
@@ -139,17 +227,13 @@ class VideoProcessor:
             gps_data = ''
             if latitude is not None and longitude is not None:
                 # Convert to degrees,minutes.decimal_minutes format for XMP
-                lat_deg = int(abs(latitude))
-                lat_min_float = (abs(latitude) - lat_deg) * 60
-                lat_min = int(lat_min_float)
-                lat_sec = (lat_min_float - lat_min) * 60
-                lat_decimal_min = lat_min + (lat_sec / 60.0)
+                abs_lat = abs(latitude)
+                lat_deg = int(abs_lat)
+                lat_decimal_min = (abs_lat - lat_deg) * 60.0
                 
-                lon_deg = int(abs(longitude))
-                lon_min_float = (abs(longitude) - lon_deg) * 60
-                lon_min = int(lon_min_float)
-                lon_sec = (lon_min_float - lon_min) * 60
-                lon_decimal_min = lon_min + (lon_sec / 60.0)
+                abs_lon = abs(longitude)
+                lon_deg = int(abs_lon)
+                lon_decimal_min = (abs_lon - lon_deg) * 60.0
                 
                 lat_dir = 'N' if latitude >= 0 else 'S'
                 lon_dir = 'E' if longitude >= 0 else 'W'
@@ -158,31 +242,11 @@ class VideoProcessor:
    <exif:GPSLongitude>{lon_deg},{lon_decimal_min:.2f}{lon_dir}</exif:GPSLongitude>
 '''
             
-            xmp_template = f'''<x:xmpmeta xmlns:x="adobe:ns:meta/" x:xmptk="XMP Core 5.5.0">
- <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
-  <rdf:Description rdf:about=""
-    xmlns:xmp="http://ns.adobe.com/xap/1.0/"
-    xmlns:lightroom="http://ns.adobe.com/lightroom/1.0/"
-    xmlns:dc="http://purl.org/dc/elements/1.1/"
-    xmlns:exif="http://ns.adobe.com/exif/1.0/">
-   <xmp:Rating>0</xmp:Rating>
-   <lightroom:hierarchicalSubject>
-    <rdf:Bag>
-{keyword_items}
-    </rdf:Bag>
-   </lightroom:hierarchicalSubject>
-   <dc:subject>
-    <rdf:Bag>
-{keyword_items}
-    </rdf:Bag>
-   </dc:subject>
-{datetime_original}{gps_data}  </rdf:Description>
- </rdf:RDF>
-</x:xmpmeta>
-'''
+            xmp_content = XMP_TEMPLATE.format(keyword_items=keyword_items, datetime_original=datetime_original,
+                                              gps_data=gps_data)
             
-            with open(xmp_path, 'w', encoding='utf-8') as f:
-                f.write(xmp_template)
+            # Re-runs usually regenerate the same sidecar; leave it untouched then
+            write_if_changed(xmp_path, xmp_content.encode('utf-8'))
             
             return True
             
@@ -190,42 +254,40 @@ class VideoProcessor:
             return False
     
     @staticmethod
-    def find_videos(directory: str, recursive: bool = True, excluded_folders: Optional[List[str]] = None) -> list:
+    def find_videos(directory: str, recursive: bool = True, excluded_folders: Iterable[str] | None = None) -> list:
         """Find all supported video files in a directory
         
         Args:
             directory: Directory to search in
             recursive: If True, search recursively in subdirectories
-            excluded_folders: List of folder names to exclude from search
+            excluded_folders: Folder names to exclude from search
         """
-        videos = []
-        excluded_folders = excluded_folders or []
-        
-        if not os.path.exists(directory):
-            raise FileNotFoundError(f"Directory not found: {directory}")
+        # Subdirectories are listed concurrently; see file_scan
+        videos = scan_files(directory, VideoProcessor.SUPPORTED_EXTENSIONS_TUPLE, recursive, excluded_folders)
         
-        if recursive:
-            # Recursive search
-            for root, dirs, files in os.walk(directory):
-                # Remove excluded directories from the search
-                dirs[:] = [d for d in dirs if d not in excluded_folders]
-                
-                for file in files:
-                    ext = os.path.splitext(file)[1].lower()
-                    if ext in VideoProcessor.SUPPORTED_EXTENSIONS:
-                        videos.append(os.path.join(root, file))
-        else:
-            # Non-recursive search (only in specified directory)
-            try:
-                files = os.listdir(directory)
-                for file in files:
-                    file_path = os.path.join(directory, file)
-                    # Only process files, not directories
-                    if os.path.isfile(file_path):
-                        ext = os.path.splitext(file)[1].lower()
-                        if ext in VideoProcessor.SUPPORTED_EXTENSIONS:
-                            videos.append(file_path)
-            except OSError:
-                raise FileNotFoundError(f"Cannot access directory: {directory}")
-        
-        return sorted(videos)
\ No newline at end of file
+        return sorted(videos)
+
+
+@lru_cache(maxsize=2048)
+def _parse_video_datetime(date_str: str) -> datetime | None:
+    """Parse an exiftool date string, returning None if it isn't one
+
+    Common formats: "2023:10:15 14:30:25", "2023-10-15 14:30:25". Videos from
+    one shoot share dates, so parses are cached.
+    """
+    # The common layouts are fixed, so slice them rather than run strptime's
+    # format interpreter; anything else goes through strptime
+    if (len(date_str) == 19 and date_str[4] == date_str[7] and date_str[4] in ':-'
+            and date_str[10] == ' ' and date_str[13] == date_str[16] == ':'):
+        try:
+            return datetime(int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]),
+                            int(date_str[11:13]), int(date_str[14:16]), int(date_str[17:19]))
+        except ValueError:
+            pass
+
+    for fmt in ['%Y:%m:%d %H:%M:%S', '%Y-%m-%d %H:%M:%S', '%Y:%m:%d %H:%M:%S%z']:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+    return None
@@ -2,10 +2,9 @@ from setuptools import setup, find_packages
 
 setup(
     name="photo-tagger",
-    version="0.4.1",
+    version="0.8.32",
     packages=find_packages(),
     install_requires=[
-        "exifread>=3.0.0",
         "piexif>=1.1.3",
         "exiv2>=0.17.5",
         "PyExifTool>=0.5.6",
@@ -18,6 +17,7 @@ setup(
         "dev": [
             "pytest>=7.4.3",
             "pytest-cov>=4.1.0",
+            "pytest-xdist>=3.5.0",
         ],
     },
     entry_points={
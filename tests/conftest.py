@@ -0,0 +1,43 @@
+"""Shared fixtures for the test suite"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture(scope='session')
+def fake_processor():
+    """Factory for a stand-in media processor with a fixed capture time and no GPS
+
+    For tests that only read from the processor; tests that assert on calls
+    to it use a MagicMock instead.
+    """
+    def factory(capture_time):
+        return SimpleNamespace(get_capture_time=lambda: capture_time, get_current_gps=lambda: None)
+    return factory
+
+
+@pytest.fixture(scope='session')
+def touch_files():
+    """Function creating empty files (and their folders) under a root directory
+
+    For the file-discovery tests, which only look at names, so nothing is
+    written to the files.
+    """
+    def touch(root, names):
+        for name in names:
+            path = os.path.join(root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o644))
+    return touch
+
+
+@pytest.fixture
+def ssrf_file(tmp_path):
+    """Factory writing Subsurface log content to a file under tmp_path, returning its path"""
+    def factory(content):
+        path = tmp_path / 'test.ssrf'
+        path.write_text(content)
+        return str(path)
+    return factory
@@ -1,9 +1,36 @@
 """Tests for the command line interface"""
 
+import io
+import logging
+import threading
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
 from click.testing import CliRunner
 
 from photo_tagger import __version__
-from photo_tagger.cli import main
+from photo_tagger.cli import _check_camera_tag_warnings, _MainThreadHandler, main
+from photo_tagger.subsurface_parser import Dive, DiveSite
+
+SSRF_CONTENT = '''<?xml version="1.0"?>
+<divelog program='subsurface' version='3'>
+<divesites>
+<site uuid='site1' name='Test Site' gps='21.676950 -72.469670'>
+</site>
+</divesites>
+<dive number='1' date='2024-01-15' time='10:30:00' duration='45:00' divesiteid='site1'>
+</dive>
+</divelog>'''
+
+
+def make_processor(capture_time):
+    """Build a mock processor that reports the given capture time"""
+    processor = MagicMock()
+    processor.get_capture_time.return_value = capture_time
+    processor.get_current_gps.return_value = None
+    processor.set_gps_coordinates.return_value = True
+    processor.create_xmp_sidecar.return_value = True
+    return processor
 
 
 class TestCli:
@@ -16,3 +43,113 @@ class TestCli:
 
         assert result.exit_code == 0
         assert __version__ in result.output
+
+    def _setup_files(self, tmp_path):
+        """Helper to create a dive log and a directory of three images"""
+        ssrf_file = tmp_path / 'log.ssrf'
+        ssrf_file.write_text(SSRF_CONTENT)
+        images_dir = tmp_path / 'images'
+        images_dir.mkdir()
+        for name in ['a.jpg', 'b.jpg', 'c.jpg']:
+            (images_dir / name).write_bytes(b'fake')
+        return str(ssrf_file), str(images_dir)
+
+    def _invoke(self, tmp_path, args):
+        """Helper to run the CLI with the dive log cache kept under tmp_path"""
+        runner = CliRunner(env={'XDG_CACHE_HOME': str(tmp_path / 'cache')})
+        return runner.invoke(main, args)
+
+    def test_processes_files_in_parallel_and_aggregates_counts(self, tmp_path):
+        """Writes run on the worker pool and their results feed the summary"""
+        ssrf_file, images_dir = self._setup_files(tmp_path)
+        processors = {
+            'a.jpg': make_processor(datetime(2024, 1, 15, 10, 40, 0)),  # within dive
+            'b.jpg': make_processor(datetime(2024, 1, 15, 10, 50, 0)),  # within dive
+            'c.jpg': make_processor(None),                              # no capture time
+        }
+
+        def create_processor(path, exiftool_session=None):
+            return processors[path.rsplit('/', 1)[-1]]
+
+        with patch('photo_tagger.cli.MediaProcessor.create_processor', side_effect=create_processor), \
+                patch('photo_tagger.cli.ExifToolSession') as session_cls:
+            session_cls.return_value.__enter__.return_value = None
+            result = self._invoke(tmp_path, ['-s', ssrf_file, '-i', images_dir])
+
+        assert result.exit_code == 0, result.output
+        assert 'Updated: 2' in result.output
+        assert 'Skipped: 1' in result.output
+        assert 'Dive #1: Test Site - 2 files' in result.output
+        for name in ['a.jpg', 'b.jpg']:
+            processors[name].create_xmp_sidecar.assert_called_once()
+        processors['c.jpg'].create_xmp_sidecar.assert_not_called()
+
+    def test_failed_write_counts_as_error(self, tmp_path):
+        """A sidecar that can't be written is reported and fails the run"""
+        ssrf_file, images_dir = self._setup_files(tmp_path)
+        processor = make_processor(datetime(2024, 1, 15, 10, 40, 0))
+        processor.create_xmp_sidecar.return_value = False
+
+        with patch('photo_tagger.cli.MediaProcessor.create_processor', return_value=processor), \
+                patch('photo_tagger.cli.ExifToolSession') as session_cls:
+            session_cls.return_value.__enter__.return_value = None
+            result = self._invoke(tmp_path, ['-s', ssrf_file, '-i', images_dir])
+
+        assert result.exit_code == 1
+        assert 'Errors: 3' in result.output
+
+    def test_dry_run_does_not_start_exiftool(self, tmp_path):
+        """Dry runs read metadata without a shared exiftool session"""
+        ssrf_file, images_dir = self._setup_files(tmp_path)
+        processor = make_processor(datetime(2024, 1, 15, 10, 40, 0))
+
+        with patch('photo_tagger.cli.MediaProcessor.create_processor', return_value=processor) as create, \
+                patch('photo_tagger.cli.ExifToolSession') as session_cls:
+            result = self._invoke(tmp_path, ['-s', ssrf_file, '-i', images_dir, '--dry-run'])
+
+        assert result.exit_code == 0, result.output
+        assert 'Would update: 3' in result.output
+        session_cls.assert_not_called()
+        assert all(call.kwargs['exiftool_session'] is None for call in create.call_args_list)
+        processor.create_xmp_sidecar.assert_not_called()
+
+    def test_worker_logs_wait_for_main_thread(self):
+        """Records logged on a worker thread are only written when flushed"""
+        stream = io.StringIO()
+        handler = _MainThreadHandler(stream)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+
+        worker = threading.Thread(target=handler.handle, args=(logging.makeLogRecord({'msg': 'from worker'}),))
+        worker.start()
+        worker.join()
+        assert stream.getvalue() == ''
+
+        handler.handle(logging.makeLogRecord({'msg': 'from main'}))
+        handler.flush_pending()
+        assert stream.getvalue() == 'from main\nfrom worker\n'
+
+    def test_camera_tag_warnings(self, capsys):
+        """Only in-range dives whose photos and camera tag disagree are flagged"""
+        site = DiveSite(uuid='site1', name='Test Site')
+
+        def dive(number, day, tags):
+            time = datetime(2024, 1, day, 10, 0, 0)
+            return Dive(number=number, date=time, time=time, duration_minutes=45, site=site, tags=tags)
+
+        dives = [
+            dive(1, 15, []),            # matched, untagged -> warn
+            dive(2, 16, ['camera']),    # tagged, unmatched -> warn
+            dive(3, 16, ['camera']),    # tagged and matched -> fine
+            dive(4, 17, []),            # neither -> fine
+            dive(5, 20, ['camera']),    # outside the photo range -> ignored
+        ]
+        _check_camera_tag_warnings(
+            dives, {1: 2, 3: 1}, datetime(2024, 1, 15, 9, 0, 0), datetime(2024, 1, 18, 9, 0, 0)
+        )
+
+        output = capsys.readouterr().out
+        untagged, tagged = output.split("Dives tagged with 'camera'")
+        assert 'Dive #1 ' in untagged
+        assert 'Dive #2 ' in tagged
+        for number in (3, 4, 5):
+            assert f'Dive #{number} ' not in output
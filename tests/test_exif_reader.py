@@ -0,0 +1,89 @@
+"""Tests for exif_reader module"""
+
+import struct
+
+import piexif
+import pytest
+
+from photo_tagger.exif_reader import read_capture_time_string
+
+
+def make_exif(zeroth=None, exif=None):
+    """Helper to build a big-endian EXIF TIFF block (without the Exif header)"""
+    return piexif.dump({"0th": zeroth or {}, "Exif": exif or {}})[6:]
+
+
+def make_jpeg(tiff, preceding=b''):
+    """Helper to wrap EXIF TIFF data in a minimal JPEG, after any other segments"""
+    payload = b'Exif\x00\x00' + tiff
+    app1 = b'\xff\xe1' + struct.pack('>H', len(payload) + 2) + payload
+    return b'\xff\xd8' + preceding + app1 + b'\xff\xda\x00\x02' + b'\xff\xd9'
+
+
+def make_little_endian_tiff(date):
+    """Helper to build a little-endian TIFF with DateTimeOriginal in its Exif IFD"""
+    value = date.encode() + b'\x00'
+    ifd0_offset = 8
+    exif_offset = ifd0_offset + 2 + 12 + 4
+    value_offset = exif_offset + 2 + 12 + 4
+    return (
+        b'II' + struct.pack('<HI', 42, ifd0_offset)
+        + struct.pack('<H', 1) + struct.pack('<HHII', 0x8769, 4, 1, exif_offset) + b'\x00' * 4
+        + struct.pack('<H', 1) + struct.pack('<HHII', 0x9003, 2, len(value), value_offset) + b'\x00' * 4
+        + value
+    )
+
+
+class TestExifReader:
+
+    @pytest.mark.parametrize('zeroth,exif,expected', [
+        # DateTimeOriginal wins over DateTimeDigitized and DateTime
+        ({piexif.ImageIFD.DateTime: b'2024:01:01 00:00:00'},
+         {piexif.ExifIFD.DateTimeOriginal: b'2024:01:15 14:30:45',
+          piexif.ExifIFD.DateTimeDigitized: b'2024:01:15 14:30:46'}, '2024:01:15 14:30:45'),
+        ({piexif.ImageIFD.DateTime: b'2024:01:01 00:00:00'},
+         {piexif.ExifIFD.DateTimeDigitized: b'2024:01:15 14:30:46'}, '2024:01:15 14:30:46'),
+        ({piexif.ImageIFD.DateTime: b'2024:01:01 00:00:00'}, None, '2024:01:01 00:00:00'),
+        (None, None, None),
+    ])
+    def test_jpeg_date_preference(self, tmp_path, zeroth, exif, expected):
+        """Date tags are preferred in the same order as the other readers"""
+        image_file = tmp_path / "photo.jpg"
+        image_file.write_bytes(make_jpeg(make_exif(zeroth, exif)))
+
+        assert read_capture_time_string(str(image_file)) == expected
+
+    def test_jpeg_skips_other_segments(self, tmp_path):
+        """APP0 (JFIF) and non-Exif APP1 (XMP) segments before the Exif block are skipped"""
+        jfif = b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00' + b'\x00' * 9
+        xmp_payload = b'http://ns.adobe.com/xap/1.0/\x00<x:xmpmeta/>'
+        xmp = b'\xff\xe1' + struct.pack('>H', len(xmp_payload) + 2) + xmp_payload
+        tiff = make_exif(exif={piexif.ExifIFD.DateTimeOriginal: b'2024:01:15 14:30:45'})
+        image_file = tmp_path / "photo.jpg"
+        image_file.write_bytes(make_jpeg(tiff, preceding=jfif + xmp))
+
+        assert read_capture_time_string(str(image_file)) == '2024:01:15 14:30:45'
+
+    @pytest.mark.parametrize('tiff', [
+        make_exif(exif={piexif.ExifIFD.DateTimeOriginal: b'2024:01:15 14:30:45'}),  # big-endian
+        make_little_endian_tiff('2024:01:15 14:30:45'),
+    ])
+    def test_tiff(self, tmp_path, tiff):
+        """TIFF files are read from their own header in either byte order"""
+        image_file = tmp_path / "photo.tif"
+        image_file.write_bytes(tiff)
+
+        assert read_capture_time_string(str(image_file)) == '2024:01:15 14:30:45'
+
+    @pytest.mark.parametrize('content', [
+        b'',
+        b'not an image',
+        b'\xff\xd8\xff\xe1\x00',    # truncated segment
+        b'MM\x00\x2a\xff\xff\xff\xff',  # IFD offset past the end of the file
+    ])
+    def test_unreadable_returns_none(self, tmp_path, content):
+        """Unrecognised or malformed files give None so callers can fall back"""
+        image_file = tmp_path / "photo.jpg"
+        image_file.write_bytes(content)
+
+        assert read_capture_time_string(str(image_file)) is None
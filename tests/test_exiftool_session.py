@@ -43,3 +43,47 @@ class TestExifToolSession:
         with patch('exiftool.ExifToolHelper', return_value=fake_helper):
             with ExifToolSession() as session:
                 assert session.set_gps('/tmp/dive.arw', 20.0, -86.0) is False
+
+    @patch('photo_tagger.exiftool_session.shutil.which', return_value=None)
+    def test_get_tags_unavailable_returns_empty(self, mock_which):
+        """Without exiftool, reads return nothing so callers fall back."""
+        with ExifToolSession() as session:
+            assert session.get_tags(['/tmp/clip.mp4'], ['CreateDate']) == {}
+
+    @patch('photo_tagger.exiftool_session.shutil.which', return_value='/usr/bin/exiftool')
+    def test_get_tags_batches_paths_and_strips_groups(self, mock_which):
+        """Several files are read in one round-trip and tag names lose their
+        group prefix, keeping the first value seen."""
+        fake_helper = MagicMock()
+        fake_helper.get_tags.return_value = [
+            {'SourceFile': '/tmp/a.mp4', 'QuickTime:CreateDate': '2024:01:15 10:00:00',
+             'XMP:CreateDate': '2000:01:01 00:00:00'},
+            {'SourceFile': '/tmp/b.mp4', 'Composite:GPSLatitude': -20.5},
+        ]
+        with patch('exiftool.ExifToolHelper', return_value=fake_helper), ExifToolSession() as session:
+            metadata = session.get_tags(['/tmp/a.mp4', '/tmp/b.mp4'], ['CreateDate', 'GPSLatitude'])
+
+        fake_helper.get_tags.assert_called_once()
+        args, kwargs = fake_helper.get_tags.call_args
+        assert args[0] == ['/tmp/a.mp4', '/tmp/b.mp4']
+        assert '-fast' in kwargs['params']
+        assert metadata['/tmp/a.mp4']['CreateDate'] == '2024:01:15 10:00:00'
+        assert metadata['/tmp/b.mp4']['GPSLatitude'] == -20.5
+
+    @patch('photo_tagger.exiftool_session.shutil.which', return_value='/usr/bin/exiftool')
+    def test_get_tags_incomplete_result_returns_empty(self, mock_which):
+        """Results are matched to paths by position, so a short result is discarded."""
+        fake_helper = MagicMock()
+        fake_helper.get_tags.return_value = [{'SourceFile': '/tmp/b.mp4', 'QuickTime:CreateDate': '2024:01:15 10:00:00'}]
+        with patch('exiftool.ExifToolHelper', return_value=fake_helper), ExifToolSession() as session:
+            assert session.get_tags(['/tmp/a.mp4', '/tmp/b.mp4'], ['CreateDate']) == {}
+
+    @patch('photo_tagger.exiftool_session.shutil.which', return_value='/usr/bin/exiftool')
+    def test_get_tags_read_error_returns_empty(self, mock_which):
+        """A failing exiftool read degrades to no metadata rather than raising."""
+        from exiftool.exceptions import ExifToolExecuteError
+
+        fake_helper = MagicMock()
+        fake_helper.get_tags.side_effect = ExifToolExecuteError(1, '', 'Error: boom', [])
+        with patch('exiftool.ExifToolHelper', return_value=fake_helper), ExifToolSession() as session:
+            assert session.get_tags(['/tmp/a.mp4'], ['CreateDate']) == {}
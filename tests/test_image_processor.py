@@ -4,191 +4,266 @@ import pytest
 import tempfile
 import os
 import subprocess
+import piexif
 from datetime import datetime
 from unittest.mock import patch
+from lxml import etree
 
-from photo_tagger.image_processor import ImageProcessor
+from photo_tagger.image_processor import ImageProcessor, _cached_capture_time
+
+
+# piexif.load results for the stubbed reads; tests only read them
+EXIF_CAPTURE = {"Exif": {36867: b'2024:01:15 14:30:45'}, "0th": {}}  # DateTimeOriginal
+EXIF_NO_CAPTURE = {"Exif": {}, "0th": {}}
+EXIF_GPS = {
+    "GPS": {
+        1: b'N',  # GPSLatitudeRef
+        2: ((21, 1), (40, 1), (37000, 1000)),  # GPSLatitude in DMS
+        3: b'W',  # GPSLongitudeRef
+        4: ((72, 1), (28, 1), (11000, 1000)),  # GPSLongitude in DMS
+    }
+}
+EXIF_NO_GPS = {"GPS": {}}
+
+
+@pytest.fixture(scope='session')
+def empty_files(tmp_path_factory):
+    """One empty file per extension, shared by every test that never writes to it"""
+    directory = tmp_path_factory.mktemp('empty')
+    paths = {}
+    for ext in ['.cr3', '.cr2', '.jpg', '.jpeg', '.tiff', '.tif', '.arw', '.txt']:
+        path = directory / f'image{ext}'
+        path.touch()
+        paths[ext] = str(path)
+    return paths
+
+
+@pytest.fixture(scope='session')
+def jpg_path(empty_files):
+    return empty_files['.jpg']
+
+
+@pytest.fixture(scope='class')
+def jpg_processor(jpg_path):
+    """A processor for tests that only exercise its pure conversion helpers"""
+    return ImageProcessor(jpg_path)
+
+
+@pytest.fixture(scope='session')
+def arw_path(empty_files):
+    return empty_files['.arw']
+
+
+@pytest.fixture(scope='session')
+def txt_path(empty_files):
+    return empty_files['.txt']
+
+
+@pytest.fixture
+def piexif_load(monkeypatch):
+    """Stub piexif.load: it returns the dict a test stores under 'exif' and
+    counts its calls under 'calls'"""
+    stub = {'exif': {}, 'calls': 0}
+
+    def load(path):
+        stub['calls'] += 1
+        return stub['exif']
+
+    monkeypatch.setattr(piexif, 'load', load)
+    return stub
+
+
+@pytest.fixture(scope='module')
+def sample_tree(tmp_path_factory, touch_files):
+    """A small directory tree, built once and only read by the find_images tests"""
+    root = tmp_path_factory.mktemp('tree')
+    touch_files(str(root), ['test.jpg', 'test.cr3', 'test.txt', 'subdir/sub.jpg',
+                            'Output/output.jpg', 'Cache/cache.jpg', 'Normal/normal.jpg'])
+    return root
 
 
 class TestImageProcessor:
     
-    def test_unsupported_file_extension(self):
+    @pytest.fixture(autouse=True)
+    def clear_capture_time_cache(self):
+        """Start each test with an empty process-wide capture time cache"""
+        _cached_capture_time.cache_clear()
+    
+    def test_unsupported_file_extension(self, txt_path):
         """Test that unsupported file extensions raise an error"""
-        temp_file = tempfile.NamedTemporaryFile(suffix='.txt', delete=False)
-        temp_file.close()
-        
-        try:
-            with pytest.raises(ValueError, match="Unsupported image format"):
-                ImageProcessor(temp_file.name)
-        finally:
-            os.unlink(temp_file.name)
+        with pytest.raises(ValueError, match="Unsupported image format"):
+            ImageProcessor(txt_path)
     
     def test_file_not_found(self):
         """Test that missing files raise an error"""
         with pytest.raises(FileNotFoundError, match="Image file not found"):
             ImageProcessor('/nonexistent/image.jpg')
     
-    def test_supported_extensions(self):
+    @pytest.mark.parametrize('ext', ['.cr3', '.cr2', '.jpg', '.jpeg', '.tiff', '.tif', '.arw'])
+    def test_supported_extension(self, empty_files, ext):
         """Test that supported extensions are recognized"""
-        supported_exts = ['.cr3', '.cr2', '.jpg', '.jpeg', '.tiff', '.tif', '.arw']
-        
-        for ext in supported_exts:
-            temp_file = tempfile.NamedTemporaryFile(suffix=ext, delete=False)
-            temp_file.close()
-            
-            try:
-                # Should not raise an exception
-                processor = ImageProcessor(temp_file.name)
-                assert processor.image_path == temp_file.name
-            finally:
-                os.unlink(temp_file.name)
+        # Should not raise an exception
+        processor = ImageProcessor(empty_files[ext])
+        assert processor.image_path == empty_files[ext]
     
-    @patch('piexif.load')
-    def test_get_capture_time_success(self, mock_piexif_load):
+    def test_get_capture_time_success(self, piexif_load, jpg_path):
         """Test successful extraction of capture time"""
-        # Mock EXIF data with datetime
-        mock_exif = {
-            "Exif": {
-                36867: b'2024:01:15 14:30:45'  # DateTimeOriginal
-            },
-            "0th": {}
-        }
-        mock_piexif_load.return_value = mock_exif
+        piexif_load['exif'] = EXIF_CAPTURE
+        
+        processor = ImageProcessor(jpg_path)
+        capture_time = processor.get_capture_time()
         
-        temp_file = tempfile.NamedTemporaryFile(suffix='.jpg', delete=False)
-        temp_file.close()
+        assert capture_time == datetime(2024, 1, 15, 14, 30, 45)
+    
+    @patch.object(ImageProcessor, '_get_capture_time_exiv2')
+    def test_get_capture_time_jpeg_reads_app1_directly(self, mock_exiv2, tmp_path):
+        """JPEG capture time comes from the APP1 segment without opening exiv2"""
+        exif_bytes = piexif.dump({"Exif": {piexif.ExifIFD.DateTimeOriginal: b'2024:01:15 14:30:45'}})
+        app1 = b'\xff\xe1' + (len(exif_bytes) + 2).to_bytes(2, 'big') + exif_bytes
+        image_file = tmp_path / "photo.jpg"
+        image_file.write_bytes(b'\xff\xd8' + app1 + b'\xff\xd9')
+        
+        processor = ImageProcessor(str(image_file))
+        
+        assert processor.get_capture_time() == datetime(2024, 1, 15, 14, 30, 45)
+        mock_exiv2.assert_not_called()
+    
+    @pytest.mark.parametrize('dt_str,expected', [
+        ('2024:01:15 14:30:45', datetime(2024, 1, 15, 14, 30, 45)),
+        ('2024:1:5 4:30:45', datetime(2024, 1, 5, 4, 30, 45)),  # off-layout, via strptime
+        ('    :  :     :  :  ', None),  # blank date some cameras write
+        ('0000:00:00 00:00:00', None),
+        ('2024:02:30 14:30:45', None),
+    ])
+    def test_parse_exif_datetime(self, dt_str, expected):
+        """EXIF datetimes parse like strptime, raising ValueError when invalid"""
+        if expected is None:
+            with pytest.raises(ValueError):
+                ImageProcessor._parse_exif_datetime(dt_str)
+        else:
+            assert ImageProcessor._parse_exif_datetime(dt_str) == expected
+
+    def test_get_capture_time_exiv2_tag_preference(self, tmp_path):
+        """exiv2 falls through to the next date tag when one is missing"""
+        exif_bytes = piexif.dump({
+            "0th": {piexif.ImageIFD.DateTime: b'2024:01:01 00:00:00'},
+            "Exif": {piexif.ExifIFD.DateTimeDigitized: b'2024:01:15 14:30:46'},
+        })
+        app1 = b'\xff\xe1' + (len(exif_bytes) + 2).to_bytes(2, 'big') + exif_bytes
+        image_file = tmp_path / "photo.jpg"
+        image_file.write_bytes(b'\xff\xd8' + app1 + b'\xff\xda\x00\x02' + b'\xff\xd9')
+
+        processor = ImageProcessor(str(image_file))
+
+        assert processor._get_capture_time_exiv2() == datetime(2024, 1, 15, 14, 30, 46)
+
+    def test_capture_time_shared_across_instances(self, tmp_path):
+        """A second processor for an unchanged file reuses the cached read"""
+        image_file = tmp_path / "photo.jpg"
+        image_file.write_bytes(b'fake')
+        capture_time = datetime(2024, 1, 15, 14, 30, 45)
         
-        try:
-            processor = ImageProcessor(temp_file.name)
-            capture_time = processor.get_capture_time()
+        with patch.object(ImageProcessor, '_read_capture_time', return_value=capture_time) as mock_read:
+            assert ImageProcessor(str(image_file)).get_capture_time() == capture_time
+            assert ImageProcessor(str(image_file)).get_capture_time() == capture_time
+            assert mock_read.call_count == 1
             
-            assert capture_time == datetime(2024, 1, 15, 14, 30, 45)
-        finally:
-            os.unlink(temp_file.name)
+            # A modified file is read again
+            image_file.write_bytes(b'modified')
+            ImageProcessor(str(image_file)).get_capture_time()
+            assert mock_read.call_count == 2
     
-    @patch('piexif.load')
-    def test_get_capture_time_no_exif(self, mock_piexif_load):
+    def test_get_capture_time_no_exif(self, piexif_load, jpg_path):
         """Test when no EXIF datetime is available"""
-        mock_exif = {"Exif": {}, "0th": {}}
-        mock_piexif_load.return_value = mock_exif
+        piexif_load['exif'] = EXIF_NO_CAPTURE
         
-        temp_file = tempfile.NamedTemporaryFile(suffix='.jpg', delete=False)
-        temp_file.close()
+        processor = ImageProcessor(jpg_path)
+        capture_time = processor.get_capture_time()
         
-        try:
-            processor = ImageProcessor(temp_file.name)
-            capture_time = processor.get_capture_time()
-            
-            assert capture_time is None
-        finally:
-            os.unlink(temp_file.name)
+        assert capture_time is None
     
-    @patch('piexif.load')
-    def test_get_current_gps_success(self, mock_piexif_load):
+    def test_get_current_gps_success(self, piexif_load, jpg_path):
         """Test successful extraction of GPS coordinates"""
-        # Mock GPS EXIF data
-        mock_exif = {
-            "GPS": {
-                1: b'N',  # GPSLatitudeRef
-                2: ((21, 1), (40, 1), (37000, 1000)),  # GPSLatitude in DMS
-                3: b'W',  # GPSLongitudeRef  
-                4: ((72, 1), (28, 1), (11000, 1000)),  # GPSLongitude in DMS
-            }
-        }
-        mock_piexif_load.return_value = mock_exif
+        piexif_load['exif'] = EXIF_GPS
         
-        temp_file = tempfile.NamedTemporaryFile(suffix='.jpg', delete=False)
-        temp_file.close()
+        processor = ImageProcessor(jpg_path)
+        gps = processor.get_current_gps()
         
-        try:
-            processor = ImageProcessor(temp_file.name)
-            gps = processor.get_current_gps()
-            
-            assert gps is not None
-            lat, lon = gps
-            assert lat == pytest.approx(21.676944, abs=0.01)  # 21°40'37"N
-            assert lon == pytest.approx(-72.469722, abs=0.01)  # 72°28'11"W (negative for West)
-        finally:
-            os.unlink(temp_file.name)
+        assert gps is not None
+        lat, lon = gps
+        assert lat == pytest.approx(21.676944, abs=0.01)  # 21°40'37"N
+        assert lon == pytest.approx(-72.469722, abs=0.01)  # 72°28'11"W (negative for West)
     
-    @patch('piexif.load')
-    def test_get_current_gps_no_data(self, mock_piexif_load):
-        """Test when no GPS data is available"""
-        mock_exif = {"GPS": {}}
-        mock_piexif_load.return_value = mock_exif
+    def test_get_current_gps_cached(self, piexif_load, jpg_path):
+        """Repeated GPS reads parse the file once, until GPS is written"""
+        piexif_load['exif'] = EXIF_NO_GPS
         
-        temp_file = tempfile.NamedTemporaryFile(suffix='.jpg', delete=False)
-        temp_file.close()
+        processor = ImageProcessor(jpg_path)
+        assert processor.get_current_gps() is None
+        assert processor.get_current_gps() is None
+        assert piexif_load['calls'] == 1
         
-        try:
-            processor = ImageProcessor(temp_file.name)
-            gps = processor.get_current_gps()
-            
-            assert gps is None
-        finally:
-            os.unlink(temp_file.name)
+        with patch.object(processor, '_set_gps_coordinates_exiv2', return_value=True):
+            processor.set_gps_coordinates(21.5, -72.4)
+        processor.get_current_gps()
+        assert piexif_load['calls'] == 2
+
+    @patch.object(ImageProcessor, '_set_gps_coordinates_exiv2', return_value=False)
+    def test_set_gps_coordinates_piexif_reuses_gps_read(self, mock_exiv2, tmp_path):
+        """The piexif write reuses the EXIF loaded by get_current_gps, and the
+        next read sees the written coordinates"""
+        exif_bytes = piexif.dump({"Exif": {piexif.ExifIFD.DateTimeOriginal: b'2024:01:15 14:30:45'}})
+        app1 = b'\xff\xe1' + (len(exif_bytes) + 2).to_bytes(2, 'big') + exif_bytes
+        image_file = tmp_path / "photo.jpg"
+        # piexif.insert needs a scan segment to split the file at
+        image_file.write_bytes(b'\xff\xd8' + app1 + b'\xff\xda\x00\x02' + b'\xff\xd9')
+
+        processor = ImageProcessor(str(image_file))
+        with patch('piexif.load', wraps=piexif.load) as mock_load:
+            assert processor.get_current_gps() is None
+            assert processor.set_gps_coordinates(21.5, -72.25) is True
+            assert mock_load.call_count == 1
+
+            latitude, longitude = processor.get_current_gps()
+            assert mock_load.call_count == 2
+
+        assert latitude == pytest.approx(21.5)
+        assert longitude == pytest.approx(-72.25)
     
-    def test_decimal_to_dms_conversion(self):
-        """Test conversion from decimal degrees to DMS format"""
-        temp_file = tempfile.NamedTemporaryFile(suffix='.jpg', delete=False)
-        temp_file.close()
+    def test_get_current_gps_no_data(self, piexif_load, jpg_path):
+        """Test when no GPS data is available"""
+        piexif_load['exif'] = EXIF_NO_GPS
         
-        try:
-            processor = ImageProcessor(temp_file.name)
-            
-            # Test positive coordinate
-            dms = processor._decimal_to_dms(21.676944)
-            degrees = dms[0][0] / dms[0][1]
-            minutes = dms[1][0] / dms[1][1] 
-            seconds = dms[2][0] / dms[2][1]
-            
-            assert degrees == 21
-            assert minutes == 40
-            assert abs(seconds - 37) < 1  # Allow some rounding error
-            
-        finally:
-            os.unlink(temp_file.name)
+        processor = ImageProcessor(jpg_path)
+        gps = processor.get_current_gps()
+        
+        assert gps is None
     
-    def test_dms_to_decimal_conversion(self):
-        """Test conversion from DMS to decimal degrees"""
-        temp_file = tempfile.NamedTemporaryFile(suffix='.jpg', delete=False)
-        temp_file.close()
+    @pytest.mark.parametrize('decimal', [21.676944, -72.469722, 0.0, 89.999, -89.999])
+    def test_dms_roundtrip(self, jpg_processor, decimal):
+        """Decimal degrees survive conversion to EXIF DMS rationals and back"""
+        dms = jpg_processor._decimal_to_dms(abs(decimal))
         
-        try:
-            processor = ImageProcessor(temp_file.name)
-            
-            # Test DMS tuple: 21°40'37"
-            dms_tuple = ((21, 1), (40, 1), (37000, 1000))
-            decimal = processor._dms_to_decimal(dms_tuple)
-            
-            assert abs(decimal - 21.676944) < 0.01
-            
-        finally:
-            os.unlink(temp_file.name)
+        assert dms[0] == (int(abs(decimal)), 1)
+        assert jpg_processor._dms_to_decimal(dms) == pytest.approx(abs(decimal), abs=1e-4)
     
     @patch('piexif.dump')
     @patch('piexif.insert')
     @patch('piexif.load')
-    def test_set_gps_coordinates_dry_run(self, mock_load, mock_insert, mock_dump):
+    def test_set_gps_coordinates_dry_run(self, mock_load, mock_insert, mock_dump, jpg_path):
         """Test dry run mode doesn't modify files"""
-        temp_file = tempfile.NamedTemporaryFile(suffix='.jpg', delete=False)
-        temp_file.close()
+        processor = ImageProcessor(jpg_path)
+        result = processor.set_gps_coordinates(21.676944, -72.469722, dry_run=True)
         
-        try:
-            processor = ImageProcessor(temp_file.name)
-            result = processor.set_gps_coordinates(21.676944, -72.469722, dry_run=True)
-            
-            assert result is True
-            mock_load.assert_not_called()
-            mock_dump.assert_not_called()
-            mock_insert.assert_not_called()
-        finally:
-            os.unlink(temp_file.name)
+        assert result is True
+        mock_load.assert_not_called()
+        mock_dump.assert_not_called()
+        mock_insert.assert_not_called()
 
     @pytest.mark.parametrize('ext', ['.arw', '.tif', '.tiff'])
     @patch('photo_tagger.image_processor.subprocess.run')
     @patch('photo_tagger.image_processor.shutil.which', return_value='/usr/bin/exiftool')
-    def test_set_gps_coordinates_uses_exiftool(self, mock_which, mock_run, ext):
+    def test_set_gps_coordinates_uses_exiftool(self, mock_which, mock_run, ext, empty_files):
         """ARW/TIFF must be embedded via exiftool, not exiv2/piexif.
 
         exiv2/piexif corrupt these formats (ARW: orphaned strip + MakerNote;
@@ -196,61 +271,43 @@ class TestImageProcessor:
         through exiftool and returns its success.
         """
         mock_run.return_value = subprocess.CompletedProcess(args=[], returncode=0)
-        temp_file = tempfile.NamedTemporaryFile(suffix=ext, delete=False)
-        temp_file.close()
-
-        try:
-            processor = ImageProcessor(temp_file.name)
-            result = processor.set_gps_coordinates(21.676944, -72.469722, dry_run=False)
-
-            assert result is True
-            # exiftool was invoked with GPS args for the file
-            mock_run.assert_called_once()
-            argv = mock_run.call_args[0][0]
-            assert argv[0] == '/usr/bin/exiftool'
-            assert any(a.startswith('-GPSLatitude=') for a in argv)
-            assert temp_file.name in argv
-        finally:
-            os.unlink(temp_file.name)
+        processor = ImageProcessor(empty_files[ext])
+        result = processor.set_gps_coordinates(21.676944, -72.469722, dry_run=False)
+
+        assert result is True
+        # exiftool was invoked with GPS args for the file
+        mock_run.assert_called_once()
+        argv = mock_run.call_args[0][0]
+        assert argv[0] == '/usr/bin/exiftool'
+        assert any(a.startswith('-GPSLatitude=') for a in argv)
+        assert empty_files[ext] in argv
 
     @patch('photo_tagger.image_processor.subprocess.run')
-    def test_set_gps_coordinates_uses_session_when_provided(self, mock_run):
+    def test_set_gps_coordinates_uses_session_when_provided(self, mock_run, arw_path):
         """When a shared ExifToolSession is provided, it is used instead of
         spawning a one-shot exiftool process."""
         from unittest.mock import MagicMock
 
         session = MagicMock()
         session.set_gps.return_value = True
-        temp_file = tempfile.NamedTemporaryFile(suffix='.arw', delete=False)
-        temp_file.close()
-
-        try:
-            processor = ImageProcessor(temp_file.name)
-            result = processor.set_gps_coordinates(
-                21.676944, -72.469722, dry_run=False, exiftool_session=session
-            )
+        processor = ImageProcessor(arw_path)
+        result = processor.set_gps_coordinates(
+            21.676944, -72.469722, dry_run=False, exiftool_session=session
+        )
 
-            assert result is True
-            session.set_gps.assert_called_once_with(temp_file.name, 21.676944, -72.469722)
-            mock_run.assert_not_called()  # no per-file process spawned
-        finally:
-            os.unlink(temp_file.name)
+        assert result is True
+        session.set_gps.assert_called_once_with(arw_path, 21.676944, -72.469722)
+        mock_run.assert_not_called()  # no per-file process spawned
 
     @pytest.mark.parametrize('ext', ['.arw', '.tif', '.tiff'])
     @patch('photo_tagger.image_processor.shutil.which', return_value=None)
-    def test_set_gps_coordinates_without_exiftool_falls_back(self, mock_which, ext):
+    def test_set_gps_coordinates_without_exiftool_falls_back(self, mock_which, ext, empty_files):
         """When exiftool is missing, GPS write returns False so the caller
         falls back to an XMP sidecar."""
-        temp_file = tempfile.NamedTemporaryFile(suffix=ext, delete=False)
-        temp_file.close()
+        processor = ImageProcessor(empty_files[ext])
+        result = processor.set_gps_coordinates(21.676944, -72.469722, dry_run=False)
 
-        try:
-            processor = ImageProcessor(temp_file.name)
-            result = processor.set_gps_coordinates(21.676944, -72.469722, dry_run=False)
-
-            assert result is False
-        finally:
-            os.unlink(temp_file.name)
+        assert result is False
 
     def test_exiv2_warnings_are_suppressed(self):
         """Importing the module mutes exiv2 stderr noise (e.g. the error-level
@@ -259,116 +316,81 @@ class TestImageProcessor:
 
         assert exiv2.LogMsg.level() == exiv2.LogMsg.Level.mute
 
-    def test_create_xmp_content_uses_real_newlines(self):
+    def test_create_xmp_content_uses_real_newlines(self, jpg_path):
         """Generated XMP must use real newlines, not literal backslash-n.
 
         Regression: the template previously emitted literal '\\n' text into new
         sidecars, producing malformed output and unseparated keywords.
         """
-        temp_file = tempfile.NamedTemporaryFile(suffix='.jpg', delete=False)
-        temp_file.close()
-
-        try:
-            processor = ImageProcessor(temp_file.name)
-            content = processor._create_xmp_content(
-                ['Reef A', 'Reef B'], latitude=20.5, longitude=-86.95
-            )
-
-            assert '\\n' not in content
-            # multiple keywords are separated onto their own lines
-            assert '<rdf:li>Reef A</rdf:li>\n' in content
-        finally:
-            os.unlink(temp_file.name)
-
-    def test_find_images(self):
+        processor = ImageProcessor(jpg_path)
+        content = processor._create_xmp_content(
+            ['Reef A', 'Reef B'], latitude=20.5, longitude=-86.95
+        )
+
+        assert '\\n' not in content
+        # multiple keywords are separated onto their own lines
+        assert '<rdf:li>Reef A</rdf:li>\n' in content
+
+    def test_create_xmp_content_escapes_keywords(self, jpg_path):
+        """Site names with XML special characters still produce valid XMP"""
+        processor = ImageProcessor(jpg_path)
+        content = processor._create_xmp_content(['Fish & Chips', '<Reef>'], capture_time=None)
+
+        root = etree.fromstring(content.encode('utf-8'))
+        rdf = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}'
+        assert [li.text for li in root.iter(f'{rdf}li')] == ['Fish & Chips', '<Reef>'] * 2
+
+    def test_find_images(self, sample_tree):
         """Test finding images in directory"""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Create test files
-            jpg_file = os.path.join(temp_dir, 'test.jpg')
-            cr3_file = os.path.join(temp_dir, 'test.cr3')
-            txt_file = os.path.join(temp_dir, 'test.txt')
-            
-            for file_path in [jpg_file, cr3_file, txt_file]:
-                with open(file_path, 'w') as f:
-                    f.write('test')
-            
-            images = ImageProcessor.find_images(temp_dir)
-            
-            assert len(images) == 2  # Only jpg and cr3
-            assert jpg_file in images
-            assert cr3_file in images
-            assert txt_file not in images
+        images = ImageProcessor.find_images(str(sample_tree))
+        
+        # Only jpg and cr3, at every level
+        assert set(images) == {str(sample_tree / name) for name in [
+            'test.jpg', 'test.cr3', 'subdir/sub.jpg',
+            'Output/output.jpg', 'Cache/cache.jpg', 'Normal/normal.jpg',
+        ]}
     
     def test_find_images_nonexistent_directory(self):
         """Test finding images in nonexistent directory"""
         with pytest.raises(FileNotFoundError, match="Directory not found"):
             ImageProcessor.find_images('/nonexistent/directory')
 
-    def test_find_images_with_folder_exclusion(self):
+    def test_find_images_with_folder_exclusion(self, sample_tree):
         """Test finding images with folder exclusion"""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Create test structure
-            jpg_file = os.path.join(temp_dir, 'test.jpg')
-            with open(jpg_file, 'w') as f:
-                f.write('test')
-
-            # Create Output subdirectory (to be excluded)
-            output_dir = os.path.join(temp_dir, 'Output')
-            os.makedirs(output_dir)
-            output_jpg = os.path.join(output_dir, 'output.jpg')
-            with open(output_jpg, 'w') as f:
-                f.write('test')
-
-            # Create Cache subdirectory (to be excluded)
-            cache_dir = os.path.join(temp_dir, 'Cache')
-            os.makedirs(cache_dir)
-            cache_jpg = os.path.join(cache_dir, 'cache.jpg')
-            with open(cache_jpg, 'w') as f:
-                f.write('test')
-
-            # Create Normal subdirectory (not excluded)
-            normal_dir = os.path.join(temp_dir, 'Normal')
-            os.makedirs(normal_dir)
-            normal_jpg = os.path.join(normal_dir, 'normal.jpg')
-            with open(normal_jpg, 'w') as f:
-                f.write('test')
-
-            # Find images with exclusion
-            images = ImageProcessor.find_images(
-                temp_dir,
-                recursive=True,
-                excluded_folders=['Output', 'Cache']
-            )
-
-            assert len(images) == 2  # test.jpg and Normal/normal.jpg
-            assert jpg_file in images
-            assert normal_jpg in images
-            assert output_jpg not in images
-            assert cache_jpg not in images
-
-    def test_find_images_recursive_vs_nonrecursive(self):
+        images = ImageProcessor.find_images(
+            str(sample_tree),
+            recursive=True,
+            excluded_folders=['Output', 'Cache']
+        )
+
+        assert set(images) == {str(sample_tree / name) for name in [
+            'test.jpg', 'test.cr3', 'subdir/sub.jpg', 'Normal/normal.jpg',
+        ]}
+
+    def test_find_images_recursive_vs_nonrecursive(self, sample_tree):
         """Test recursive vs non-recursive image finding"""
+        # Non-recursive should only find root images
+        images_nonrecursive = ImageProcessor.find_images(str(sample_tree), recursive=False)
+        assert set(images_nonrecursive) == {str(sample_tree / 'test.jpg'), str(sample_tree / 'test.cr3')}
+
+        # Recursive should also find subdirectory images
+        images_recursive = ImageProcessor.find_images(str(sample_tree), recursive=True)
+        assert str(sample_tree / 'subdir' / 'sub.jpg') in set(images_recursive)
+        assert set(images_nonrecursive) < set(images_recursive)
+
+    def test_find_images_nested_tree(self, touch_files):
+        """Every level of a nested tree is scanned, filtering entries by name"""
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Create test files
-            root_jpg = os.path.join(temp_dir, 'root.jpg')
-            with open(root_jpg, 'w') as f:
-                f.write('test')
-
-            # Create subdirectory
-            sub_dir = os.path.join(temp_dir, 'subdir')
-            os.makedirs(sub_dir)
-            sub_jpg = os.path.join(sub_dir, 'sub.jpg')
-            with open(sub_jpg, 'w') as f:
-                f.write('test')
-
-            # Non-recursive should only find root image
-            images_nonrecursive = ImageProcessor.find_images(temp_dir, recursive=False)
-            assert len(images_nonrecursive) == 1
-            assert root_jpg in images_nonrecursive
-            assert sub_jpg not in images_nonrecursive
-
-            # Recursive should find both
-            images_recursive = ImageProcessor.find_images(temp_dir, recursive=True)
-            assert len(images_recursive) == 2
-            assert root_jpg in images_recursive
-            assert sub_jpg in images_recursive
\ No newline at end of file
+            expected = []
+            current = temp_dir
+            for depth in range(4):
+                os.makedirs(os.path.join(current, f'sibling{depth}'))
+                touch_files(current, [f'photo{depth}.JPG', f'notes{depth}.txt', f'clip{depth}.mov'])
+                expected.append(os.path.join(current, f'photo{depth}.JPG'))
+                current = os.path.join(current, f'level{depth}')
+                os.makedirs(current)
+            
+            # A directory whose name has an image extension is not an image
+            os.makedirs(os.path.join(temp_dir, 'folder.jpg'))
+            
+            assert ImageProcessor.find_images(temp_dir) == sorted(expected)
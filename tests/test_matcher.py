@@ -1,129 +1,102 @@
 """Tests for matcher module"""
 
+import re
 from datetime import datetime
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
+
+import pytest
 
 from photo_tagger.matcher import DiveMatcher, InteractiveMatcher, Match
 from photo_tagger.subsurface_parser import Dive, DiveSite
 
 
+# Built once and shared: DiveMatcher sorts a copy and never modifies dives
+MORNING_SITE = DiveSite(uuid='site1', name='Morning Dive', latitude=21.0, longitude=-72.0)
+AFTERNOON_SITE = DiveSite(uuid='site2', name='Afternoon Dive', latitude=22.0, longitude=-73.0)
+
+TEST_DIVES = [
+    Dive(number=1, date=datetime(2024, 1, 15, 9, 0, 0), time=datetime(2024, 1, 15, 9, 0, 0),
+         duration_minutes=45, site=MORNING_SITE),
+    Dive(number=2, date=datetime(2024, 1, 15, 14, 0, 0), time=datetime(2024, 1, 15, 14, 0, 0),
+         duration_minutes=50, site=AFTERNOON_SITE),
+]
+
+# The second dive is closer to the first, so a photo between them is near both
+INTERACTIVE_DIVES = [
+    Dive(number=1, date=datetime(2024, 1, 15, 9, 0, 0), time=datetime(2024, 1, 15, 9, 0, 0),
+         duration_minutes=45, site=DiveSite(uuid='site1', name='Site One', latitude=21.0, longitude=-72.0)),
+    Dive(number=2, date=datetime(2024, 1, 15, 11, 30, 0), time=datetime(2024, 1, 15, 11, 30, 0),
+         duration_minutes=50, site=DiveSite(uuid='site2', name='Site Two', latitude=22.0, longitude=-73.0)),
+]
+
+# A photo at 9:20 is within the first dive (9:00-9:45) and near the second
+# (10:30-11:00, 1h10m later)
+WITHIN_AND_NEAR_DIVES = [
+    Dive(number=1, date=datetime(2024, 1, 15, 9, 0, 0), time=datetime(2024, 1, 15, 9, 0, 0),
+         duration_minutes=45,
+         site=DiveSite(uuid='site1', name='Within Dive Site', latitude=21.0, longitude=-72.0)),
+    Dive(number=2, date=datetime(2024, 1, 15, 10, 30, 0), time=datetime(2024, 1, 15, 10, 30, 0),
+         duration_minutes=30,
+         site=DiveSite(uuid='site2', name='Near Dive Site', latitude=22.0, longitude=-73.0)),
+]
+
+
+# Capture times shared across tests; each set of dives starts at 9:00 on 2024-01-15
+TIMES = {
+    'days_before': datetime(2024, 1, 10, 12, 0, 0),
+    'before_dive1': datetime(2024, 1, 15, 8, 0, 0),  # 1 hour before the first dive
+    'in_dive1': datetime(2024, 1, 15, 9, 20, 0),  # 20 min into the first dive
+    'between_dives': datetime(2024, 1, 15, 10, 15, 0),
+    'after_dive1': datetime(2024, 1, 15, 11, 0, 0),
+}
+
+
+FIXED_MATCH = Match(
+    image_path='test_image.jpg',
+    dive=TEST_DIVES[0],
+    photo_time=TIMES['in_dive1'],
+    confidence='within_dive'
+)
+
+# The fields format_match_info must show for FIXED_MATCH, in display order
+FORMATTED_MATCH_INFO = re.compile(
+    r"test_image\.jpg.*2024-01-15 09:20:00.*Morning Dive.*within_dive.*21\.0, -72\.0", re.DOTALL
+)
+
+
+@pytest.fixture(scope='class')
+def mock_create_processor():
+    """One patched MediaProcessor.create_processor shared by a test class;
+    each test sets the processor it returns"""
+    with patch('photo_tagger.matcher.MediaProcessor.create_processor') as mock:
+        yield mock
+
+
 class TestDiveMatcher:
     
-    def create_test_dives(self):
-        """Create test dives for matching"""
-        site1 = DiveSite(uuid='site1', name='Morning Dive', latitude=21.0, longitude=-72.0)
-        site2 = DiveSite(uuid='site2', name='Afternoon Dive', latitude=22.0, longitude=-73.0)
-        
-        dive1 = Dive(
-            number=1,
-            date=datetime(2024, 1, 15, 9, 0, 0),
-            time=datetime(2024, 1, 15, 9, 0, 0),
-            duration_minutes=45,
-            site=site1
-        )
-        
-        dive2 = Dive(
-            number=2,
-            date=datetime(2024, 1, 15, 14, 0, 0),
-            time=datetime(2024, 1, 15, 14, 0, 0),
-            duration_minutes=50,
-            site=site2
-        )
-        
-        return [dive1, dive2]
-    
-    @patch('photo_tagger.matcher.MediaProcessor.create_processor')
-    def test_find_matches_within_dive(self, mock_create_processor):
-        """Test finding matches for photos taken during dive"""
-        # Mock media processor
-        mock_processor = MagicMock()
-        mock_processor.get_capture_time.return_value = datetime(2024, 1, 15, 9, 20, 0)  # 20 min into first dive
-        mock_create_processor.return_value = mock_processor
-        
-        dives = self.create_test_dives()
-        matcher = DiveMatcher(dives)
-        
-        matches = matcher.find_matches('test_image.jpg')
-        
-        assert len(matches) == 1
-        assert matches[0].confidence == 'within_dive'
-        assert matches[0].dive.number == 1
-        assert matches[0].dive.site.name == 'Morning Dive'
-    
-    @patch('photo_tagger.matcher.MediaProcessor.create_processor')
-    def test_find_matches_near_dive(self, mock_create_processor):
-        """Test finding matches for photos taken near dive time"""
-        # Mock image processor - photo taken 1 hour before dive
-        mock_processor = MagicMock()
-        mock_processor.get_capture_time.return_value = datetime(2024, 1, 15, 8, 0, 0)  # 1 hour before first dive
-        mock_create_processor.return_value = mock_processor
-        
-        dives = self.create_test_dives()
-        matcher = DiveMatcher(dives)
-        
-        matches = matcher.find_matches('test_image.jpg')
-        
-        assert len(matches) == 1
-        assert matches[0].confidence == 'near_dive'
-        assert matches[0].dive.number == 1
-    
-    @patch('photo_tagger.matcher.MediaProcessor.create_processor')
-    def test_find_matches_no_match(self, mock_create_processor):
-        """Test no matches for photos taken far from dive times"""
-        # Mock image processor - photo taken days before dive
-        mock_processor = MagicMock()
-        mock_processor.get_capture_time.return_value = datetime(2024, 1, 10, 12, 0, 0)  # Days before
-        mock_create_processor.return_value = mock_processor
-        
-        dives = self.create_test_dives()
-        matcher = DiveMatcher(dives)
-        
-        matches = matcher.find_matches('test_image.jpg')
-        
-        assert len(matches) == 0
-    
-    @patch('photo_tagger.matcher.MediaProcessor.create_processor')
-    def test_find_matches_no_capture_time(self, mock_create_processor):
-        """Test handling photos without capture time"""
-        # Mock image processor - no capture time available
-        mock_processor = MagicMock()
-        mock_processor.get_capture_time.return_value = None
-        mock_create_processor.return_value = mock_processor
-        
-        dives = self.create_test_dives()
-        matcher = DiveMatcher(dives)
+    @pytest.mark.parametrize('capture_time,expected', [
+        (TIMES['in_dive1'], [(1, 'within_dive')]),
+        (TIMES['before_dive1'], [(1, 'near_dive')]),
+        (TIMES['days_before'], []),
+        (None, []),  # no capture time available
+        # 2h after the first dive, 3h before the second: only the first is near
+        (TIMES['after_dive1'], [(1, 'near_dive')]),
+    ])
+    def test_find_matches(self, mock_create_processor, fake_processor, capture_time, expected):
+        """Photos match the dives they were taken during or near, by confidence"""
+        mock_create_processor.return_value = fake_processor(capture_time)
+        
+        matcher = DiveMatcher(TEST_DIVES)
         
         matches = matcher.find_matches('test_image.jpg')
         
-        assert len(matches) == 0
+        assert [(m.dive.number, m.confidence) for m in matches] == expected
     
-    @patch('photo_tagger.matcher.MediaProcessor.create_processor')
-    def test_find_matches_multiple_matches(self, mock_create_processor):
-        """Test multiple potential matches sorted by confidence"""
-        # Mock image processor - photo taken between two dives (closer to both)
-        mock_processor = MagicMock()
-        mock_processor.get_capture_time.return_value = datetime(2024, 1, 15, 11, 0, 0)  # Between dives, 2h from first, 3h from second
-        mock_create_processor.return_value = mock_processor
-        
-        dives = self.create_test_dives()
-        matcher = DiveMatcher(dives)
-        
-        matches = matcher.find_matches('test_image.jpg')
-        
-        # Should find only one match (within 2h window of first dive only)
-        assert len(matches) == 1
-        assert matches[0].confidence == 'near_dive'
-        # Only the first dive (9:00) is within 2 hours of 11:00
-        assert matches[0].dive.number == 1
-    
-    @patch('photo_tagger.matcher.MediaProcessor.create_processor')
-    def test_get_best_match(self, mock_create_processor):
+    def test_get_best_match(self, mock_create_processor, fake_processor):
         """Test getting the single best match"""
-        mock_processor = MagicMock()
-        mock_processor.get_capture_time.return_value = datetime(2024, 1, 15, 9, 20, 0)
-        mock_create_processor.return_value = mock_processor
+        mock_create_processor.return_value = fake_processor(TIMES['in_dive1'])
         
-        dives = self.create_test_dives()
+        dives = TEST_DIVES
         matcher = DiveMatcher(dives)
         
         best_match = matcher.get_best_match('test_image.jpg')
@@ -132,59 +105,47 @@ class TestDiveMatcher:
         assert best_match.confidence == 'within_dive'
         assert best_match.dive.number == 1
     
+    def test_find_matches_long_dive_beyond_near_window(self, mock_create_processor, fake_processor):
+        """A photo late in a dive longer than the 2 hour near window still
+        matches it, with only nearby dives considered"""
+        mock_create_processor.return_value = fake_processor(datetime(2024, 1, 15, 11, 30, 0))  # 2.5h into dive 3
+
+        site = DiveSite(uuid='site3', name='Cave Dive', latitude=20.0, longitude=-87.0)
+        long_dive = Dive(
+            number=3,
+            date=datetime(2024, 1, 15, 9, 0, 0),
+            time=datetime(2024, 1, 15, 9, 0, 0),
+            duration_minutes=180,
+            site=site
+        )
+        # Plenty of dives on other days that must not match
+        other_dives = [
+            Dive(number=100 + day, date=datetime(2024, 2, day, 9, 0, 0),
+                 time=datetime(2024, 2, day, 9, 0, 0), duration_minutes=45, site=site)
+            for day in range(1, 28)
+        ]
+
+        matcher = DiveMatcher(other_dives + [long_dive])
+        matches = matcher.find_matches('test_image.jpg')
+
+        assert len(matches) == 1
+        assert matches[0].dive.number == 3
+        assert matches[0].confidence == 'within_dive'
+
     def test_format_match_info(self):
         """Test formatting match information for display"""
-        dives = self.create_test_dives()
-        match = Match(
-            image_path='test_image.jpg',
-            dive=dives[0],
-            photo_time=datetime(2024, 1, 15, 9, 20, 0),
-            confidence='within_dive'
-        )
-        
-        matcher = DiveMatcher(dives)
-        info = matcher.format_match_info(match)
+        info = DiveMatcher(TEST_DIVES).format_match_info(FIXED_MATCH)
         
-        assert 'test_image.jpg' in info
-        assert '2024-01-15 09:20:00' in info
-        assert 'Morning Dive' in info
-        assert 'within_dive' in info
-        assert '21.0, -72.0' in info
+        assert FORMATTED_MATCH_INFO.search(info)
 
 
 class TestInteractiveMatcher:
     
-    def create_test_dives(self):
-        """Create test dives for matching"""
-        site1 = DiveSite(uuid='site1', name='Site One', latitude=21.0, longitude=-72.0)
-        site2 = DiveSite(uuid='site2', name='Site Two', latitude=22.0, longitude=-73.0)
-        
-        dive1 = Dive(
-            number=1,
-            date=datetime(2024, 1, 15, 9, 0, 0),
-            time=datetime(2024, 1, 15, 9, 0, 0),
-            duration_minutes=45,
-            site=site1
-        )
-        
-        dive2 = Dive(
-            number=2,
-            date=datetime(2024, 1, 15, 11, 30, 0),  # Closer to first dive for multi-match scenarios
-            time=datetime(2024, 1, 15, 11, 30, 0),
-            duration_minutes=50,
-            site=site2
-        )
-        
-        return [dive1, dive2]
-    
-    @patch('photo_tagger.matcher.MediaProcessor.create_processor')
-    def test_single_match_no_prompt(self, mock_create_processor):
+    def test_single_match_no_prompt(self, mock_create_processor, fake_processor):
         """Test that single matches don't prompt user"""
-        mock_processor = MagicMock()
-        mock_processor.get_capture_time.return_value = datetime(2024, 1, 15, 9, 20, 0)  # Only matches first dive
-        mock_create_processor.return_value = mock_processor
+        mock_create_processor.return_value = fake_processor(TIMES['in_dive1'])  # Only matches first dive
         
-        dives = self.create_test_dives()
+        dives = INTERACTIVE_DIVES
         matcher = InteractiveMatcher(dives)
         
         match = matcher.get_user_confirmed_match('test_image.jpg')
@@ -192,81 +153,28 @@ class TestInteractiveMatcher:
         assert match is not None
         assert match.dive.number == 1
     
-    @patch('photo_tagger.matcher.MediaProcessor.create_processor')
-    @patch('builtins.input', return_value='1')
-    def test_multiple_matches_user_selection(self, mock_input, mock_create_processor):
-        """Test user selection when multiple matches exist"""
-        mock_processor = MagicMock()
-        mock_processor.get_capture_time.return_value = datetime(2024, 1, 15, 10, 15, 0)  # Between dives, within 2h of both
-        mock_create_processor.return_value = mock_processor
-        
-        dives = self.create_test_dives()
-        matcher = InteractiveMatcher(dives)
-        
-        match = matcher.get_user_confirmed_match('test_image.jpg')
-        
-        assert match is not None
-        assert match.dive.number == 1  # User selected option 1, which is dive 1 (first in sorted order)
-    
-    @patch('photo_tagger.matcher.MediaProcessor.create_processor')
-    @patch('builtins.input', return_value='0')
-    def test_multiple_matches_user_skip(self, mock_input, mock_create_processor):
-        """Test user choosing to skip when multiple matches exist"""
-        mock_processor = MagicMock()
-        mock_processor.get_capture_time.return_value = datetime(2024, 1, 15, 10, 15, 0)  # Between both dives, within 2h of both
-        mock_create_processor.return_value = mock_processor
-        
-        dives = self.create_test_dives()
-        matcher = InteractiveMatcher(dives)
+    @pytest.mark.parametrize('inputs,expected', [
+        (['1'], 1),  # option 1 is dive 1, first in sorted order
+        (['0'], None),  # skip
+        (['invalid', '2'], 2),  # invalid input is asked again
+    ])
+    def test_multiple_matches_user_selection(self, mock_create_processor, fake_processor, monkeypatch, inputs, expected):
+        """The user picks between matches, or skips, when several exist"""
+        mock_create_processor.return_value = fake_processor(TIMES['between_dives'])  # Within 2h of both dives
+        answers = iter(inputs)
+        monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+        
+        matcher = InteractiveMatcher(INTERACTIVE_DIVES)
         
         match = matcher.get_user_confirmed_match('test_image.jpg')
         
-        assert match is None
+        assert (match.dive.number if match else None) == expected
     
-    @patch('photo_tagger.matcher.MediaProcessor.create_processor')
-    @patch('builtins.input', side_effect=['invalid', '2'])
-    def test_multiple_matches_invalid_then_valid_input(self, mock_input, mock_create_processor):
-        """Test handling of invalid input followed by valid selection"""
-        mock_processor = MagicMock()
-        mock_processor.get_capture_time.return_value = datetime(2024, 1, 15, 10, 15, 0)  # Between both dives, within 2h of both
-        mock_create_processor.return_value = mock_processor
-        
-        dives = self.create_test_dives()
-        matcher = InteractiveMatcher(dives)
-        
-        match = matcher.get_user_confirmed_match('test_image.jpg')
-        
-        assert match is not None
-        assert match.dive.number == 2  # User selected option 2 (dive 2 is second in sorted order)
-    
-    @patch('photo_tagger.matcher.MediaProcessor.create_processor')
-    def test_within_dive_prioritized_over_near_dive(self, mock_create_processor):
+    def test_within_dive_prioritized_over_near_dive(self, mock_create_processor, fake_processor):
         """Test that within_dive matches are prioritized over near_dive without prompting"""
-        mock_processor = MagicMock()
-        mock_processor.get_capture_time.return_value = datetime(2024, 1, 15, 9, 20, 0)  # During first dive
-        mock_create_processor.return_value = mock_processor
-        
-        # Create dives where photo is within first dive but near second dive
-        site1 = DiveSite(uuid='site1', name='Within Dive Site', latitude=21.0, longitude=-72.0)
-        site2 = DiveSite(uuid='site2', name='Near Dive Site', latitude=22.0, longitude=-73.0)
-        
-        dive1 = Dive(
-            number=1,
-            date=datetime(2024, 1, 15, 9, 0, 0),
-            time=datetime(2024, 1, 15, 9, 0, 0),
-            duration_minutes=45,  # 9:00-9:45, photo at 9:20 is within
-            site=site1
-        )
-        
-        dive2 = Dive(
-            number=2,
-            date=datetime(2024, 1, 15, 10, 30, 0),
-            time=datetime(2024, 1, 15, 10, 30, 0),
-            duration_minutes=30,  # 10:30-11:00, photo at 9:20 is near (1h10m before)
-            site=site2
-        )
+        mock_create_processor.return_value = fake_processor(TIMES['in_dive1'])  # During first dive
         
-        dives = [dive1, dive2]
+        dives = WITHIN_AND_NEAR_DIVES
         matcher = InteractiveMatcher(dives)
         
         # This should return the within_dive match without prompting
@@ -1,5 +1,7 @@
 """Tests for media_processor module"""
 
+from unittest.mock import patch
+
 import pytest
 
 from photo_tagger.media_processor import MediaProcessor
@@ -7,50 +9,48 @@ from photo_tagger.image_processor import ImageProcessor
 from photo_tagger.video_processor import VideoProcessor
 
 
+@pytest.fixture(scope='module')
+def media_tree(tmp_path_factory, touch_files):
+    """A small directory tree, built once and only read by the discovery tests"""
+    root = tmp_path_factory.mktemp('media')
+    touch_files(str(root), ['image1.jpg', 'image2.CR3', 'video1.mp4', 'video2.mov', 'readme.txt',
+                            'subdir/image3.jpg', 'subdir/video3.mp4',
+                            'Output/image4.jpg', 'Output/video4.mp4', 'Cache/image5.jpg'])
+    return root
+
+
 class TestMediaProcessor:
 
-    def test_create_processor_for_image(self, tmp_path):
+    @patch.object(ImageProcessor, '__init__', return_value=None)
+    def test_create_processor_for_image(self, mock_init):
         """Test creating processor for image file"""
-        # Create a temporary image file
-        image_file = tmp_path / "test.jpg"
-        image_file.write_bytes(b"fake jpeg content")
+        # Dispatch is by extension alone, so no file is needed
+        processor = MediaProcessor.create_processor('/photos/test.jpg')
 
-        processor = MediaProcessor.create_processor(str(image_file))
         assert isinstance(processor, ImageProcessor)
+        mock_init.assert_called_once_with('/photos/test.jpg', exiftool_session=None)
 
-    def test_create_processor_for_video(self, tmp_path):
+    @patch.object(VideoProcessor, '__init__', return_value=None)
+    def test_create_processor_for_video(self, mock_init):
         """Test creating processor for video file"""
-        # Create a temporary video file
-        video_file = tmp_path / "test.mp4"
-        video_file.write_bytes(b"fake mp4 content")
+        session = object()
+        processor = MediaProcessor.create_processor('/photos/test.MP4', exiftool_session=session)
 
-        processor = MediaProcessor.create_processor(str(video_file))
         assert isinstance(processor, VideoProcessor)
+        mock_init.assert_called_once_with('/photos/test.MP4', exiftool_session=session)
 
-    def test_create_processor_unsupported_format(self, tmp_path):
+    def test_create_processor_unsupported_format(self):
         """Test creating processor for unsupported format"""
-        # Create a temporary unsupported file
-        unsupported_file = tmp_path / "test.txt"
-        unsupported_file.write_text("not a media file")
-
         with pytest.raises(ValueError, match="Unsupported file format"):
-            MediaProcessor.create_processor(str(unsupported_file))
+            MediaProcessor.create_processor('/photos/test.txt')
 
     def test_get_supported_extensions(self):
         """Test getting all supported extensions"""
         extensions = MediaProcessor.get_supported_extensions()
 
-        # Check for image formats
-        assert '.jpg' in extensions
-        assert '.jpeg' in extensions
-        assert '.cr3' in extensions
-        assert '.cr2' in extensions
-        assert '.arw' in extensions
-
-        # Check for video formats
-        assert '.mp4' in extensions
-        assert '.mov' in extensions
-        assert '.avi' in extensions
+        assert isinstance(extensions, frozenset)
+        # Image and video formats
+        assert {'.jpg', '.jpeg', '.cr3', '.cr2', '.arw', '.mp4', '.mov', '.avi'} <= extensions
 
     def test_is_supported_file(self, tmp_path):
         """Test checking if file is supported"""
@@ -69,65 +69,61 @@ class TestMediaProcessor:
         txt_file.write_text("fake")
         assert MediaProcessor.is_supported_file(str(txt_file)) is False
 
-    def test_find_media_files(self, tmp_path):
+    def test_dotfile_named_like_extension_is_not_media(self, tmp_path):
+        """A file named just '.jpg' has no extension, for the scanner and processors alike"""
+        for name in ['.jpg', 'photo.jpg', '.hidden.mp4']:
+            (tmp_path / name).write_bytes(b"fake")
+
+        assert MediaProcessor.find_media_files(str(tmp_path)) == sorted([
+            str(tmp_path / 'photo.jpg'), str(tmp_path / '.hidden.mp4'),
+        ])
+        assert MediaProcessor.is_supported_file(str(tmp_path / '.jpg')) is False
+        with pytest.raises(ValueError, match="Unsupported"):
+            MediaProcessor.create_processor(str(tmp_path / '.jpg'))
+        with pytest.raises(ValueError, match="Unsupported image format"):
+            ImageProcessor(str(tmp_path / '.jpg'))
+
+    def test_find_media_files(self, media_tree):
         """Test finding all media files in directory"""
-        # Create test structure
-        (tmp_path / "image1.jpg").write_bytes(b"fake")
-        (tmp_path / "image2.CR3").write_bytes(b"fake")
-        (tmp_path / "video1.mp4").write_bytes(b"fake")
-        (tmp_path / "video2.mov").write_bytes(b"fake")
-        (tmp_path / "readme.txt").write_text("not a media file")
-
-        # Create subdirectory
-        subdir = tmp_path / "subdir"
-        subdir.mkdir()
-        (subdir / "image3.jpg").write_bytes(b"fake")
-        (subdir / "video3.mp4").write_bytes(b"fake")
+        top_level = {str(media_tree / name) for name in [
+            'image1.jpg', 'image2.CR3', 'video1.mp4', 'video2.mov',
+        ]}
+        nested = {str(media_tree / name) for name in [
+            'subdir/image3.jpg', 'subdir/video3.mp4',
+            'Output/image4.jpg', 'Output/video4.mp4', 'Cache/image5.jpg',
+        ]}
 
         # Test non-recursive
-        media_files = MediaProcessor.find_media_files(str(tmp_path), recursive=False)
-        assert len(media_files) == 4  # Only top-level media files
-        assert any("image1.jpg" in f for f in media_files)
-        assert any("video1.mp4" in f for f in media_files)
-        assert not any("image3.jpg" in f for f in media_files)
+        media_files = MediaProcessor.find_media_files(str(media_tree), recursive=False)
+        assert set(media_files) == top_level
 
         # Test recursive
-        media_files = MediaProcessor.find_media_files(str(tmp_path), recursive=True)
-        assert len(media_files) == 6  # All media files including subdirectory
-        assert any("image3.jpg" in f for f in media_files)
-        assert any("video3.mp4" in f for f in media_files)
+        media_files = MediaProcessor.find_media_files(str(media_tree), recursive=True)
+        assert set(media_files) == top_level | nested
 
-    def test_find_media_files_with_exclusion(self, tmp_path):
+    def test_find_media_files_with_exclusion(self, media_tree):
         """Test finding media files with folder exclusion"""
-        # Create test structure
-        (tmp_path / "image1.jpg").write_bytes(b"fake")
-
-        # Create excluded directory
-        output_dir = tmp_path / "Output"
-        output_dir.mkdir()
-        (output_dir / "image2.jpg").write_bytes(b"fake")
-        (output_dir / "video1.mp4").write_bytes(b"fake")
-
-        # Create cache directory
-        cache_dir = tmp_path / "Cache"
-        cache_dir.mkdir()
-        (cache_dir / "image3.jpg").write_bytes(b"fake")
-
-        # Create normal subdirectory
-        normal_dir = tmp_path / "Normal"
-        normal_dir.mkdir()
-        (normal_dir / "image4.jpg").write_bytes(b"fake")
-
-        # Test with exclusion
         media_files = MediaProcessor.find_media_files(
-            str(tmp_path),
+            str(media_tree),
             recursive=True,
             excluded_folders=['Output', 'Cache']
         )
 
-        assert len(media_files) == 2  # Only image1.jpg and Normal/image4.jpg
-        assert any("image1.jpg" in f for f in media_files)
-        assert any("image4.jpg" in f for f in media_files)
-        assert not any("image2.jpg" in f for f in media_files)
-        assert not any("image3.jpg" in f for f in media_files)
-        assert not any("video1.mp4" in f for f in media_files)
+        assert set(media_files) == {str(media_tree / name) for name in [
+            'image1.jpg', 'image2.CR3', 'video1.mp4', 'video2.mov',
+            'subdir/image3.jpg', 'subdir/video3.mp4',
+        ]}
+
+    def test_find_media_files_nonexistent_directory(self):
+        """Test finding media files in nonexistent directory"""
+        with pytest.raises(FileNotFoundError, match="Directory not found"):
+            MediaProcessor.find_media_files('/nonexistent/directory')
+
+    def test_find_media_files_unreadable_directory(self, tmp_path):
+        """A path that can't be listed gives no files, as os.walk did"""
+        not_a_dir = tmp_path / 'image.jpg'
+        not_a_dir.write_bytes(b'fake')
+        assert MediaProcessor.find_media_files(str(not_a_dir)) == []
+
+        with patch('photo_tagger.file_scan.os.scandir', side_effect=PermissionError):
+            assert MediaProcessor.find_media_files(str(tmp_path), recursive=True) == []
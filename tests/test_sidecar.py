@@ -0,0 +1,40 @@
+"""Tests for sidecar module"""
+
+import os
+
+from photo_tagger.sidecar import write_if_changed
+
+
+class TestWriteIfChanged:
+
+    def test_writes_new_file(self, tmp_path):
+        """A missing sidecar is written"""
+        xmp_file = tmp_path / "photo.xmp"
+
+        assert write_if_changed(str(xmp_file), b'<x:xmpmeta/>') is True
+        assert xmp_file.read_bytes() == b'<x:xmpmeta/>'
+
+    def test_skips_identical_content(self, tmp_path):
+        """Identical bytes leave the file, and its mtime, untouched"""
+        xmp_file = tmp_path / "photo.xmp"
+        xmp_file.write_bytes(b'<x:xmpmeta/>')
+        os.utime(xmp_file, ns=(1_000_000_000, 1_000_000_000))
+
+        assert write_if_changed(str(xmp_file), b'<x:xmpmeta/>') is False
+        assert os.stat(xmp_file).st_mtime_ns == 1_000_000_000
+
+    def test_rewrites_changed_content_of_same_size(self, tmp_path):
+        """Content that differs but has the same length is still written"""
+        xmp_file = tmp_path / "photo.xmp"
+        xmp_file.write_bytes(b'<a/>')
+
+        assert write_if_changed(str(xmp_file), b'<b/>') is True
+        assert xmp_file.read_bytes() == b'<b/>'
+
+    def test_rewrite_truncates_longer_file(self, tmp_path):
+        """Shorter content replaces a longer file without leftover bytes"""
+        xmp_file = tmp_path / "photo.xmp"
+        xmp_file.write_bytes(b'<x:xmpmeta>old keywords</x:xmpmeta>')
+
+        assert write_if_changed(str(xmp_file), b'<x:xmpmeta/>') is True
+        assert xmp_file.read_bytes() == b'<x:xmpmeta/>'
@@ -1,23 +1,20 @@
 """Tests for subsurface_parser module"""
 
 import pytest
-import tempfile
 import os
+import pickle
+import sys
 from datetime import datetime
+from unittest.mock import patch
 
-from photo_tagger.subsurface_parser import SubsurfaceParser
+from lxml import etree
+
+from photo_tagger.subsurface_parser import Dive, DiveSite, SubsurfaceParser
 
 
 class TestSubsurfaceParser:
     
-    def create_test_ssrf_file(self, content):
-        """Helper to create temporary SSRF file"""
-        temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.ssrf', delete=False)
-        temp_file.write(content)
-        temp_file.close()
-        return temp_file.name
-    
-    def test_parse_simple_dive(self):
+    def test_parse_simple_dive(self, ssrf_file):
         """Test parsing a simple dive with site"""
         content = '''<?xml version="1.0"?>
 <divelog program='subsurface' version='3'>
@@ -29,23 +26,20 @@ class TestSubsurfaceParser:
 </dive>
 </divelog>'''
         
-        file_path = self.create_test_ssrf_file(content)
-        try:
-            parser = SubsurfaceParser(file_path)
-            dives = parser.parse()
-            
-            assert len(dives) == 1
-            dive = dives[0]
-            assert dive.number == 1
-            assert dive.date == datetime(2024, 1, 15, 10, 30, 0)
-            assert dive.duration_minutes == 45
-            assert dive.site.name == 'Test Site'
-            assert dive.site.latitude == pytest.approx(21.676950)
-            assert dive.site.longitude == pytest.approx(-72.469670)
-        finally:
-            os.unlink(file_path)
+        file_path = ssrf_file(content)
+        parser = SubsurfaceParser(file_path)
+        dives = parser.parse()
+        
+        assert len(dives) == 1
+        dive = dives[0]
+        assert dive.number == 1
+        assert dive.date == datetime(2024, 1, 15, 10, 30, 0)
+        assert dive.duration_minutes == 45
+        assert dive.site.name == 'Test Site'
+        assert dive.site.latitude == pytest.approx(21.676950)
+        assert dive.site.longitude == pytest.approx(-72.469670)
     
-    def test_parse_multiple_dives(self):
+    def test_parse_multiple_dives(self, ssrf_file):
         """Test parsing multiple dives"""
         content = '''<?xml version="1.0"?>
 <divelog program='subsurface' version='3'>
@@ -61,19 +55,16 @@ class TestSubsurfaceParser:
 </dive>
 </divelog>'''
         
-        file_path = self.create_test_ssrf_file(content)
-        try:
-            parser = SubsurfaceParser(file_path)
-            dives = parser.parse()
-            
-            assert len(dives) == 2
-            assert dives[0].site.name == 'First Site'
-            assert dives[1].site.name == 'Second Site'
-            assert dives[1].date == datetime(2024, 1, 16, 14, 15, 0)
-        finally:
-            os.unlink(file_path)
+        file_path = ssrf_file(content)
+        parser = SubsurfaceParser(file_path)
+        dives = parser.parse()
+        
+        assert len(dives) == 2
+        assert dives[0].site.name == 'First Site'
+        assert dives[1].site.name == 'Second Site'
+        assert dives[1].date == datetime(2024, 1, 16, 14, 15, 0)
     
-    def test_parse_dive_without_gps(self):
+    def test_parse_dive_without_gps(self, ssrf_file):
         """Test parsing dive site without GPS coordinates"""
         content = '''<?xml version="1.0"?>
 <divelog program='subsurface' version='3'>
@@ -85,20 +76,17 @@ class TestSubsurfaceParser:
 </dive>
 </divelog>'''
         
-        file_path = self.create_test_ssrf_file(content)
-        try:
-            parser = SubsurfaceParser(file_path)
-            dives = parser.parse()
-            
-            assert len(dives) == 1
-            dive = dives[0]
-            assert dive.site.name == 'No GPS Site'
-            assert dive.site.latitude is None
-            assert dive.site.longitude is None
-        finally:
-            os.unlink(file_path)
+        file_path = ssrf_file(content)
+        parser = SubsurfaceParser(file_path)
+        dives = parser.parse()
+        
+        assert len(dives) == 1
+        dive = dives[0]
+        assert dive.site.name == 'No GPS Site'
+        assert dive.site.latitude is None
+        assert dive.site.longitude is None
     
-    def test_parse_invalid_gps(self):
+    def test_parse_invalid_gps(self, ssrf_file):
         """Test parsing with invalid GPS format"""
         content = '''<?xml version="1.0"?>
 <divelog program='subsurface' version='3'>
@@ -110,19 +98,16 @@ class TestSubsurfaceParser:
 </dive>
 </divelog>'''
         
-        file_path = self.create_test_ssrf_file(content)
-        try:
-            parser = SubsurfaceParser(file_path)
-            dives = parser.parse()
-            
-            assert len(dives) == 1
-            dive = dives[0]
-            assert dive.site.latitude is None
-            assert dive.site.longitude is None
-        finally:
-            os.unlink(file_path)
+        file_path = ssrf_file(content)
+        parser = SubsurfaceParser(file_path)
+        dives = parser.parse()
+        
+        assert len(dives) == 1
+        dive = dives[0]
+        assert dive.site.latitude is None
+        assert dive.site.longitude is None
     
-    def test_parse_duration_formats(self):
+    def test_parse_duration_formats(self, ssrf_file):
         """Test parsing different duration formats"""
         content = '''<?xml version="1.0"?>
 <divelog program='subsurface' version='3'>
@@ -136,16 +121,80 @@ class TestSubsurfaceParser:
 </dive>
 </divelog>'''
         
-        file_path = self.create_test_ssrf_file(content)
-        try:
-            parser = SubsurfaceParser(file_path)
-            dives = parser.parse()
-            
-            assert len(dives) == 2
-            assert dives[0].duration_minutes == 45  # 45:30 -> 45 minutes
-            assert dives[1].duration_minutes == 75  # 1:15:45 -> 75 minutes
-        finally:
-            os.unlink(file_path)
+        file_path = ssrf_file(content)
+        parser = SubsurfaceParser(file_path)
+        dives = parser.parse()
+        
+        assert len(dives) == 2
+        assert dives[0].duration_minutes == 45  # 45:30 -> 45 minutes
+        assert dives[1].duration_minutes == 75  # 1:15:45 -> 75 minutes
+
+    @pytest.mark.parametrize('gps,expected', [
+        ('21.676950 -72.469670', (21.676950, -72.469670)),
+        (' -20 86.5 ', (-20.0, 86.5)),
+        ('0 0', (0.0, 0.0)),
+        ('invalid coords', (None, None)),
+        ('21.5', (None, None)),
+        ('21.5 -72.4 10', (None, None)),
+        ('', (None, None)),
+    ])
+    def test_parse_site_gps(self, gps, expected):
+        """Site coordinates are read from "latitude longitude", else left unset"""
+        parser = SubsurfaceParser('unused.ssrf')
+        site = parser._parse_site(etree.Element('site', uuid='site1', name='Site', gps=gps))
+        assert (site.latitude, site.longitude) == expected
+
+    @pytest.mark.parametrize('duration_str,expected', [
+        ('45:30 min', 45),
+        ('45:30', 45),
+        ('1:15:45', 75),
+        ('52', 52),
+        ('52 min', 52),
+        ('1:15:45 min', 75),
+        ('0:00', 0),
+        ('', 0),
+        ('bad min', 0),
+    ])
+    def test_parse_duration(self, duration_str, expected):
+        """Durations parse with and without Subsurface's " min" suffix"""
+        parser = SubsurfaceParser('unused.ssrf')
+        assert parser._parse_duration(duration_str) == expected
+
+    def test_parse_skips_malformed_dives(self, ssrf_file):
+        """Dives with a bad number or date are skipped; the rest still parse"""
+        content = '''<?xml version="1.0"?>
+<divelog program='subsurface' version='3'>
+<dive number='x1' date='2024-01-15' time='10:30:00' duration='45:00'>
+</dive>
+<dive number='2' date='not a date' time='10:30:00' duration='45:00'>
+</dive>
+<dive number='3' date='2024-01-17' time='10:30:00' duration='bad'>
+</dive>
+<dive date='2024-01-18' time='10:30:00'>
+</dive>
+</divelog>'''
+
+        file_path = ssrf_file(content)
+        dives = SubsurfaceParser(file_path).parse()
+
+        assert [dive.number for dive in dives] == [3, 0]
+        assert dives[0].duration_minutes == 0
+
+    @pytest.mark.parametrize('date_str,time_str,expected', [
+        ('2024-01-15', '10:30:45', datetime(2024, 1, 15, 10, 30, 45)),
+        ('2024-01-15', '10:30', datetime(2024, 1, 15, 10, 30)),
+        ('2024-01-15', '9:05:00', datetime(2024, 1, 15, 9, 5)),
+        ('2024-01-15', '10', datetime(2024, 1, 15, 10)),
+        ('2024-01-15', '', datetime(2024, 1, 15)),
+        ('2024-01-15', '25:00:00', datetime(2024, 1, 15)),  # bad time falls back to midnight
+        ('2024-1-5', '10:30:00', datetime(2024, 1, 5, 10, 30)),
+        ('2024-13-01', '10:30:00', None),
+        ('', '10:30:00', None),
+    ])
+    def test_parse_datetime(self, date_str, time_str, expected):
+        """Dive dates and times parse in each layout Subsurface writes"""
+        parser = SubsurfaceParser('unused.ssrf')
+        assert parser._parse_datetime(date_str, time_str) == expected
     
     def test_file_not_found(self):
         """Test handling of missing file"""
@@ -153,22 +202,78 @@ class TestSubsurfaceParser:
             parser = SubsurfaceParser('/nonexistent/file.ssrf')
             parser.parse()
     
-    def test_invalid_xml(self):
+    def test_parse_cached_reuses_result_until_file_changes(self, tmp_path):
+        """A second parse of an unchanged file is served from the cache"""
+        ssrf_file = tmp_path / 'log.ssrf'
+        ssrf_file.write_text('''<?xml version="1.0"?>
+<divelog program='subsurface' version='3'>
+<dive number='1' date='2024-01-15' time='10:30:00' duration='45:00'>
+</dive>
+</divelog>''')
+        cache_dir = str(tmp_path / 'cache')
+
+        dives = SubsurfaceParser(str(ssrf_file)).parse_cached(cache_dir)
+        assert [dive.number for dive in dives] == [1]
+        assert len(os.listdir(cache_dir)) == 1
+
+        with patch.object(SubsurfaceParser, 'parse') as mock_parse:
+            cached = SubsurfaceParser(str(ssrf_file)).parse_cached(cache_dir)
+        mock_parse.assert_not_called()
+        assert cached == dives
+
+        # Changing the file (size and mtime) invalidates the entry, which is
+        # replaced rather than joined by a second one
+        ssrf_file.write_text(ssrf_file.read_text().replace("number='1'", "number='12'"))
+        dives = SubsurfaceParser(str(ssrf_file)).parse_cached(cache_dir)
+        assert [dive.number for dive in dives] == [12]
+        assert len(os.listdir(cache_dir)) == 1
+
+    @pytest.mark.parametrize("cache_bytes", [
+        b'not a pickle',
+        pickle.dumps(['wrong', 'shape', 'entry']),
+        pickle.dumps('stamp-and-dives'),
+    ])
+    def test_parse_cached_ignores_bad_cache_entry(self, tmp_path, cache_bytes):
+        """A corrupt or wrong-shape cache entry falls back to a normal parse"""
+        ssrf_file = tmp_path / 'log.ssrf'
+        ssrf_file.write_text('''<?xml version="1.0"?>
+<divelog program='subsurface' version='3'>
+<dive number='1' date='2024-01-15' time='10:30:00' duration='45:00'>
+</dive>
+</divelog>''')
+        cache_dir = tmp_path / 'cache'
+        SubsurfaceParser(str(ssrf_file)).parse_cached(str(cache_dir))
+        cache_path, = cache_dir.iterdir()
+        cache_path.write_bytes(cache_bytes)
+
+        dives = SubsurfaceParser(str(ssrf_file)).parse_cached(str(cache_dir))
+
+        assert [dive.number for dive in dives] == [1]
+
+    @pytest.mark.skipif(sys.version_info < (3, 10), reason="dataclass slots need Python 3.10")
+    def test_dives_are_slotted(self):
+        """Dive and DiveSite instances carry no per-instance __dict__"""
+        site = DiveSite(uuid='site1', name='Test Site')
+        dive = Dive(number=1, date=datetime(2024, 1, 15), time=datetime(2024, 1, 15),
+                    duration_minutes=45, site=site, tags=['camera'])
+
+        assert not hasattr(site, '__dict__')
+        assert not hasattr(dive, '__dict__')
+        assert dive.tags == frozenset({'camera'})
+
+    def test_invalid_xml(self, ssrf_file):
         """Test handling of invalid XML"""
         content = '''<?xml version="1.0"?>
 <divelog>
   <unclosed_tag>
 </divelog>'''
 
-        file_path = self.create_test_ssrf_file(content)
-        try:
-            parser = SubsurfaceParser(file_path)
-            with pytest.raises(ValueError, match="Invalid XML"):
-                parser.parse()
-        finally:
-            os.unlink(file_path)
+        file_path = ssrf_file(content)
+        parser = SubsurfaceParser(file_path)
+        with pytest.raises(ValueError, match="Invalid XML"):
+            parser.parse()
 
-    def test_parse_dive_with_tags(self):
+    def test_parse_dive_with_tags(self, ssrf_file):
         """Test parsing dive with tags"""
         content = '''<?xml version="1.0"?>
 <divelog program='subsurface' version='3'>
@@ -180,20 +285,17 @@ class TestSubsurfaceParser:
 </dive>
 </divelog>'''
 
-        file_path = self.create_test_ssrf_file(content)
-        try:
-            parser = SubsurfaceParser(file_path)
-            dives = parser.parse()
+        file_path = ssrf_file(content)
+        parser = SubsurfaceParser(file_path)
+        dives = parser.parse()
 
-            assert len(dives) == 1
-            dive = dives[0]
-            assert len(dive.tags) == 2
-            assert 'camera' in dive.tags
-            assert 'night' in dive.tags
-        finally:
-            os.unlink(file_path)
+        assert len(dives) == 1
+        dive = dives[0]
+        assert len(dive.tags) == 2
+        assert 'camera' in dive.tags
+        assert 'night' in dive.tags
 
-    def test_parse_dive_without_tags(self):
+    def test_parse_dive_without_tags(self, ssrf_file):
         """Test parsing dive without tags"""
         content = '''<?xml version="1.0"?>
 <divelog program='subsurface' version='3'>
@@ -205,18 +307,15 @@ class TestSubsurfaceParser:
 </dive>
 </divelog>'''
 
-        file_path = self.create_test_ssrf_file(content)
-        try:
-            parser = SubsurfaceParser(file_path)
-            dives = parser.parse()
+        file_path = ssrf_file(content)
+        parser = SubsurfaceParser(file_path)
+        dives = parser.parse()
 
-            assert len(dives) == 1
-            dive = dives[0]
-            assert len(dive.tags) == 0
-        finally:
-            os.unlink(file_path)
+        assert len(dives) == 1
+        dive = dives[0]
+        assert len(dive.tags) == 0
 
-    def test_parse_dive_with_single_tag(self):
+    def test_parse_dive_with_single_tag(self, ssrf_file):
         """Test parsing dive with single tag"""
         content = '''<?xml version="1.0"?>
 <divelog program='subsurface' version='3'>
@@ -228,14 +327,11 @@ class TestSubsurfaceParser:
 </dive>
 </divelog>'''
 
-        file_path = self.create_test_ssrf_file(content)
-        try:
-            parser = SubsurfaceParser(file_path)
-            dives = parser.parse()
-
-            assert len(dives) == 1
-            dive = dives[0]
-            assert len(dive.tags) == 1
-            assert 'camera' in dive.tags
-        finally:
-            os.unlink(file_path)
\ No newline at end of file
+        file_path = ssrf_file(content)
+        parser = SubsurfaceParser(file_path)
+        dives = parser.parse()
+
+        assert len(dives) == 1
+        dive = dives[0]
+        assert len(dive.tags) == 1
+        assert 'camera' in dive.tags
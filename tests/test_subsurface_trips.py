@@ -1,21 +1,11 @@
 """Tests for subsurface_parser module with trip organization"""
 
-import tempfile
-import os
-
 from photo_tagger.subsurface_parser import SubsurfaceParser
 
 
 class TestSubsurfaceTripParsing:
     
-    def create_test_ssrf_file(self, content):
-        """Helper to create temporary SSRF file"""
-        temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.ssrf', delete=False)
-        temp_file.write(content)
-        temp_file.close()
-        return temp_file.name
-    
-    def test_parse_dives_in_trips(self):
+    def test_parse_dives_in_trips(self, ssrf_file):
         """Test parsing dives organized in trips"""
         content = '''<?xml version="1.0"?>
 <divelog program='subsurface' version='3'>
@@ -35,22 +25,19 @@ class TestSubsurfaceTripParsing:
 </dives>
 </divelog>'''
         
-        file_path = self.create_test_ssrf_file(content)
-        try:
-            parser = SubsurfaceParser(file_path)
-            dives = parser.parse()
-            
-            assert len(dives) == 2
-            assert dives[0].number == 1
-            assert dives[0].site.name == 'Trip Site 1'
-            assert dives[0].duration_minutes == 45
-            assert dives[1].number == 2
-            assert dives[1].site.name == 'Trip Site 2'
-            assert dives[1].duration_minutes == 38
-        finally:
-            os.unlink(file_path)
+        file_path = ssrf_file(content)
+        parser = SubsurfaceParser(file_path)
+        dives = parser.parse()
+        
+        assert len(dives) == 2
+        assert dives[0].number == 1
+        assert dives[0].site.name == 'Trip Site 1'
+        assert dives[0].duration_minutes == 45
+        assert dives[1].number == 2
+        assert dives[1].site.name == 'Trip Site 2'
+        assert dives[1].duration_minutes == 38
     
-    def test_parse_mixed_dives_and_trips(self):
+    def test_parse_mixed_dives_and_trips(self, ssrf_file):
         """Test parsing both standalone dives and trip-organized dives"""
         content = '''<?xml version="1.0"?>
 <divelog program='subsurface' version='3'>
@@ -72,30 +59,27 @@ class TestSubsurfaceTripParsing:
 </dives>
 </divelog>'''
         
-        file_path = self.create_test_ssrf_file(content)
-        try:
-            parser = SubsurfaceParser(file_path)
-            dives = parser.parse()
-            
-            assert len(dives) == 3
-            # Should find standalone dive under root
-            standalone_dive = next((d for d in dives if d.number == 100), None)
-            assert standalone_dive is not None
-            assert standalone_dive.site.name == 'Standalone Site'
-            
-            # Should find trip-organized dive
-            trip_dive = next((d for d in dives if d.number == 150), None)
-            assert trip_dive is not None
-            assert trip_dive.site.name == 'Trip Site'
-            
-            # Should find standalone dive in dives section
-            dives_standalone = next((d for d in dives if d.number == 200), None)
-            assert dives_standalone is not None
-            assert dives_standalone.site.name == 'Standalone Site'
-        finally:
-            os.unlink(file_path)
+        file_path = ssrf_file(content)
+        parser = SubsurfaceParser(file_path)
+        dives = parser.parse()
+        
+        assert len(dives) == 3
+        # Should find standalone dive under root
+        standalone_dive = next((d for d in dives if d.number == 100), None)
+        assert standalone_dive is not None
+        assert standalone_dive.site.name == 'Standalone Site'
+        
+        # Should find trip-organized dive
+        trip_dive = next((d for d in dives if d.number == 150), None)
+        assert trip_dive is not None
+        assert trip_dive.site.name == 'Trip Site'
+        
+        # Should find standalone dive in dives section
+        dives_standalone = next((d for d in dives if d.number == 200), None)
+        assert dives_standalone is not None
+        assert dives_standalone.site.name == 'Standalone Site'
     
-    def test_parse_duration_with_min_suffix(self):
+    def test_parse_duration_with_min_suffix(self, ssrf_file):
         """Test parsing duration with 'min' suffix"""
         content = '''<?xml version="1.0"?>
 <divelog program='subsurface' version='3'>
@@ -113,18 +97,15 @@ class TestSubsurfaceTripParsing:
 </dives>
 </divelog>'''
         
-        file_path = self.create_test_ssrf_file(content)
-        try:
-            parser = SubsurfaceParser(file_path)
-            dives = parser.parse()
-            
-            assert len(dives) == 2
-            assert dives[0].duration_minutes == 45  # 45:30 -> 45 minutes
-            assert dives[1].duration_minutes == 75  # 1:15:45 -> 75 minutes
-        finally:
-            os.unlink(file_path)
+        file_path = ssrf_file(content)
+        parser = SubsurfaceParser(file_path)
+        dives = parser.parse()
+        
+        assert len(dives) == 2
+        assert dives[0].duration_minutes == 45  # 45:30 -> 45 minutes
+        assert dives[1].duration_minutes == 75  # 1:15:45 -> 75 minutes
     
-    def test_multiple_trips(self):
+    def test_multiple_trips(self, ssrf_file):
         """Test parsing multiple trips with dives"""
         content = '''<?xml version="1.0"?>
 <divelog program='subsurface' version='3'>
@@ -146,15 +127,44 @@ class TestSubsurfaceTripParsing:
 </dives>
 </divelog>'''
         
-        file_path = self.create_test_ssrf_file(content)
-        try:
-            parser = SubsurfaceParser(file_path)
-            dives = parser.parse()
-            
-            assert len(dives) == 2
-            assert dives[0].number == 1
-            assert dives[0].site.name == 'Site A'
-            assert dives[1].number == 2
-            assert dives[1].site.name == 'Site B'
-        finally:
-            os.unlink(file_path)
\ No newline at end of file
+        file_path = ssrf_file(content)
+        parser = SubsurfaceParser(file_path)
+        dives = parser.parse()
+        
+        assert len(dives) == 2
+        assert dives[0].number == 1
+        assert dives[0].site.name == 'Site A'
+        assert dives[1].number == 2
+        assert dives[1].site.name == 'Site B'
+    def test_dives_before_divesites_and_nested_elements(self, ssrf_file):
+        """Dives listed before <divesites> are still linked, dive profile
+        children are skipped, and dives outside the known sections are ignored"""
+        content = '''<?xml version="1.0"?>
+<divelog program='subsurface' version='3'>
+<dives>
+<trip date='2024-01-15' time='10:30:00' location='Trip 1'>
+<dive number='1' date='2024-01-15' time='10:30:00' duration='45:00 min' divesiteid='site1'>
+<divecomputer model='Test'>
+<sample time='0:10 min' depth='3.0 m' />
+<sample time='0:20 min' depth='6.0 m' />
+</divecomputer>
+</dive>
+</trip>
+</dives>
+<settings>
+<dive number='99' date='2024-01-01' time='10:00:00' duration='10:00 min' />
+</settings>
+<divesites>
+<site uuid='site1' name='Site A' gps='21.0 -72.0'>
+</site>
+</divesites>
+</divelog>'''
+        
+        file_path = ssrf_file(content)
+        parser = SubsurfaceParser(file_path)
+        dives = parser.parse()
+        
+        assert len(dives) == 1
+        assert dives[0].number == 1
+        assert dives[0].site.name == 'Site A'
+        assert dives[0].site.latitude == 21.0
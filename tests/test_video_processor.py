@@ -0,0 +1,171 @@
+"""Tests for video_processor module"""
+
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from lxml import etree
+
+from photo_tagger.video_processor import (
+    _EXIFTOOL,
+    VideoProcessor,
+    _parse_video_datetime,
+)
+
+
+class TestVideoProcessor:
+
+    def create_session(self, tags):
+        """Helper to build a mock ExifToolSession returning the given tags"""
+        session = MagicMock()
+        session.available = True
+        session.get_tags.side_effect = lambda paths, _: {path: tags for path in paths}
+        return session
+
+    @patch('photo_tagger.video_processor.subprocess.run')
+    def test_get_capture_time_uses_session(self, mock_run, tmp_path):
+        """Reads go through the shared session instead of spawning exiftool"""
+        video_file = tmp_path / "clip.mp4"
+        video_file.write_bytes(b"fake")
+        session = self.create_session({'CreateDate': '2024:01:15 10:30:00'})
+
+        processor = VideoProcessor(str(video_file), exiftool_session=session)
+
+        assert processor.get_capture_time() == datetime(2024, 1, 15, 10, 30, 0)
+        mock_run.assert_not_called()
+
+    @pytest.mark.parametrize('date_str,expected', [
+        ('2024:01:15 10:30:00', datetime(2024, 1, 15, 10, 30, 0)),
+        ('2024-01-15 10:30:00', datetime(2024, 1, 15, 10, 30, 0)),
+        ('2024:01:15 10:30:00+02:00',
+         datetime(2024, 1, 15, 10, 30, 0, tzinfo=timezone(timedelta(hours=2)))),
+        ('2024:01-15 10:30:00', None),
+        ('2024:13:15 10:30:00', None),
+        ('0000:00:00 00:00:00', None),
+    ])
+    def test_parse_video_datetime(self, date_str, expected):
+        """Exiftool date strings parse in each layout, and junk gives None"""
+        assert _parse_video_datetime(date_str) == expected
+
+    @pytest.mark.parametrize('tags,expected', [
+        # Separate magnitude and hemisphere reference
+        ({'GPSLatitude': 20.5, 'GPSLatitudeRef': 'S',
+          'GPSLongitude': 86.95, 'GPSLongitudeRef': 'W'}, (-20.5, -86.95)),
+        # Composite values are already signed; the reference must not flip them back
+        ({'GPSLatitude': -20.5, 'GPSLatitudeRef': 'S',
+          'GPSLongitude': -86.95, 'GPSLongitudeRef': 'W'}, (-20.5, -86.95)),
+        # Signed values without references
+        ({'GPSLatitude': -20.5, 'GPSLongitude': 86.95}, (-20.5, 86.95)),
+        ({}, None),
+    ])
+    def test_get_current_gps(self, tmp_path, tags, expected):
+        """GPS tags are converted to signed decimal degrees"""
+        video_file = tmp_path / "clip.mov"
+        video_file.write_bytes(b"fake")
+
+        processor = VideoProcessor(str(video_file), exiftool_session=self.create_session(tags))
+
+        assert processor.get_current_gps() == expected
+
+    def test_metadata_read_once_and_invalidated_by_write(self, tmp_path):
+        """Date and GPS come from one cached read, refreshed after a GPS write"""
+        video_file = tmp_path / "clip.mp4"
+        video_file.write_bytes(b"fake")
+        session = self.create_session({'CreateDate': '2024:01:15 10:30:00',
+                                       'GPSLatitude': 20.5, 'GPSLongitude': -86.95})
+        session.set_gps.return_value = True
+
+        processor = VideoProcessor(str(video_file), exiftool_session=session)
+        processor.get_capture_time()
+        processor.get_current_gps()
+
+        assert session.get_tags.call_count == 1
+
+        assert processor.set_gps_coordinates(20.5, -86.95)
+        processor.get_current_gps()
+
+        assert session.get_tags.call_count == 2
+
+    def test_load_metadata_batch_reads_once(self, tmp_path):
+        """A batch of videos is primed from a single exiftool round-trip"""
+        session = self.create_session({'CreateDate': '2024:01:15 10:30:00'})
+        processors = []
+        for name in ['a.mp4', 'b.mov']:
+            video_file = tmp_path / name
+            video_file.write_bytes(b"fake")
+            processors.append(VideoProcessor(str(video_file), exiftool_session=session))
+
+        VideoProcessor.load_metadata_batch(processors, session)
+
+        for processor in processors:
+            assert processor.get_capture_time() == datetime(2024, 1, 15, 10, 30, 0)
+        assert session.get_tags.call_count == 1
+
+    @patch('photo_tagger.video_processor.subprocess.run')
+    def test_load_metadata_batch_without_session(self, mock_run, tmp_path):
+        """Without a session, a batch is read by one one-shot exiftool run"""
+        processors = []
+        for name in ['a.mp4', 'b.mov']:
+            video_file = tmp_path / name
+            video_file.write_bytes(b"fake")
+            processors.append(VideoProcessor(str(video_file)))
+        a_path, b_path = (processor.video_path for processor in processors)
+        mock_run.return_value = MagicMock(stdout=json.dumps([
+            {'SourceFile': a_path, 'CreateDate': '2024:01:15 10:30:00'},
+            {'SourceFile': b_path, 'Error': 'File format error'},
+        ]))
+
+        VideoProcessor.load_metadata_batch(processors)
+
+        assert mock_run.call_count == 1
+        assert mock_run.call_args.args[0] == [_EXIFTOOL, '-@', '-']
+        assert mock_run.call_args.kwargs['input'].splitlines()[-2:] == [a_path, b_path]
+        assert processors[0].get_capture_time() == datetime(2024, 1, 15, 10, 30, 0)
+        assert mock_run.call_count == 1
+
+        # A file exiftool couldn't read in the batch is retried on its own
+        mock_run.return_value = MagicMock(stdout='[]')
+        assert processors[1].get_capture_time() is None
+        assert mock_run.call_count == 2
+
+    @patch('photo_tagger.video_processor.subprocess.run')
+    def test_run_exiftool_matches_results_by_position(self, mock_run):
+        """Results map back to the caller's paths even when exiftool rewrites SourceFile"""
+        mock_run.return_value = MagicMock(stdout=json.dumps([
+            {'SourceFile': 'C:/dives/a.mp4', 'CreateDate': '2024:01:15 10:30:00'},
+            {'SourceFile': 'C:/dives/b.mov', 'CreateDate': '2024:01:16 09:00:00'},
+        ]))
+
+        metadata = VideoProcessor._run_exiftool(['C:\\dives\\a.mp4', 'C:\\dives\\b.mov'], ['CreateDate'])
+
+        assert metadata['C:\\dives\\a.mp4']['CreateDate'] == '2024:01:15 10:30:00'
+        assert metadata['C:\\dives\\b.mov']['CreateDate'] == '2024:01:16 09:00:00'
+
+    def test_create_xmp_sidecar_escapes_keywords(self, tmp_path):
+        """Site names with XML special characters still produce a valid sidecar"""
+        video_file = tmp_path / "clip.mp4"
+        video_file.write_bytes(b"fake")
+        processor = VideoProcessor(str(video_file), exiftool_session=self.create_session({}))
+
+        assert processor.create_xmp_sidecar(['Fish & Chips', '<Reef>'], latitude=20.5, longitude=-86.95,
+                                            capture_time=datetime(2024, 1, 15, 10, 30, 0)) is True
+
+        root = etree.parse(str(tmp_path / "clip.xmp")).getroot()
+        rdf = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}'
+        assert [li.text for li in root.iter(f'{rdf}li')] == ['Fish & Chips', '<Reef>'] * 2
+
+    def test_find_videos(self, tmp_path):
+        """Videos are found recursively by extension, skipping excluded folders"""
+        (tmp_path / 'day1').mkdir()
+        (tmp_path / 'Exports').mkdir()
+        for name in ['clip.MP4', 'notes.txt', 'photo.jpg', 'day1/dive.mov', 'Exports/edit.mp4']:
+            (tmp_path / name).write_bytes(b"fake")
+
+        assert VideoProcessor.find_videos(str(tmp_path), excluded_folders=['Exports']) == sorted([
+            str(tmp_path / 'clip.MP4'), str(tmp_path / 'day1' / 'dive.mov'),
+        ])
+        assert VideoProcessor.find_videos(str(tmp_path), recursive=False) == [str(tmp_path / 'clip.MP4')]
+
+        with pytest.raises(FileNotFoundError):
+            VideoProcessor.find_videos(str(tmp_path / 'missing'))
@@ -1,20 +1,24 @@
 """Tests for XMP sidecar file functionality"""
 
-import tempfile
+import pytest
 import os
+from datetime import datetime
+from unittest.mock import patch
 from lxml import etree
 
 from photo_tagger.image_processor import ImageProcessor
 
 
+@pytest.fixture
+def image_and_xmp(tmp_path):
+    """An empty image file and the path its XMP sidecar would be written to"""
+    image_path = tmp_path / 'image.jpg'
+    image_path.touch()
+    return str(image_path), str(tmp_path / 'image.xmp')
+
+
 class TestXMPProcessor:
     
-    def create_test_image_file(self, extension='.jpg'):
-        """Helper to create temporary image file"""
-        temp_file = tempfile.NamedTemporaryFile(suffix=extension, delete=False)
-        temp_file.close()
-        return temp_file.name
-    
     def create_test_xmp_content(self, keywords):
         """Helper to create test XMP content"""
         keyword_items = '\n'.join([f'     <rdf:li>{keyword}</rdf:li>' for keyword in keywords])
@@ -42,175 +46,219 @@ class TestXMPProcessor:
 </x:xmpmeta>
 '''
     
-    def test_create_xmp_sidecar_new_file(self):
+    def test_create_xmp_sidecar_new_file(self, image_and_xmp):
         """Test creating new XMP sidecar file"""
-        image_path = self.create_test_image_file()
-        xmp_path = os.path.splitext(image_path)[0] + '.xmp'
-        
-        try:
-            processor = ImageProcessor(image_path)
-            keywords = ['Test Site', 'Diving']
-            
-            success = processor.create_xmp_sidecar(keywords, dry_run=False)
-            
-            assert success is True
-            assert os.path.exists(xmp_path)
-            
-            # Parse and verify XMP content
-            tree = etree.parse(xmp_path)
-            root = tree.getroot()
-            
-            namespaces = {
-                'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
-                'dc': 'http://purl.org/dc/elements/1.1/',
-                'lightroom': 'http://ns.adobe.com/lightroom/1.0/'
-            }
-            
-            # Check dc:subject keywords
-            dc_keywords = root.xpath('//dc:subject/rdf:Bag/rdf:li/text()', namespaces=namespaces)
-            assert 'Test Site' in dc_keywords
-            assert 'Diving' in dc_keywords
-            
-            # Check lightroom:hierarchicalSubject keywords
-            lr_keywords = root.xpath('//lightroom:hierarchicalSubject/rdf:Bag/rdf:li/text()', namespaces=namespaces)
-            assert 'Test Site' in lr_keywords
-            assert 'Diving' in lr_keywords
-            
-        finally:
-            if os.path.exists(image_path):
-                os.unlink(image_path)
-            if os.path.exists(xmp_path):
-                os.unlink(xmp_path)
+        image_path, xmp_path = image_and_xmp
+        
+        processor = ImageProcessor(image_path)
+        keywords = ['Test Site', 'Diving']
+        
+        success = processor.create_xmp_sidecar(keywords, dry_run=False)
+        
+        assert success is True
+        assert os.path.exists(xmp_path)
+        
+        # Parse and verify XMP content
+        tree = etree.parse(xmp_path)
+        root = tree.getroot()
+        
+        namespaces = {
+            'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
+            'dc': 'http://purl.org/dc/elements/1.1/',
+            'lightroom': 'http://ns.adobe.com/lightroom/1.0/'
+        }
+        
+        # Check dc:subject keywords
+        dc_keywords = root.xpath('//dc:subject/rdf:Bag/rdf:li/text()', namespaces=namespaces)
+        assert 'Test Site' in dc_keywords
+        assert 'Diving' in dc_keywords
+        
+        # Check lightroom:hierarchicalSubject keywords
+        lr_keywords = root.xpath('//lightroom:hierarchicalSubject/rdf:Bag/rdf:li/text()', namespaces=namespaces)
+        assert 'Test Site' in lr_keywords
+        assert 'Diving' in lr_keywords
     
-    def test_create_xmp_sidecar_existing_file(self):
+    def test_create_xmp_sidecar_existing_file(self, image_and_xmp):
         """Test updating existing XMP sidecar file with new keywords"""
-        image_path = self.create_test_image_file()
-        xmp_path = os.path.splitext(image_path)[0] + '.xmp'
-        
-        try:
-            # Create existing XMP file with some keywords
-            existing_content = self.create_test_xmp_content(['Existing Keyword', 'Old Site'])
-            with open(xmp_path, 'w', encoding='utf-8') as f:
-                f.write(existing_content)
-            
-            processor = ImageProcessor(image_path)
-            new_keywords = ['New Site', 'Existing Keyword']  # One duplicate, one new
-            
-            success = processor.create_xmp_sidecar(new_keywords, dry_run=False)
-            
-            assert success is True
-            
-            # Parse and verify merged keywords
-            tree = etree.parse(xmp_path)
-            root = tree.getroot()
-            
-            namespaces = {
-                'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
-                'dc': 'http://purl.org/dc/elements/1.1/'
-            }
-            
-            dc_keywords = root.xpath('//dc:subject/rdf:Bag/rdf:li/text()', namespaces=namespaces)
-            
-            # Should have all unique keywords
-            assert 'Existing Keyword' in dc_keywords
-            assert 'Old Site' in dc_keywords
-            assert 'New Site' in dc_keywords
-            assert len([k for k in dc_keywords if k == 'Existing Keyword']) == 1  # No duplicates
-            
-        finally:
-            if os.path.exists(image_path):
-                os.unlink(image_path)
-            if os.path.exists(xmp_path):
-                os.unlink(xmp_path)
+        image_path, xmp_path = image_and_xmp
+        
+        # Create existing XMP file with some keywords
+        existing_content = self.create_test_xmp_content(['Existing Keyword', 'Old Site'])
+        with open(xmp_path, 'w', encoding='utf-8') as f:
+            f.write(existing_content)
+        
+        processor = ImageProcessor(image_path)
+        new_keywords = ['New Site', 'Existing Keyword']  # One duplicate, one new
+        
+        success = processor.create_xmp_sidecar(new_keywords, dry_run=False)
+        
+        assert success is True
+        
+        # Parse and verify merged keywords
+        tree = etree.parse(xmp_path)
+        root = tree.getroot()
+        
+        namespaces = {
+            'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
+            'dc': 'http://purl.org/dc/elements/1.1/'
+        }
+        
+        dc_keywords = root.xpath('//dc:subject/rdf:Bag/rdf:li/text()', namespaces=namespaces)
+        
+        # Should have all unique keywords
+        assert 'Existing Keyword' in dc_keywords
+        assert 'Old Site' in dc_keywords
+        assert 'New Site' in dc_keywords
+        assert len([k for k in dc_keywords if k == 'Existing Keyword']) == 1  # No duplicates
+
+    def test_update_existing_xmp_parses_once(self, image_and_xmp):
+        """Existing keywords are taken from the tree already parsed for the update"""
+        image_path, xmp_path = image_and_xmp
+
+        with open(xmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.create_test_xmp_content(['Old Site']))
+
+        processor = ImageProcessor(image_path)
+        with patch('photo_tagger.image_processor.etree.parse', wraps=etree.parse) as mock_parse, \
+                patch('photo_tagger.image_processor.etree.iterparse', wraps=etree.iterparse) as mock_iterparse:
+            assert processor.create_xmp_sidecar(['New Site'], dry_run=False) is True
+
+        # One parse in total, whichever API would have been used for a second read
+        assert mock_parse.call_count + mock_iterparse.call_count == 1
+        assert set(processor._read_existing_xmp_keywords(xmp_path)) == {'Old Site', 'New Site'}
+    
+    def test_create_xmp_sidecar_existing_file_already_current(self, image_and_xmp):
+        """A sidecar that already holds the keywords is left untouched"""
+        image_path, xmp_path = image_and_xmp
+
+        existing_content = self.create_test_xmp_content(['Existing Keyword', 'Old Site'])
+        with open(xmp_path, 'w', encoding='utf-8') as f:
+            f.write(existing_content)
+
+        processor = ImageProcessor(image_path)
+        assert processor.create_xmp_sidecar(['Old Site'], dry_run=False) is True
+
+        with open(xmp_path, encoding='utf-8') as f:
+            assert f.read() == existing_content
+
+        # GPS that isn't in the sidecar yet still triggers a rewrite
+        assert processor.create_xmp_sidecar(['Old Site'], latitude=21.5, longitude=-72.25, dry_run=False) is True
+
+        with open(xmp_path, encoding='utf-8') as f:
+            content = f.read()
+        assert '<exif:GPSLatitude>21,30.00N</exif:GPSLatitude>' in content
+        assert '<exif:GPSLongitude>72,15.00W</exif:GPSLongitude>' in content
+
+    def test_create_xmp_sidecar_merges_keywords_case_insensitively(self, image_and_xmp):
+        """A keyword differing only in case from an existing one isn't added again"""
+        image_path, xmp_path = image_and_xmp
+
+        existing_content = self.create_test_xmp_content(['Reef Dive'])
+        with open(xmp_path, 'w', encoding='utf-8') as f:
+            f.write(existing_content)
+
+        processor = ImageProcessor(image_path)
+        assert processor.create_xmp_sidecar(['reef dive'], dry_run=False) is True
+        with open(xmp_path, encoding='utf-8') as f:
+            assert f.read() == existing_content
+
+        assert processor.create_xmp_sidecar(['reef dive', 'Wall'], dry_run=False) is True
+        root = etree.parse(xmp_path).getroot()
+        dc_keywords = root.xpath('//dc:subject/rdf:Bag/rdf:li/text()',
+                                 namespaces=ImageProcessor.XMP_NAMESPACES)
+        assert dc_keywords == ['Reef Dive', 'Wall']
+
+    def test_create_xmp_sidecar_uses_given_capture_time(self, image_and_xmp):
+        """A capture time passed by the caller is written without re-reading the image"""
+        image_path, xmp_path = image_and_xmp
+        
+        processor = ImageProcessor(image_path)
+        with patch.object(processor, 'get_capture_time') as mock_get_capture_time:
+            success = processor.create_xmp_sidecar(
+                ['Test Site'], dry_run=False, capture_time=datetime(2024, 1, 15, 10, 30, 0)
+            )
+        
+        assert success is True
+        mock_get_capture_time.assert_not_called()
+        with open(xmp_path, encoding='utf-8') as f:
+            assert '2024-01-15T10:30:00' in f.read()
     
-    def test_create_xmp_sidecar_dry_run(self):
+    def test_create_xmp_sidecar_dry_run(self, image_and_xmp):
         """Test dry run mode doesn't create files"""
-        image_path = self.create_test_image_file()
-        xmp_path = os.path.splitext(image_path)[0] + '.xmp'
-        
-        try:
-            processor = ImageProcessor(image_path)
-            keywords = ['Test Site']
-            
-            success = processor.create_xmp_sidecar(keywords, dry_run=True)
-            
-            assert success is True
-            assert not os.path.exists(xmp_path)
-            
-        finally:
-            if os.path.exists(image_path):
-                os.unlink(image_path)
-            if os.path.exists(xmp_path):
-                os.unlink(xmp_path)
+        image_path, xmp_path = image_and_xmp
+        
+        processor = ImageProcessor(image_path)
+        keywords = ['Test Site']
+        
+        success = processor.create_xmp_sidecar(keywords, dry_run=True)
+        
+        assert success is True
+        assert not os.path.exists(xmp_path)
     
-    def test_read_existing_xmp_keywords(self):
+    def test_read_existing_xmp_keywords(self, image_and_xmp):
         """Test reading keywords from existing XMP file"""
-        image_path = self.create_test_image_file()
-        xmp_path = os.path.splitext(image_path)[0] + '.xmp'
-        
-        try:
-            # Create XMP file with known keywords
-            test_keywords = ['Reef Dive', 'Blue Water', 'Coral Garden']
-            xmp_content = self.create_test_xmp_content(test_keywords)
-            
-            with open(xmp_path, 'w', encoding='utf-8') as f:
-                f.write(xmp_content)
-            
-            processor = ImageProcessor(image_path)
-            existing_keywords = processor._read_existing_xmp_keywords(xmp_path)
-            
-            assert len(existing_keywords) == 3
-            for keyword in test_keywords:
-                assert keyword in existing_keywords
-                
-        finally:
-            if os.path.exists(image_path):
-                os.unlink(image_path)
-            if os.path.exists(xmp_path):
-                os.unlink(xmp_path)
+        image_path, xmp_path = image_and_xmp
+        
+        # Create XMP file with known keywords
+        test_keywords = ['Reef Dive', 'Blue Water', 'Coral Garden']
+        xmp_content = self.create_test_xmp_content(test_keywords)
+        
+        with open(xmp_path, 'w', encoding='utf-8') as f:
+            f.write(xmp_content)
+        
+        processor = ImageProcessor(image_path)
+        existing_keywords = processor._read_existing_xmp_keywords(xmp_path)
+        
+        assert len(existing_keywords) == 3
+        for keyword in test_keywords:
+            assert keyword in existing_keywords
     
-    def test_read_existing_xmp_keywords_invalid_file(self):
+    def test_extract_keywords_from_tree_dedups_in_order(self, image_and_xmp):
+        """Keywords from both bags come back once each, dc:subject first"""
+        image_path, _ = image_and_xmp
+
+        xmp_content = self.create_test_xmp_content(['Reef Dive', 'Wreck'])
+        # Give the hierarchicalSubject bag different items from dc:subject
+        hierarchical_start = xmp_content.index('<lightroom:hierarchicalSubject>')
+        hierarchical_end = xmp_content.index('</lightroom:hierarchicalSubject>')
+        xmp_content = (xmp_content[:hierarchical_start]
+                       + xmp_content[hierarchical_start:hierarchical_end].replace('Reef Dive', 'Night Dive')
+                       + xmp_content[hierarchical_end:])
+        root = etree.fromstring(xmp_content.encode('utf-8'))
+
+        processor = ImageProcessor(image_path)
+
+        assert processor._extract_keywords_from_tree(root) == ['Reef Dive', 'Wreck', 'Night Dive']
+
+    def test_read_existing_xmp_keywords_invalid_file(self, image_and_xmp):
         """Test handling of invalid XMP file"""
-        image_path = self.create_test_image_file()
-        xmp_path = os.path.splitext(image_path)[0] + '.xmp'
-        
-        try:
-            # Create invalid XML file
-            with open(xmp_path, 'w', encoding='utf-8') as f:
-                f.write('This is not valid XML')
-            
-            processor = ImageProcessor(image_path)
-            existing_keywords = processor._read_existing_xmp_keywords(xmp_path)
-            
-            # Should return empty list for invalid file
-            assert existing_keywords == []
-                
-        finally:
-            if os.path.exists(image_path):
-                os.unlink(image_path)
-            if os.path.exists(xmp_path):
-                os.unlink(xmp_path)
+        image_path, xmp_path = image_and_xmp
+        
+        # Create invalid XML file
+        with open(xmp_path, 'w', encoding='utf-8') as f:
+            f.write('This is not valid XML')
+        
+        processor = ImageProcessor(image_path)
+        existing_keywords = processor._read_existing_xmp_keywords(xmp_path)
+        
+        # Should return empty list for invalid file
+        assert existing_keywords == []
     
-    def test_xmp_content_format(self):
+    def test_xmp_content_format(self, image_and_xmp):
         """Test that generated XMP content is well-formed XML"""
-        image_path = self.create_test_image_file()
-        
-        try:
-            processor = ImageProcessor(image_path)
-            keywords = ['Test Site', 'Underwater Photography']
-            
-            xmp_content = processor._create_xmp_content(keywords)
-            
-            # Parse to ensure well-formed XML
-            root = etree.fromstring(xmp_content.encode('utf-8'))
-            
-            # Verify structure
-            assert root.tag == '{adobe:ns:meta/}xmpmeta'
-            
-            # Check namespaces are declared
-            rdf_elements = root.xpath('//rdf:RDF', namespaces={'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'})
-            assert len(rdf_elements) == 1
-            
-        finally:
-            if os.path.exists(image_path):
-                os.unlink(image_path)
\ No newline at end of file
+        image_path, _ = image_and_xmp
+        
+        processor = ImageProcessor(image_path)
+        keywords = ['Test Site', 'Underwater Photography']
+        
+        xmp_content = processor._create_xmp_content(keywords)
+        
+        # Parse to ensure well-formed XML
+        root = etree.fromstring(xmp_content.encode('utf-8'))
+        
+        # Verify structure
+        assert root.tag == '{adobe:ns:meta/}xmpmeta'
+        
+        # Check namespaces are declared
+        rdf_elements = root.xpath('//rdf:RDF', namespaces={'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'})
+        assert len(rdf_elements) == 1